@@ -2,52 +2,69 @@
 AzamPay payment gateway Client SDK
 """
 
-import re
-import sys
-import json
-import requests
-import logging
-import phonenumbers
-from phonenumbers import carrier
-from json.decoder import JSONDecodeError
-from typing import List, Dict, Optional, Any, Tuple
+import time
+from functools import partial
+from typing import TYPE_CHECKING, List, Dict, Iterable, Iterator, Optional, Any, Tuple, Union
 from azampay.azampay_exceptions import (
     InvalidCredentials,
     BadRequest,
     InvalidURL,
     InternalServerError,
+    CircuitOpen,
+    EndpointOverloaded,
 )
-
-# Setup Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
+from azampay.base import BaseAzampay
+from azampay.transport import HTTPTransport, transient_errors
+from azampay.cache import PartnerCatalog, PaymentLinkCache
+from azampay.auth import TokenManager
+from azampay.batch import BatchResult, run_batch
+from azampay.ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+from azampay.retry import NO_RETRY, RetryPolicy
+from azampay.response import APIResponse, ResponseMeta
+from azampay.circuit import CircuitBreaker, CircuitBreakerRegistry
+from azampay.metrics import (
+    HTTP_TOTAL,
+    HTTP_TTFB,
+    RATE_LIMIT_WAIT,
+    REQUESTS,
+    RETRIES,
+    InMemoryMetrics,
+    MetricsHook,
+    OpenTelemetryMetrics,
+    PrometheusMetrics,
+)
+from azampay.checkout import (
+    BankCheckoutRequest,
+    CheckoutRequest,
+    MobileCheckoutRequest,
+    PaymentLinkRequest,
+    PaymentLinkTemplate,
+)
+from azampay.transactions import (
+    InMemoryTransactionStore,
+    SQLiteTransactionStore,
+    Transaction,
+    TransactionRegistry,
+    TransactionStore,
 )
+from azampay.aio import AsyncAzampay, AsyncHTTPTransport
+from azampay.log import logger, enable_queue_logging
+from azampay.models import CheckoutResult, Partner, TokenInfo
+from azampay.hedge import HedgePolicy, LatencyTracker
+from azampay import serialization
+from azampay.serialization import dumps, loads
 
+if TYPE_CHECKING:
+    import requests
 
-class Azampay(object):
+Body = Union[Dict[Any, Any], bytes, None]
+
+
+class Azampay(BaseAzampay):
     """
     AzamPay payment gateway Client SDK
     """
 
-    SANDBOX_AUTH_BASE_URL: str = "https://authenticator-sandbox.azampay.co.tz"
-    SANDBOX_BASE_URL: str = "https://sandbox.azampay.co.tz"
-    AUTH_BASE_URL: Optional[str] = "https://authenticator.azampay.co.tz"
-    BASE_URL: Optional[str] = "https://checkout.azampay.co.tz"
-
-    MNOS_MAP: Dict[str, str] = {
-        "Tigo": "Tigo",
-        "Airtel": "Airtel",
-        "Halopesa": "Halopesa",
-        "Azampesa": "Azampesa",
-        "Mpesa": "Mpesa",
-    }
-
-    SUPPORTED_BANKS: List[str] = ["CRDB", "NMB"]
-
-    SUPPORTED_CURRENCIES: List[str] = ["TZS"]
-
     def __init__(
         self,
         *,
@@ -56,6 +73,17 @@ class Azampay(object):
         client_secret: str,
         x_api_key: str = None,
         sandbox: Optional[bool] = True,
+        transport: Optional[HTTPTransport] = None,
+        partner_cache_ttl: float = 300.0,
+        token_refresh_margin: float = 60.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        metrics: Optional[MetricsHook] = None,
+        transactions: Optional[TransactionRegistry] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        payment_link_cache_size: int = 10000,
+        partner_catalog: Optional[PartnerCatalog] = None,
+        hedging: Optional[HedgePolicy] = None,
     ):
         """__init__ method
 
@@ -68,6 +96,22 @@ class Azampay(object):
             base_url (str, optional): Production base_url. Defaults to None.
             auth_url (str, optional): Production auth_base_url. Defaults to None.
             sandbox (bool, optional): determines whether you're running on sandbox or production url. Defaults to True.
+            transport (HTTPTransport, optional): Pooled HTTP transport to send requests through. Defaults to a new HTTPTransport.
+            partner_cache_ttl (float, optional): Seconds the payment partners list is cached for. Defaults to 300.
+            token_refresh_margin (float, optional): Seconds before expiry at which the access token is refreshed. Defaults to 60.
+            retry_policy (RetryPolicy, optional): How transient failures of idempotent calls are replayed. Defaults to RetryPolicy().
+            circuit_breakers (CircuitBreakerRegistry, optional): Circuit breakers and in-flight caps per endpoint. Defaults to CircuitBreakerRegistry().
+            metrics (MetricsHook, optional): Receives per-phase timings, HTTP timings, status codes, retries and cache hits. Defaults to no metrics.
+            transactions (TransactionRegistry, optional): Records every checkout submitted with an external id, for callbacks to complete. Defaults to None.
+            rate_limiter (RateLimiter, optional): Per-endpoint request rates to stay under, waited for before every attempt. Defaults to None.
+            payment_link_cache_size (int, optional): Minted payment links remembered by external id, 0 to mint every time. Defaults to 10000.
+            partner_catalog (PartnerCatalog, optional): Partner cache shared with other clients of the same environment,
+                e.g. by an AzampayPool. Defaults to a catalog of this client.
+            hedging (HedgePolicy, optional): Hedges the token and partner calls when they are slow,
+                optionally on alternate hosts. Defaults to None.
+
+        The access token is not fetched here, it is generated on the first authenticated call
+        and refreshed automatically before it expires.
 
         Raises:
             ValueError: When the mode is production and either base_url or auth_base_url is None
@@ -77,45 +121,61 @@ class Azampay(object):
         >>> from azampay import AzamPay
         >>> azampay = AzamPay(app_name='abc',client_id='xxx', client_secret='xyz', x_api_key='123')
         """
-        if sandbox:
-            self.AUTH_BASE_URL = self.SANDBOX_AUTH_BASE_URL
-            self.BASE_URL = self.SANDBOX_BASE_URL
-
-        self.app_name: str = app_name
-        self.client_id: str = client_id
-        self.__client_secret: str = client_secret
-        self.__token = self._token()
-        self.__x_api_key = x_api_key
-
-    def _token(self):
-        token_url: str = f"{self.AUTH_BASE_URL}/AppRegistration/GenerateToken"
-        response: Dict[str, Any] = self.post(
-            url=token_url,
-            body={
-                "appName": self.app_name,
-                "clientId": self.client_id,
-                "clientSecret": self.__client_secret,
-            },
-            _headers=False,
+        super().__init__(
+            app_name=app_name,
+            client_id=client_id,
+            client_secret=client_secret,
+            x_api_key=x_api_key,
+            sandbox=sandbox,
+            metrics=metrics,
+            transactions=transactions,
+            hedging=hedging,
         )
-        token = response["data"]["accessToken"]
-        message = response.get("message")
-        logging.info(message)
-        return token
+        self._owns_transport: bool = transport is None
+        self.transport: HTTPTransport = transport or HTTPTransport()
+        self.partners: PartnerCatalog = partner_catalog or PartnerCatalog(
+            ttl=partner_cache_ttl, metrics=self.metrics
+        )
+        self.payment_links: PaymentLinkCache = PaymentLinkCache(
+            payment_link_cache_size, metrics=self.metrics
+        )
+        self._tokens: TokenManager = TokenManager(
+            self._generate_token,
+            refresh_margin=token_refresh_margin,
+            metrics=self.metrics,
+        )
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self.circuit_breakers: CircuitBreakerRegistry = (
+            circuit_breakers or CircuitBreakerRegistry()
+        )
+        self.rate_limiter: Optional[RateLimiter] = rate_limiter
 
-    def _get_carrier(self, mobile: str) -> str:
-        """_get_carrier
+    def _generate_token(self) -> Dict[str, Any]:
+        return self.post(
+            url=self._token_url, body=self._token_body(), _headers=False, idempotent=True
+        )
 
-        Returns the carrier of the mobile number
-
-        Args:
-            mobile (str): The mobile number
+    def _token(self) -> str:
+        """_token
 
         Returns:
-            str: The carrier of the mobile number
+            str: A valid access token, generated on first use and refreshed before expiry
         """
-        mobile = phonenumbers.parse(mobile, "TZ")
-        return phonenumbers.carrier.name_for_number(mobile, "en")
+        return self._tokens.get()
+
+    def close(self) -> None:
+        """close
+
+        Releases the pooled connections, unless the transport was supplied by the caller
+        """
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self) -> "Azampay":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     @property
     def headers(self) -> Dict[str, str]:
@@ -124,14 +184,182 @@ class Azampay(object):
         Returns:
             Dict[str, str]: Authenticated headers
         """
-        return {
-            "Authorization": f"Bearer {self.__token}",
-            "Content-Type": "application/json",
-            "X-API-Key": self.__x_api_key,
-        }
+        return self._auth_headers(self._token())
+
+    def _send_once(
+        self,
+        method: str,
+        url: str,
+        body: Body,
+        token: Optional[str],
+    ) -> "requests.Response":
+        # pre-serialized request bodies go out as they are
+        payload = {"data": body if body is None or isinstance(body, bytes) else dumps(body)}
+        if token is None:
+            return self.transport.request(
+                method, url, headers={"Content-Type": "application/json"}, **payload
+            )
+        return self.transport.request(
+            method, url, headers=self._auth_headers(token), **payload
+        )
+
+    def _guarded_send(
+        self,
+        breaker: CircuitBreaker,
+        method: str,
+        url: str,
+        body: Body,
+        token: Optional[str],
+    ) -> "requests.Response":
+        breaker.acquire()
+        started = time.perf_counter()
+        try:
+            response = self._send_once(method, url, body, token)
+        except transient_errors():
+            breaker.release(False)
+            self._observe_latency(url, started)
+            raise
+        except BaseException:
+            # interrupted, cancelled or failed before sending: no outcome to record
+            breaker.release(None)
+            raise
+        breaker.release(response.status_code < 500)
+        self._observe_latency(url, started)
+        if self.metrics.enabled:
+            endpoint = self._endpoint(url)
+            # requests times the exchange up to the parsed response headers
+            self.metrics.observe(
+                HTTP_TTFB, response.elapsed.total_seconds(), {"endpoint": endpoint}
+            )
+            self.metrics.increment(
+                REQUESTS, tags={"endpoint": endpoint, "status": response.status_code}
+            )
+        return response
+
+    def _hedged_send(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        body: Body,
+        token: Optional[str],
+    ) -> "requests.Response":
+        attempts = []
+        for attempt_url in self._hedge_urls(url):
+            host = self._host(attempt_url)
+            breaker = self.circuit_breakers.get(host, endpoint)
+            attempts.append(
+                (host, partial(self._guarded_send, breaker, method, attempt_url, body, token))
+            )
+        return self.hedging.run(endpoint, attempts, self._hedge_accepts)
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        body: Body = None,
+        _headers: bool = True,
+        idempotent: Optional[bool] = None,
+        meta: Optional[ResponseMeta] = None,
+    ) -> "requests.Response":
+        """_send
+
+        Sends a request through the pooled transport, retrying once with a fresh
+        token when an authenticated call is rejected with 401/423, and replaying
+        idempotent calls on transient failures as the retry policy allows.
+        Every attempt goes through the circuit breaker of the endpoint. The token is
+        fetched before that, so its failures count against the token endpoint only.
+        Endpoints the hedging policy covers are sent through it, each replay included.
+
+        Args:
+            method (str): HTTP method
+            url (str): The url to send to
+            body (Union[Dict[Any, Any], bytes], optional): JSON body of the request, or its serialized bytes. Defaults to None.
+            _headers (bool, optional): Determines where authenticated headers should be present or not. Defaults to True.
+            idempotent (bool, optional): Whether the call is safe to replay. Defaults to True for GET only.
+            meta (ResponseMeta, optional): Filled with the final status and the number of replays. Defaults to None.
+
+        Returns:
+            requests.Response: The raw response
+
+        Raises:
+            CircuitOpen: When the endpoint's circuit breaker is open
+            EndpointOverloaded: When the endpoint's in-flight budget is exhausted
+        """
+        if idempotent is None:
+            idempotent = method == "GET"
+        endpoint = self._endpoint(url)
+        policy = self.retry_policy if idempotent else NO_RETRY
+        retries = policy.retries_for(endpoint)
+        breaker = self.circuit_breakers.get(self._host(url), endpoint)
+        hedged = self.hedging is not None and self.hedging.applies(endpoint)
+        started = time.perf_counter()
+        token = self._token() if _headers else None
+        refreshed = False
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire(endpoint)
+                if waited and self.metrics.enabled:
+                    self.metrics.observe(RATE_LIMIT_WAIT, waited, {"endpoint": endpoint})
+            try:
+                if hedged:
+                    response = self._hedged_send(endpoint, method, url, body, token)
+                else:
+                    response = self._guarded_send(breaker, method, url, body, token)
+            except transient_errors() as e:
+                if attempt >= retries:
+                    raise
+                delay = policy.backoff(attempt)
+                logger.warning(
+                    "%s failed (%s), retrying in %.2fs",
+                    endpoint,
+                    e,
+                    delay,
+                    extra={"endpoint": endpoint, "attempt": attempt + 1},
+                )
+            else:
+                if token is not None and not refreshed and response.status_code in (401, 423):
+                    # revoked before its expiry: send once more with a fresh one
+                    self._tokens.invalidate(token)
+                    token = self._token()
+                    refreshed = True
+                    continue
+                if attempt >= retries or not policy.is_retryable(response.status_code):
+                    break
+                delay = policy.backoff(attempt, response.headers.get("Retry-After"))
+                logger.warning(
+                    "%s returned %s, retrying in %.2fs",
+                    endpoint,
+                    response.status_code,
+                    delay,
+                    extra={
+                        "endpoint": endpoint,
+                        "status": response.status_code,
+                        "attempt": attempt + 1,
+                    },
+                )
+            attempt += 1
+            time.sleep(delay)
+        if self.metrics.enabled:
+            self.metrics.observe(
+                HTTP_TOTAL,
+                time.perf_counter() - started,
+                {"endpoint": endpoint, "status": response.status_code},
+            )
+            if attempt:
+                self.metrics.increment(RETRIES, attempt, {"endpoint": endpoint})
+        if meta is not None:
+            meta.status_code = response.status_code
+            meta.retries = attempt
+        return response
 
     def post(
-        self, url: str, body: Dict[Any, Any], _headers: bool = True
+        self,
+        url: str,
+        body: Body,
+        _headers: bool = True,
+        idempotent: bool = False,
     ) -> Dict[str, Any]:
         """post
 
@@ -139,89 +367,101 @@ class Azampay(object):
 
         Args:
             url (str): The url to post to
-            body (Dict[Any, Any]): JSON body of the request
+            body (Union[Dict[Any, Any], bytes]): JSON body of the request, or its serialized bytes
             _headers (bool, optional): Determines where authenticated headers should be present or not. Defaults to True.
+            idempotent (bool, optional): Whether the request may be replayed on transient failures,
+                only set it when the body carries an idempotency key. Defaults to False.
 
         Returns:
-            Dict[str, Any]: JSON response from the server
+            Dict[str, Any]: JSON response from the server, with the call metadata on ``.meta``
         """
-        if not _headers:
-            response = requests.post(
-                url=url,
-                json=body,
-                headers={"Content-Type": "application/json"},
-            )
-        else:
-            response = requests.post(url=url, json=body, headers=self.headers)
-
-        if response.status_code == 423:
-            raise InvalidCredentials
-        elif response.status_code == 400:
-            raise BadRequest(f"Bad Request: {response.text}")
-        elif response.status_code == 404:
-            raise InvalidURL("{} is not a valid url".format(url))
-        elif response.status_code == 500:
-            raise InternalServerError
-        else:
-            try:
-                return response.json()
-            except ValueError as e:
-                logging.error(e)
-                return {
-                    "message": "Something went wrong with decoding the response",
-                    "status": response.status_code,
-                    "data": response.text,
-                }
+        meta = ResponseMeta(self._endpoint(url))
+        response = self._send(
+            "POST", url, body=body, _headers=_headers, idempotent=idempotent, meta=meta
+        )
+        return self._wrap_response(
+            self._handle_response(
+                response.status_code, response.content, url
+            ),
+            meta,
+        )
 
-    @staticmethod
-    def clean_mobile_number(mobile_number: str) -> str:
-        """clean_mobile_number
+    def transaction_status(
+        self, reference: str, *, bank_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """transaction_status
 
-        Cleans the mobile number to remove any whitespace or dashes
+        Asks AzamPay for the state of a checkout, e.g. when its callback never arrived
+        (GET: /azampay/gettransactionstatus). The call is replayed on transient failures.
 
         Args:
-            mobile_number (str): The mobile number to clean
+            reference (str): The transactionId of the checkout response, or its external id
+            bank_name (str, optional): The MNO or bank the checkout went through. Defaults to None.
 
         Returns:
-            str: The cleaned mobile number
+            Dict[str, Any]: JSON response from the server, with the call metadata on ``.meta``
+
+        Example:
+
+        >>> from azampay.reconcile import parse_status
+        >>> parse_status(azampay.transaction_status('9d3d1c4e', bank_name='Airtel'))
+        'success'
         """
+        url = self._transaction_status_url(reference, bank_name)
+        meta = ResponseMeta(self._endpoint(url))
+        response = self._send("GET", url, meta=meta)
+        return self._wrap_response(
+            self._handle_response(response.status_code, response.content, url),
+            meta,
+        )
 
-        # remove any non-numeric characters
-        mobile_number = re.sub(r"[^0-9]", "", mobile_number)
-        if len(mobile_number) < 9 or len(mobile_number) > 12:
-            raise ValueError("Invalid mobile number")
-        if len(mobile_number) == 9:
-            mobile_number = f"255{mobile_number}"
-        elif len(mobile_number) == 10:
-            mobile_number = mobile_number.replace("0", "255", 1)
-        return mobile_number
-
-    @staticmethod
-    def clean_amount(amount: str):
-        # remove spaces and commas
-        amount = str(amount)
-        amount = amount.replace(" ", "").replace(",", "")
-        return amount
-
-    def supported_mnos_data(self) -> List[str]:
-        """supported_mnos
+    def circuit_states(self) -> Dict[str, Dict[str, Any]]:
+        """circuit_states
 
-        Fetches a list of supported mobile network operators
-        From the API (POST: /api/v1/Partner/GetPaymentPartners)
+        Returns the state of every endpoint's circuit breaker, for health checks
 
         Returns:
-            List[str]: List of supported mobile network operators
+            Dict[str, Dict[str, Any]]: {"host/endpoint": {"state": ..., "failures": ..., "in_flight": ...}}
         """
+        return self.circuit_breakers.states()
 
-        response = requests.get(
-            f"{self.BASE_URL}/api/v1/Partner/GetPaymentPartners",
-            headers=self.headers,
-        )
+    def _fetch_payment_partners(self) -> List[Dict[str, Any]]:
+        response = self._send("GET", self._partners_url)
         if response.status_code == 200:
-            return response.json()
+            return loads(response.content)
         else:
-            logging.error(response.text)
-            return {}
+            logger.error(
+                "Fetching payment partners failed with status %s",
+                response.status_code,
+                extra={"status": response.status_code},
+            )
+            return []
+
+    def supported_mnos_data(self) -> List[Dict[str, Any]]:
+        """supported_mnos
+
+        Returns the list of supported mobile network operators
+        From the API (GET: /api/v1/Partner/GetPaymentPartners), cached for partner_cache_ttl seconds
+
+        Returns:
+            List[Dict[str, Any]]: List of supported mobile network operators
+        """
+        return self.partners.get(self._fetch_payment_partners)
+
+    def payment_partners(self) -> List[Partner]:
+        """payment_partners
+
+        Returns:
+            List[Partner]: The cached payment partners, parsed, with the raw entries on ``.raw``
+        """
+        return self.partners.models(self._fetch_payment_partners)
+
+    def invalidate_partners(self) -> None:
+        """invalidate_partners
+
+        Drops the cached payment partners so that the next checkout refetches them
+        """
+        self.partners.invalidate()
 
     @property
     def supported_mnos(self):
@@ -229,8 +469,7 @@ class Azampay(object):
 
     @property
     def _unmapped_supported_mnos(self):
-        response = self.supported_mnos_data()
-        return [patrner["partnerName"].capitalize() for patrner in response]
+        return self.partners.names(self._fetch_payment_partners)
 
     def _get_vendor_id_and_name(self, provider: str) -> Tuple[str, str]:
         """_get_vendor_id_and_name
@@ -243,11 +482,64 @@ class Azampay(object):
         Returns:
             Tuple[str, str]: The vendor id and name of the given provider
         """
-        response = self.supported_mnos_data()
-        for patrner in response:
-            if patrner["partnerName"].capitalize() == provider:
-                return patrner["paymentVendorId"], patrner["partnerName"]
-        raise ValueError(f"{provider} is not a supported provider")
+        vendor = self.partners.lookup(provider, self._fetch_payment_partners)
+        if vendor is None:
+            raise ValueError(f"{provider} is not a supported provider")
+        return vendor
+
+    def _prepare_mobile_checkout(
+        self,
+        *,
+        mobile: str,
+        amount: str,
+        external_id: str,
+        provider: str = None,
+        currency: Optional[str] = "TZS",
+        additional_properties: Optional[Dict[str, Any]] = None,
+    ) -> MobileCheckoutRequest:
+        request = self._mobile_checkout_request(
+            mobile=mobile,
+            amount=amount,
+            external_id=external_id,
+            provider=self._mobile_provider(mobile, provider),
+            currency=currency,
+            additional_properties=additional_properties,
+        )
+        self._check_provider(request, self.supported_mnos)
+        return request
+
+    def submit(self, request: CheckoutRequest) -> Dict[str, Any]:
+        """submit
+
+        Sends a prepared request, reusing its serialized body
+
+        Args:
+            request (CheckoutRequest): A MobileCheckoutRequest, BankCheckoutRequest or PaymentLinkRequest
+
+        Raises:
+            ValueError: When the provider of a mobile checkout is not one of the app's payment partners
+
+        Returns:
+            Dict[str, Any]: The JSON response
+
+        Example:
+
+        >>> from azampay.checkout import MobileCheckoutRequest
+        >>> request = MobileCheckoutRequest(mobile='0687649154', amount=1000, external_id='order-1')
+        >>> azampay.submit(request)
+        """
+        self._check_provider(request, self.supported_mnos)
+        return self._send_request(request)
+
+    def _send_request(self, request: CheckoutRequest) -> Dict[str, Any]:
+        # replaying a checkout is only safe when the gateway can dedupe it by id
+        response: Dict[str, Any] = self.post(
+            self._checkout_url(request),
+            request.body,
+            idempotent=bool(request.external_id),
+        )
+        self._record_checkout(request, response)
+        return response
 
     def mobile_checkout(
         self,
@@ -281,39 +573,24 @@ class Azampay(object):
             add example here
         """
 
-        # Check if user specified provider
-        if not provider:
-            provider = self._get_carrier(mobile)
-
-        # validate the provider
-        mno_provider = provider.strip().capitalize()
-        if mno_provider not in self.supported_mnos:
-            raise ValueError(f"{mno_provider} is not a supported mno")
-
-        # validate the currency
-        if currency not in self.SUPPORTED_CURRENCIES:
-            raise ValueError(f"{currency} is not a supported currency")
-
-        # clean the mobile number
-        mobile = self.clean_mobile_number(mobile)
-
-        # Clean the amount
-        amount = self.clean_amount(amount)
-
-        # Make info(f"Making request to {self.BASE_URL}/azampay/mno/checkout")
-        response: Dict[str, Any] = self.post(
-            url=f"{self.BASE_URL}/azampay/mno/checkout",
-            body={
-                "accountNumber": mobile,
-                "amount": amount,
-                "currency": currency,
-                "externalId": external_id,
-                "provider": mno_provider,
-                "additionalProperties": additional_properties,
+        response: Dict[str, Any] = self._send_request(
+            self._prepare_mobile_checkout(
+                mobile=mobile,
+                amount=amount,
+                external_id=external_id,
+                provider=provider,
+                currency=currency,
+                additional_properties=additional_properties,
+            )
+        )
+        logger.info(
+            "Mobile checkout submitted: %s",
+            response.get("message"),
+            extra={
+                "external_id": external_id,
+                "transaction_id": response.get("transactionId"),
             },
         )
-        message = response.get("message")
-        logging.info(message)
         return response
 
     def bank_checkout(
@@ -354,43 +631,118 @@ class Azampay(object):
             Dict[str, Any]: _description_
         """
 
-        ## validate the provider
-        provider = provider.strip().upper()
-        if provider not in self.SUPPORTED_BANKS:
-            raise ValueError(f"{provider} is not a supported bank")
+        response: Dict[str, Any] = self._send_request(
+            self._bank_checkout_request(
+                merchant_account_number=merchant_account_number,
+                merchant_mobile_number=merchant_mobile_number,
+                amount=amount,
+                otp=otp,
+                provider=provider,
+                reference_id=reference_id,
+                currency=currency,
+                merchant_name=merchant_name,
+                additional_properties=additional_properties,
+            )
+        )
 
-        # validate the currency
-        if currency not in self.SUPPORTED_CURRENCIES:
-            raise ValueError(f"{currency} is not a supported currency")
+        logger.info(
+            "Bank checkout submitted: %s",
+            response.get("message"),
+            extra={
+                "reference_id": reference_id,
+                "transaction_id": response.get("transactionId"),
+            },
+        )
+        return response
 
-        logging.info(f"provider: {provider}")
+    def _prepared_batch(
+        self,
+        items: Iterable[Any],
+        prepare: Any,
+        id_field: str,
+    ) -> Tuple[List[BatchResult], List[Tuple[Any, Any]]]:
+        # validate every item before anything is sent
+        rejected: List[BatchResult] = []
+        jobs: List[Tuple[Any, Any]] = []
+        for item in items:
+            try:
+                if isinstance(item, CheckoutRequest):
+                    request = item
+                    self._check_provider(request, self.supported_mnos)
+                else:
+                    request = prepare(**item)
+            except Exception as e:
+                if isinstance(item, CheckoutRequest):
+                    rejected.append(BatchResult(item.external_id, error=e))
+                else:
+                    rejected.append(BatchResult(item.get(id_field), error=e))
+                continue
+            jobs.append((request.external_id, partial(self._send_request, request)))
+        return rejected, jobs
+
+    def batch_mobile_checkout(
+        self,
+        checkouts: Iterable[Any],
+        *,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+    ) -> Iterator[BatchResult]:
+        """batch_mobile_checkout : runs many mobile checkouts concurrently
 
-        # clean the mobile number
-        mobile = self.clean_mobile_number(merchant_mobile_number)
+        Every request is validated before the first one is sent, using the cached
+        partner list; invalid requests come back as failed results, not exceptions.
 
-        # Clean the amount
-        amount = self.clean_amount(amount)
+        Args:
+            checkouts (Iterable[Union[Dict[str, Any], MobileCheckoutRequest]]): Keyword arguments of mobile_checkout,
+                one dict per checkout, or prepared requests
+            max_concurrency (int, optional): Checkouts in flight at once. Defaults to 8.
+            rate_limit (float, optional): Maximum checkouts started per second. Defaults to None.
 
-        ## Makeinfo(f"Making request to {self.BASE_URL}/azampay/bank/checkout")
-        response: Dict[str, Any] = self.post(
-            f"{self.BASE_URL}/azampay/bank/checkout",
-            body={
-                "amount": amount,
-                "currencyCode": currency,
-                "merchantAccountNumber": merchant_account_number,
-                "merchantMobileNumber": mobile,
-                "merchantName": merchant_name,
-                "otp": otp,
-                "provider": provider,
-                "referenceId": str(reference_id),
-                "additionalProperties": additional_properties,
-            },
+        Returns:
+            Iterator[BatchResult]: Results keyed by external_id, in completion order
+
+        Example:
+
+        >>> for result in azampay.batch_mobile_checkout(rows, max_concurrency=16):
+        ...     print(result.external_id, result.ok)
+        """
+        rejected, jobs = self._prepared_batch(
+            checkouts,
+            self._prepare_mobile_checkout,
+            "external_id",
+        )
+        yield from rejected
+        yield from run_batch(
+            jobs, max_concurrency=max_concurrency, rate_limit=rate_limit
         )
 
-        logging.info(response)
-        message = response.get("message")
-        logging.info(message)
-        return response
+    def batch_bank_checkout(
+        self,
+        checkouts: Iterable[Any],
+        *,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+    ) -> Iterator[BatchResult]:
+        """batch_bank_checkout : runs many bank checkouts concurrently
+
+        Args:
+            checkouts (Iterable[Union[Dict[str, Any], BankCheckoutRequest]]): Keyword arguments of bank_checkout,
+                one dict per checkout, or prepared requests
+            max_concurrency (int, optional): Checkouts in flight at once. Defaults to 8.
+            rate_limit (float, optional): Maximum checkouts started per second. Defaults to None.
+
+        Returns:
+            Iterator[BatchResult]: Results keyed by reference_id, in completion order
+        """
+        rejected, jobs = self._prepared_batch(
+            checkouts,
+            self._bank_checkout_request,
+            "reference_id",
+        )
+        yield from rejected
+        yield from run_batch(
+            jobs, max_concurrency=max_concurrency, rate_limit=rate_limit
+        )
 
     def generate_payment_link(
         self,
@@ -429,38 +781,102 @@ class Azampay(object):
             Dict[str, Any]: The JSON response with a payment link
         """
 
-        if not app_name:
-            app_name = self.app_name
-        if not client_id:
-            client_id = self.client_id
-        if not ((vendor_id and vendor_name) or provider):
-            raise ValueError("Please provide vendor_id and vendor_name or provider")
-        if provider:
-            provider = provider.strip().capitalize()
-            if provider not in self._unmapped_supported_mnos:
-                raise ValueError(f"{provider} is not a supported mno")
-            vendor_id, vendor_name = self._get_vendor_id_and_name(provider)
+        vendor_id, vendor_name = self._resolve_vendor(provider, vendor_id, vendor_name)
 
         # URL : /api/v1/Partner/PostCheckout
-        response = self.post(
-            url=f"{self.BASE_URL}/api/v1/Partner/PostCheckout",
-            body={
-                "amount": amount,
-                "externalId": external_id,
-                "appName": app_name,
-                "clientId": client_id,
-                "vendorId": vendor_id,
-                "vendorName": vendor_name,
-                "requestOrigin": request_origin,
-                "redirectFailURL": redirect_fail_url,
-                "redirectSuccessURL": redirect_success_url,
-                "language": language,
-                "cart": cart or {},
-                "currency": currency,
-            },
+        return self._mint_payment_link(
+            self._payment_link_request(
+                amount=amount,
+                external_id=external_id,
+                app_name=app_name,
+                client_id=client_id,
+                vendor_id=vendor_id,
+                vendor_name=vendor_name,
+                request_origin=request_origin,
+                redirect_fail_url=redirect_fail_url,
+                redirect_success_url=redirect_success_url,
+                language=language,
+                cart=cart,
+                currency=currency,
+            )
         )
 
+    def _resolve_vendor(
+        self,
+        provider: Optional[str],
+        vendor_id: Optional[str],
+        vendor_name: Optional[str],
+    ) -> Tuple[Optional[str], Optional[str]]:
+        provider = self._payment_link_vendor(provider, vendor_id, vendor_name)
+        if provider:
+            self._check_link_provider(provider, self._unmapped_supported_mnos)
+            vendor_id, vendor_name = self._get_vendor_id_and_name(provider)
+        return vendor_id, vendor_name
+
+    def _mint_payment_link(self, request: PaymentLinkRequest) -> Dict[str, Any]:
+        response = self._cached_payment_link(request)
+        if response is None:
+            response = self._send_payment_link(request)
         return response
 
+    def _send_payment_link(self, request: PaymentLinkRequest) -> Dict[str, Any]:
+        return self._remember_payment_link(request, self._send_request(request))
+
+    def generate_payment_links(
+        self,
+        invoices: Iterable[Dict[str, Any]],
+        *,
+        provider: str = None,
+        vendor_id: str = None,
+        vendor_name: str = None,
+        app_name: str = None,
+        client_id: str = None,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        **template: Any,
+    ) -> Iterator[BatchResult]:
+        """generate_payment_links : mints payment links for many invoices concurrently
+
+        The vendor is resolved once and the shared fields are checked once, then
+        each invoice only fills in its amount and external id. Links already minted
+        for the same invoice come straight from the cache without calling AzamPay,
+        so a run can be repeated safely; invalid invoices come back as failed results.
+
+        Args:
+            invoices (Iterable[Dict[str, Any]]): One dict per invoice with amount and external_id,
+                plus any per-invoice override such as cart
+            provider (str, optional): Network provider whose vendor mints the links. Defaults to None.
+            vendor_id (str, optional): Vendor ID, instead of provider. Defaults to None.
+            vendor_name (str, optional): Vendor name, instead of provider. Defaults to None.
+            app_name (str, optional): This is your Azampay app name. Defaults to None.
+            client_id (str, optional): This a client ID of your application. Defaults to None.
+            max_concurrency (int, optional): Links minted at once. Defaults to 8.
+            rate_limit (float, optional): Maximum links minted per second. Defaults to None.
+            **template: Fields shared by every link, see generate_payment_link (request_origin,
+                redirect_fail_url, redirect_success_url, language, cart, currency)
+
+        Returns:
+            Iterator[BatchResult]: Results keyed by external_id, cache hits first then in completion order
+
+        Example:
+
+        >>> invoices = [{'amount': 5000, 'external_id': 'invoice-1'}, ...]
+        >>> for result in azampay.generate_payment_links(invoices, provider='Airtel', redirect_success_url='https://shop/paid'):
+        ...     print(result.external_id, result.response['data'] if result.ok else result.error)
+        """
+        vendor_id, vendor_name = self._resolve_vendor(provider, vendor_id, vendor_name)
+        links = self._payment_link_template(
+            app_name=app_name,
+            client_id=client_id,
+            vendor_id=vendor_id,
+            vendor_name=vendor_name,
+            **template,
+        )
+        ready, jobs = self._prepared_payment_links(links, invoices, self._send_payment_link)
+        yield from ready
+        yield from run_batch(
+            jobs, max_concurrency=max_concurrency, rate_limit=rate_limit
+        )
+
 
 # sys.modules[__name__] = Azampay
@@ -0,0 +1,4 @@
+import sys
+from azampay.runner import main
+
+sys.exit(main())
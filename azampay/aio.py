@@ -0,0 +1,826 @@
+"""
+AzamPay payment gateway asyncio Client SDK
+"""
+
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from azampay.base import BaseAzampay
+from azampay.log import logger
+from azampay.batch import BatchResult, arun_batch
+from azampay.cache import AsyncPartnerCatalog, PaymentLinkCache
+from azampay.auth import AsyncTokenManager
+from azampay.retry import NO_RETRY, RetryPolicy
+from azampay.response import ResponseMeta
+from azampay.circuit import CircuitBreaker, CircuitBreakerRegistry
+from azampay.transactions import TransactionRegistry
+from azampay.checkout import CheckoutRequest, MobileCheckoutRequest, PaymentLinkRequest
+from azampay.ratelimit import RateLimiter
+from azampay.models import Partner
+from azampay.hedge import HedgePolicy
+from azampay.serialization import dumps, loads
+from azampay.metrics import (
+    HTTP_CONNECT,
+    HTTP_TOTAL,
+    HTTP_TTFB,
+    RATE_LIMIT_WAIT,
+    REQUESTS,
+    RETRIES,
+    MetricsHook,
+)
+
+
+def _import_httpx():
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError(
+            "AsyncAzampay needs httpx, install it with: pip install azampay[async]"
+        )
+    return httpx
+
+
+class AsyncHTTPTransport(object):
+    """
+    Pooled asyncio HTTP transport backed by ``httpx.AsyncClient``
+
+    A single client keeps keep-alive connections per host, so one worker can keep
+    hundreds of checkouts in flight over a bounded set of connections.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        transport: Any = None,
+    ):
+        """__init__ method
+
+        Args:
+            max_connections (int, optional): Maximum number of concurrent connections. Defaults to 100.
+            max_keepalive_connections (int, optional): Idle connections kept alive. Defaults to 20.
+            connect_timeout (float, optional): Seconds to wait for a connection to be established. Defaults to 5.0.
+            read_timeout (float, optional): Seconds to wait for the server to send a response. Defaults to 30.0.
+            transport (httpx.AsyncBaseTransport, optional): Custom httpx transport, e.g. for testing. Defaults to None.
+        """
+        httpx = _import_httpx()
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            transport=transport,
+        )
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """request
+
+        Sends a request over the pooled client
+
+        Returns:
+            httpx.Response: The raw response
+        """
+        return await self.client.request(method, url, **kwargs)
+
+    async def aclose(self) -> None:
+        """aclose
+
+        Closes the client and its connections
+        """
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncHTTPTransport":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class AsyncAzampay(BaseAzampay):
+    """
+    AzamPay payment gateway asyncio Client SDK
+
+    Awaitable counterpart of ``Azampay`` with the same methods, validation and caching.
+    """
+
+    def __init__(
+        self,
+        *,
+        app_name: str,
+        client_id: str,
+        client_secret: str,
+        x_api_key: str = None,
+        sandbox: Optional[bool] = True,
+        transport: Optional[AsyncHTTPTransport] = None,
+        partner_cache_ttl: float = 300.0,
+        token_refresh_margin: float = 60.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        metrics: Optional[MetricsHook] = None,
+        transactions: Optional[TransactionRegistry] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        payment_link_cache_size: int = 10000,
+        partner_catalog: Optional[AsyncPartnerCatalog] = None,
+        hedging: Optional[HedgePolicy] = None,
+    ):
+        """__init__ method
+
+        Args:
+            app_name (str): The app name
+            client_id (str): The client id
+            client_secret (str): The client secret
+            x_api_key (str, optional): The API key. Defaults to None.
+            sandbox (bool, optional): determines whether you're running on sandbox or production url. Defaults to True.
+            transport (AsyncHTTPTransport, optional): Pooled transport to send requests through. Defaults to a new AsyncHTTPTransport.
+            partner_cache_ttl (float, optional): Seconds the payment partners list is cached for. Defaults to 300.
+            token_refresh_margin (float, optional): Seconds before expiry at which the access token is refreshed. Defaults to 60.
+            retry_policy (RetryPolicy, optional): How transient failures of idempotent calls are replayed. Defaults to RetryPolicy().
+            circuit_breakers (CircuitBreakerRegistry, optional): Circuit breakers and in-flight caps per endpoint. Defaults to CircuitBreakerRegistry().
+            metrics (MetricsHook, optional): Receives per-phase timings, HTTP connect/TTFB/total timings, status codes, retries and cache hits. Defaults to no metrics.
+            transactions (TransactionRegistry, optional): Records every checkout submitted with an external id, for callbacks to complete. Defaults to None.
+            rate_limiter (RateLimiter, optional): Per-endpoint request rates to stay under, waited for before every attempt. Defaults to None.
+            payment_link_cache_size (int, optional): Minted payment links remembered by external id, 0 to mint every time. Defaults to 10000.
+            partner_catalog (AsyncPartnerCatalog, optional): Partner cache shared with other clients of the same environment. Defaults to a catalog of this client.
+            hedging (HedgePolicy, optional): Hedges the token and partner calls when they are slow,
+                optionally on alternate hosts. Defaults to None.
+
+        Example:
+
+        >>> from azampay import AsyncAzampay
+        >>> async with AsyncAzampay(app_name='abc', client_id='xxx', client_secret='xyz', x_api_key='123') as azampay:
+        ...     await azampay.mobile_checkout(mobile='0657649154', amount=1000, external_id='123', provider='Tigo')
+        """
+        super().__init__(
+            app_name=app_name,
+            client_id=client_id,
+            client_secret=client_secret,
+            x_api_key=x_api_key,
+            sandbox=sandbox,
+            metrics=metrics,
+            transactions=transactions,
+            hedging=hedging,
+        )
+        self._owns_transport: bool = transport is None
+        self.transport: AsyncHTTPTransport = transport or AsyncHTTPTransport()
+        self.partners: AsyncPartnerCatalog = partner_catalog or AsyncPartnerCatalog(
+            ttl=partner_cache_ttl, metrics=self.metrics
+        )
+        self.payment_links: PaymentLinkCache = PaymentLinkCache(
+            payment_link_cache_size, metrics=self.metrics
+        )
+        self._tokens: AsyncTokenManager = AsyncTokenManager(
+            self._generate_token,
+            refresh_margin=token_refresh_margin,
+            metrics=self.metrics,
+        )
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self.circuit_breakers: CircuitBreakerRegistry = (
+            circuit_breakers or CircuitBreakerRegistry()
+        )
+        self.rate_limiter: Optional[RateLimiter] = rate_limiter
+
+    async def _generate_token(self) -> Dict[str, Any]:
+        return await self.post(
+            url=self._token_url, body=self._token_body(), _headers=False, idempotent=True
+        )
+
+    async def _token(self) -> str:
+        return await self._tokens.get()
+
+    async def headers(self) -> Dict[str, str]:
+        """headers
+
+        Returns:
+            Dict[str, str]: Authenticated headers
+        """
+        return self._auth_headers(await self._token())
+
+    async def aclose(self) -> None:
+        """aclose
+
+        Releases the pooled connections, unless the transport was supplied by the caller
+        """
+        if self._owns_transport:
+            await self.transport.aclose()
+
+    async def __aenter__(self) -> "AsyncAzampay":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _send_once(
+        self,
+        method: str,
+        url: str,
+        body: Union[Dict[Any, Any], bytes, None],
+        token: Optional[str],
+        **kwargs: Any,
+    ) -> Any:
+        # pre-serialized request bodies go out as they are
+        if body is not None:
+            kwargs["content"] = body if isinstance(body, bytes) else dumps(body)
+        if token is None:
+            return await self.transport.request(
+                method,
+                url,
+                headers={"Content-Type": "application/json"},
+                **kwargs,
+            )
+        return await self.transport.request(
+            method, url, headers=self._auth_headers(token), **kwargs
+        )
+
+    def _trace(self, endpoint: str) -> Any:
+        # httpx trace extension: connection setup and time to first byte per request
+        marks: Dict[str, float] = {}
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            now = time.perf_counter()
+            if event.endswith(".send_request_headers.started"):
+                marks.setdefault("sent", now)
+            elif event == "connection.connect_tcp.started":
+                marks["connect"] = now
+            elif event in (
+                "connection.connect_tcp.complete",
+                "connection.start_tls.complete",
+            ):
+                if "connect" in marks:
+                    marks["connected"] = now
+            elif event.endswith(".receive_response_headers.complete"):
+                tags = {"endpoint": endpoint}
+                if "connected" in marks:
+                    self.metrics.observe(
+                        HTTP_CONNECT, marks["connected"] - marks["connect"], tags
+                    )
+                self.metrics.observe(
+                    HTTP_TTFB, now - marks.get("sent", marks.get("connect", now)), tags
+                )
+
+        return trace
+
+    async def _guarded_send(
+        self,
+        breaker: CircuitBreaker,
+        method: str,
+        url: str,
+        body: Union[Dict[Any, Any], bytes, None],
+        token: Optional[str],
+    ) -> Any:
+        import asyncio
+
+        httpx = _import_httpx()
+        kwargs = {}
+        if self.metrics.enabled:
+            kwargs["extensions"] = {"trace": self._trace(self._endpoint(url))}
+        breaker.acquire()
+        started = time.perf_counter()
+        try:
+            response = await self._send_once(method, url, body, token, **kwargs)
+        except httpx.TransportError:
+            breaker.release(False)
+            self._observe_latency(url, started)
+            raise
+        except asyncio.CancelledError:
+            # a hedged attempt that lost: no outcome, but the host took at least this long
+            breaker.release(None)
+            self._observe_latency(url, started)
+            raise
+        except BaseException:
+            # interrupted, cancelled or failed before sending: no outcome to record
+            breaker.release(None)
+            raise
+        breaker.release(response.status_code < 500)
+        self._observe_latency(url, started)
+        if self.metrics.enabled:
+            self.metrics.increment(
+                REQUESTS,
+                tags={"endpoint": self._endpoint(url), "status": response.status_code},
+            )
+        return response
+
+    async def _throttle(self, endpoint: str) -> None:
+        import asyncio
+
+        # poll the bucket without blocking the loop
+        waited = 0.0
+        wait = self.rate_limiter.try_acquire(endpoint)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.rate_limiter.try_acquire(endpoint)
+        if waited and self.metrics.enabled:
+            self.metrics.observe(RATE_LIMIT_WAIT, waited, {"endpoint": endpoint})
+
+    async def _hedged_send(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        body: Union[Dict[Any, Any], bytes, None],
+        token: Optional[str],
+    ) -> Any:
+        attempts = []
+        for attempt_url in self._hedge_urls(url):
+            host = self._host(attempt_url)
+            breaker = self.circuit_breakers.get(host, endpoint)
+            attempts.append(
+                (host, partial(self._guarded_send, breaker, method, attempt_url, body, token))
+            )
+        return await self.hedging.arun(endpoint, attempts, self._hedge_accepts)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        body: Union[Dict[Any, Any], bytes, None] = None,
+        _headers: bool = True,
+        idempotent: Optional[bool] = None,
+        meta: Optional[ResponseMeta] = None,
+    ) -> Any:
+        import asyncio
+
+        httpx = _import_httpx()
+        if idempotent is None:
+            idempotent = method == "GET"
+        endpoint = self._endpoint(url)
+        policy = self.retry_policy if idempotent else NO_RETRY
+        retries = policy.retries_for(endpoint)
+        breaker = self.circuit_breakers.get(self._host(url), endpoint)
+        hedged = self.hedging is not None and self.hedging.applies(endpoint)
+        started = time.perf_counter()
+        token = await self._token() if _headers else None
+        refreshed = False
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self._throttle(endpoint)
+            try:
+                if hedged:
+                    response = await self._hedged_send(endpoint, method, url, body, token)
+                else:
+                    response = await self._guarded_send(
+                        breaker, method, url, body, token
+                    )
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                delay = policy.backoff(attempt)
+                logger.warning(
+                    "%s failed (%s), retrying in %.2fs",
+                    endpoint,
+                    e,
+                    delay,
+                    extra={"endpoint": endpoint, "attempt": attempt + 1},
+                )
+            else:
+                if token is not None and not refreshed and response.status_code in (401, 423):
+                    # revoked before its expiry: send once more with a fresh one
+                    self._tokens.invalidate(token)
+                    token = await self._token()
+                    refreshed = True
+                    continue
+                if attempt >= retries or not policy.is_retryable(response.status_code):
+                    break
+                delay = policy.backoff(attempt, response.headers.get("Retry-After"))
+                logger.warning(
+                    "%s returned %s, retrying in %.2fs",
+                    endpoint,
+                    response.status_code,
+                    delay,
+                    extra={
+                        "endpoint": endpoint,
+                        "status": response.status_code,
+                        "attempt": attempt + 1,
+                    },
+                )
+            attempt += 1
+            await asyncio.sleep(delay)
+        if self.metrics.enabled:
+            self.metrics.observe(
+                HTTP_TOTAL,
+                time.perf_counter() - started,
+                {"endpoint": endpoint, "status": response.status_code},
+            )
+            if attempt:
+                self.metrics.increment(RETRIES, attempt, {"endpoint": endpoint})
+        if meta is not None:
+            meta.status_code = response.status_code
+            meta.retries = attempt
+        return response
+
+    async def post(
+        self,
+        url: str,
+        body: Union[Dict[Any, Any], bytes],
+        _headers: bool = True,
+        idempotent: bool = False,
+    ) -> Dict[str, Any]:
+        """post
+
+        Makes easy to make a POST request with authenticated headers
+
+        Returns:
+            Dict[str, Any]: JSON response from the server, with the call metadata on ``.meta``
+        """
+        meta = ResponseMeta(self._endpoint(url))
+        response = await self._send(
+            "POST", url, body=body, _headers=_headers, idempotent=idempotent, meta=meta
+        )
+        return self._wrap_response(
+            self._handle_response(
+                response.status_code, response.content, url
+            ),
+            meta,
+        )
+
+    async def transaction_status(
+        self, reference: str, *, bank_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """transaction_status
+
+        Asks AzamPay for the state of a checkout (GET: /azampay/gettransactionstatus)
+
+        Returns:
+            Dict[str, Any]: JSON response from the server, with the call metadata on ``.meta``
+        """
+        url = self._transaction_status_url(reference, bank_name)
+        meta = ResponseMeta(self._endpoint(url))
+        response = await self._send("GET", url, meta=meta)
+        return self._wrap_response(
+            self._handle_response(response.status_code, response.content, url),
+            meta,
+        )
+
+    def circuit_states(self) -> Dict[str, Dict[str, Any]]:
+        """circuit_states
+
+        Returns:
+            Dict[str, Dict[str, Any]]: State of every endpoint's circuit breaker, for health checks
+        """
+        return self.circuit_breakers.states()
+
+    async def _fetch_payment_partners(self) -> List[Dict[str, Any]]:
+        response = await self._send("GET", self._partners_url)
+        if response.status_code == 200:
+            return loads(response.content)
+        else:
+            logger.error(
+                "Fetching payment partners failed with status %s",
+                response.status_code,
+                extra={"status": response.status_code},
+            )
+            return []
+
+    async def supported_mnos_data(self) -> List[Dict[str, Any]]:
+        """supported_mnos_data
+
+        Returns:
+            List[Dict[str, Any]]: Cached list of payment partners
+        """
+        return await self.partners.get(self._fetch_payment_partners)
+
+    async def payment_partners(self) -> List[Partner]:
+        """payment_partners
+
+        Returns:
+            List[Partner]: The cached payment partners, parsed, with the raw entries on ``.raw``
+        """
+        return await self.partners.models(self._fetch_payment_partners)
+
+    def invalidate_partners(self) -> None:
+        """invalidate_partners
+
+        Drops the cached payment partners so that the next checkout refetches them
+        """
+        self.partners.invalidate()
+
+    async def supported_mnos(self) -> List[str]:
+        """supported_mnos
+
+        Returns:
+            List[str]: Names of the supported mobile network operators
+        """
+        return [
+            self.MNOS_MAP.get(mno, mno) for mno in await self._unmapped_supported_mnos()
+        ]
+
+    async def _unmapped_supported_mnos(self) -> List[str]:
+        return await self.partners.names(self._fetch_payment_partners)
+
+    async def _get_vendor_id_and_name(self, provider: str) -> Tuple[str, str]:
+        vendor = await self.partners.lookup(provider, self._fetch_payment_partners)
+        if vendor is None:
+            raise ValueError(f"{provider} is not a supported provider")
+        return vendor
+
+    async def submit(self, request: CheckoutRequest) -> Dict[str, Any]:
+        """submit
+
+        Sends a prepared request, reusing its serialized body, see ``Azampay.submit``
+
+        Returns:
+            Dict[str, Any]: The JSON response
+        """
+        if isinstance(request, MobileCheckoutRequest):
+            self._check_provider(request, await self.supported_mnos())
+        # replaying a checkout is only safe when the gateway can dedupe it by id
+        response: Dict[str, Any] = await self.post(
+            self._checkout_url(request),
+            request.body,
+            idempotent=bool(request.external_id),
+        )
+        self._record_checkout(request, response)
+        return response
+
+    def _prepare_mobile_checkout(
+        self,
+        *,
+        mobile: str,
+        amount: str,
+        external_id: str,
+        provider: str = None,
+        currency: Optional[str] = "TZS",
+        additional_properties: Optional[Dict[str, Any]] = None,
+    ) -> MobileCheckoutRequest:
+        # the provider is checked against the partners when the request is submitted
+        return self._mobile_checkout_request(
+            mobile=mobile,
+            amount=amount,
+            external_id=external_id,
+            provider=self._mobile_provider(mobile, provider),
+            currency=currency,
+            additional_properties=additional_properties,
+        )
+
+    async def mobile_checkout(
+        self,
+        *,
+        mobile: str,
+        amount: str,
+        external_id: str,
+        provider: str = None,
+        currency: Optional[str] = "TZS",
+        additional_properties: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """mobile_checkout : handles mobile checkout
+
+        See ``Azampay.mobile_checkout`` for the arguments
+
+        Returns:
+            Dict[str, Any]: The JSON response
+        """
+        response: Dict[str, Any] = await self.submit(
+            self._prepare_mobile_checkout(
+                mobile=mobile,
+                amount=amount,
+                external_id=external_id,
+                provider=provider,
+                currency=currency,
+                additional_properties=additional_properties,
+            )
+        )
+        logger.info(
+            "Mobile checkout submitted: %s",
+            response.get("message"),
+            extra={
+                "external_id": external_id,
+                "transaction_id": response.get("transactionId"),
+            },
+        )
+        return response
+
+    async def bank_checkout(
+        self,
+        *,
+        merchant_account_number: str,
+        merchant_mobile_number: str,
+        amount: str,
+        otp: str,
+        provider: str,
+        reference_id: str,
+        currency: Optional[str] = "TZS",
+        merchant_name: Optional[str] = None,
+        additional_properties: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """bank_checkout : handle bank_checkout
+
+        See ``Azampay.bank_checkout`` for the arguments
+
+        Returns:
+            Dict[str, Any]: The JSON response
+        """
+        response: Dict[str, Any] = await self.submit(
+            self._bank_checkout_request(
+                merchant_account_number=merchant_account_number,
+                merchant_mobile_number=merchant_mobile_number,
+                amount=amount,
+                otp=otp,
+                provider=provider,
+                reference_id=reference_id,
+                currency=currency,
+                merchant_name=merchant_name,
+                additional_properties=additional_properties,
+            )
+        )
+
+        logger.info(
+            "Bank checkout submitted: %s",
+            response.get("message"),
+            extra={
+                "reference_id": reference_id,
+                "transaction_id": response.get("transactionId"),
+            },
+        )
+        return response
+
+    def _prepared_batch(
+        self,
+        items: Iterable[Any],
+        prepare: Any,
+        id_field: str,
+        supported_mnos: List[str],
+    ) -> Tuple[List[BatchResult], List[Tuple[Any, Any]]]:
+        # validate every item before anything is sent
+        rejected: List[BatchResult] = []
+        jobs: List[Tuple[Any, Any]] = []
+        for item in items:
+            try:
+                request = item if isinstance(item, CheckoutRequest) else prepare(**item)
+                self._check_provider(request, supported_mnos)
+            except Exception as e:
+                if isinstance(item, CheckoutRequest):
+                    rejected.append(BatchResult(item.external_id, error=e))
+                else:
+                    rejected.append(BatchResult(item.get(id_field), error=e))
+                continue
+            jobs.append((request.external_id, partial(self.submit, request)))
+        return rejected, jobs
+
+    async def batch_mobile_checkout(
+        self,
+        checkouts: Iterable[Any],
+        *,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+    ) -> AsyncIterator[BatchResult]:
+        """batch_mobile_checkout : runs many mobile checkouts concurrently
+
+        See ``Azampay.batch_mobile_checkout`` for the arguments. At most
+        ``max_concurrency`` checkouts are awaited at once, on the running loop.
+
+        Returns:
+            AsyncIterator[BatchResult]: Results keyed by external_id, in completion order
+
+        Example:
+
+        >>> async for result in azampay.batch_mobile_checkout(rows, max_concurrency=16):
+        ...     print(result.external_id, result.ok)
+        """
+        rejected, jobs = self._prepared_batch(
+            checkouts,
+            self._prepare_mobile_checkout,
+            "external_id",
+            await self.supported_mnos(),
+        )
+        for result in rejected:
+            yield result
+        async for result in arun_batch(
+            jobs, max_concurrency=max_concurrency, rate_limit=rate_limit
+        ):
+            yield result
+
+    async def batch_bank_checkout(
+        self,
+        checkouts: Iterable[Any],
+        *,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+    ) -> AsyncIterator[BatchResult]:
+        """batch_bank_checkout : runs many bank checkouts concurrently
+
+        See ``Azampay.batch_bank_checkout`` for the arguments
+
+        Returns:
+            AsyncIterator[BatchResult]: Results keyed by reference_id, in completion order
+        """
+        rejected, jobs = self._prepared_batch(
+            checkouts,
+            self._bank_checkout_request,
+            "reference_id",
+            [],
+        )
+        for result in rejected:
+            yield result
+        async for result in arun_batch(
+            jobs, max_concurrency=max_concurrency, rate_limit=rate_limit
+        ):
+            yield result
+
+    async def generate_payment_link(
+        self,
+        *,
+        amount: str,
+        external_id: str,
+        app_name: str = None,
+        client_id: str = None,
+        provider: str = None,
+        vendor_id: str = None,
+        vendor_name: str = None,
+        request_origin: str = "https://requestorigin.org",
+        redirect_fail_url: str = "https://failure",
+        redirect_success_url: str = "https://success",
+        language: str = "en",
+        cart: Optional[Dict[str, List[Dict[str, str]]]] = None,
+        currency: str = "TZS",
+    ) -> Dict[str, Any]:
+        """generate_payment_link : handle generate_payment_link
+
+        See ``Azampay.generate_payment_link`` for the arguments
+
+        Returns:
+            Dict[str, Any]: The JSON response with a payment link
+        """
+        vendor_id, vendor_name = await self._resolve_vendor(provider, vendor_id, vendor_name)
+        return await self._mint_payment_link(
+            self._payment_link_request(
+                amount=amount,
+                external_id=external_id,
+                app_name=app_name,
+                client_id=client_id,
+                vendor_id=vendor_id,
+                vendor_name=vendor_name,
+                request_origin=request_origin,
+                redirect_fail_url=redirect_fail_url,
+                redirect_success_url=redirect_success_url,
+                language=language,
+                cart=cart,
+                currency=currency,
+            )
+        )
+
+    async def _resolve_vendor(
+        self,
+        provider: Optional[str],
+        vendor_id: Optional[str],
+        vendor_name: Optional[str],
+    ) -> Tuple[Optional[str], Optional[str]]:
+        provider = self._payment_link_vendor(provider, vendor_id, vendor_name)
+        if provider:
+            self._check_link_provider(provider, await self._unmapped_supported_mnos())
+            vendor_id, vendor_name = await self._get_vendor_id_and_name(provider)
+        return vendor_id, vendor_name
+
+    async def _mint_payment_link(self, request: PaymentLinkRequest) -> Dict[str, Any]:
+        response = self._cached_payment_link(request)
+        if response is None:
+            response = await self._send_payment_link(request)
+        return response
+
+    async def _send_payment_link(self, request: PaymentLinkRequest) -> Dict[str, Any]:
+        return self._remember_payment_link(request, await self.submit(request))
+
+    async def generate_payment_links(
+        self,
+        invoices: Iterable[Dict[str, Any]],
+        *,
+        provider: str = None,
+        vendor_id: str = None,
+        vendor_name: str = None,
+        app_name: str = None,
+        client_id: str = None,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        **template: Any,
+    ) -> AsyncIterator[BatchResult]:
+        """generate_payment_links : mints payment links for many invoices concurrently
+
+        See ``Azampay.generate_payment_links`` for the arguments
+
+        Returns:
+            AsyncIterator[BatchResult]: Results keyed by external_id, cache hits first then in completion order
+
+        Example:
+
+        >>> async for result in azampay.generate_payment_links(invoices, provider='Airtel'):
+        ...     print(result.external_id, result.ok)
+        """
+        vendor_id, vendor_name = await self._resolve_vendor(provider, vendor_id, vendor_name)
+        links = self._payment_link_template(
+            app_name=app_name,
+            client_id=client_id,
+            vendor_id=vendor_id,
+            vendor_name=vendor_name,
+            **template,
+        )
+        ready, jobs = self._prepared_payment_links(links, invoices, self._send_payment_link)
+        for result in ready:
+            yield result
+        async for result in arun_batch(
+            jobs, max_concurrency=max_concurrency, rate_limit=rate_limit
+        ):
+            yield result
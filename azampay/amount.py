@@ -0,0 +1,162 @@
+"""
+Exact, currency-aware amounts
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class Currency(NamedTuple):
+    """
+    What an amount in a currency may look like
+
+    ``precision`` is the number of decimal places (minor units) the currency has;
+    ``minimum`` and ``maximum`` bound a single payment.
+    """
+
+    code: str
+    precision: int
+    minimum: Decimal
+    maximum: Decimal
+
+
+CURRENCIES: Dict[str, Currency] = {
+    # ISO 4217 gives the shilling two decimals; the upper bound only catches typos
+    "TZS": Currency("TZS", 2, Decimal("0.01"), Decimal("1000000000000")),
+}
+
+# ASCII digits with optional thousands separators and an optional fraction
+AMOUNT_PATTERN = re.compile(r"^(?:\d+|\d{1,3}(?:,\d{3})+)(?:\.\d+)?$", re.ASCII)
+
+
+def currency_spec(currency: str) -> Currency:
+    """currency_spec
+
+    Args:
+        currency (str): The currency code, e.g. "TZS"
+
+    Raises:
+        ValueError: When the currency is not supported
+
+    Returns:
+        Currency: Its precision and bounds
+    """
+    spec = CURRENCIES.get(currency)
+    if spec is None:
+        raise ValueError(f"{currency} is not a supported currency")
+    return spec
+
+
+class Amount(object):
+    """
+    A payment amount held as a ``Decimal``, checked against its currency
+
+    Amounts are parsed strictly: digits with optional thousands separators and at
+    most as many decimals as the currency has. Nothing is rounded, anything else
+    raises ValueError. ``str(amount)`` is what the API is sent, e.g. "1000" or "1000.50".
+
+    Example:
+
+    >>> from azampay.amount import Amount
+    >>> str(Amount("1,000.50")), Amount(100).minor_units
+    ('1000.50', 10000)
+    >>> Amount("abc")
+    Traceback (most recent call last):
+    ValueError: 'abc' is not a valid amount
+    """
+
+    __slots__ = ("value", "currency")
+
+    def __init__(self, value: Any, currency: str = "TZS"):
+        """__init__ method
+
+        Args:
+            value (Any): A string, int or Decimal. Floats are refused since they are rarely exact.
+            currency (str, optional): The currency code. Defaults to "TZS".
+
+        Raises:
+            ValueError: When the amount is malformed, too precise or out of bounds
+        """
+        spec = currency_spec(currency)
+        amount = self._parse(value)
+        if -amount.normalize().as_tuple().exponent > spec.precision:
+            raise ValueError(
+                f"{currency} amounts have at most {spec.precision} decimal places, got {value!r}"
+            )
+        if amount < spec.minimum or amount > spec.maximum:
+            raise ValueError(
+                f"{value!r} is outside the {currency} range {spec.minimum} - {spec.maximum}"
+            )
+        object.__setattr__(self, "value", amount)
+        object.__setattr__(self, "currency", currency)
+
+    @staticmethod
+    def _parse(value: Any) -> Decimal:
+        if isinstance(value, Amount):
+            return value.value
+        if isinstance(value, bool) or isinstance(value, float):
+            raise ValueError(f"{value!r} is not a valid amount, pass a string or an int")
+        if isinstance(value, int):
+            return Decimal(value)
+        if isinstance(value, Decimal):
+            if not value.is_finite():
+                raise ValueError(f"{value!r} is not a valid amount")
+            return value
+        text = str(value).strip().replace(" ", "")
+        if not AMOUNT_PATTERN.match(text):
+            raise ValueError(f"{value!r} is not a valid amount")
+        try:
+            return Decimal(text.replace(",", ""))
+        except InvalidOperation:
+            raise ValueError(f"{value!r} is not a valid amount")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Amount is immutable")
+
+    def __reduce__(self) -> Any:
+        return (Amount, (str(self), self.currency))
+
+    @property
+    def minor_units(self) -> int:
+        """minor_units
+
+        Returns:
+            int: The amount in the currency's smallest unit, e.g. cents
+        """
+        return int(self.value.scaleb(currency_spec(self.currency).precision))
+
+    def __str__(self) -> str:
+        if self.value == self.value.to_integral_value():
+            return str(int(self.value))
+        precision = currency_spec(self.currency).precision
+        return f"{self.value:.{precision}f}"
+
+    def __repr__(self) -> str:
+        return f"Amount({str(self)!r}, {self.currency!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Amount):
+            return self.currency == other.currency and self.value == other.value
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.value, self.currency))
+
+
+def parse_amount(value: Any, currency: Optional[str] = "TZS") -> str:
+    """parse_amount
+
+    Validates an amount and formats it for the API
+
+    Args:
+        value (Any): The amount, e.g. "1,000" or 1000
+        currency (str, optional): The currency code. Defaults to "TZS".
+
+    Raises:
+        ValueError: When the amount is not valid in the currency
+
+    Returns:
+        str: e.g. "1000"
+    """
+    return str(Amount(value, currency))
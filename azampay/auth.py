@@ -0,0 +1,222 @@
+"""
+Lazy, auto-refreshing access token
+"""
+
+import time
+import calendar
+import threading
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from azampay.metrics import CACHE, PHASE, MetricsHook
+from azampay.log import logger
+from azampay.models import TokenInfo
+
+_HIT = {"cache": "token", "result": "hit"}
+_MISS = {"cache": "token", "result": "miss"}
+_FETCH = {"phase": "token_fetch"}
+
+
+def parse_expiry(value: Any) -> Optional[float]:
+    """parse_expiry
+
+    Parses the ``expire`` field of a GenerateToken response into a unix timestamp
+
+    Args:
+        value (Any): e.g. "2023-03-26T12:30:24Z" or "2023-03-26T12:30:24.1234567Z"
+
+    Returns:
+        Optional[float]: The unix timestamp or None when it can not be parsed
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    text = value.strip().rstrip("Z")
+    # drop fractional seconds and offsets, AzamPay returns UTC
+    text = text.split(".")[0].split("+")[0]
+    for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return float(calendar.timegm(datetime.strptime(text, fmt).timetuple()))
+        except ValueError:
+            continue
+    return None
+
+
+class TokenManager(object):
+    """
+    Holds the bearer token and refreshes it shortly before it expires
+
+    The token is fetched on first use rather than at construction. Once it is
+    inside the refresh window a single thread refreshes it while the others keep
+    using the still valid token; only an expired (or missing) token blocks callers.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Dict[str, Any]],
+        *,
+        refresh_margin: float = 60.0,
+        default_lifetime: float = 3600.0,
+        metrics: Optional[MetricsHook] = None,
+    ):
+        """__init__ method
+
+        Args:
+            fetch (Callable[[], Dict[str, Any]]): Calls GenerateToken and returns its JSON response
+            refresh_margin (float, optional): Seconds before expiry at which the token gets refreshed. Defaults to 60.
+            default_lifetime (float, optional): Lifetime assumed when the response carries no expiry. Defaults to 3600.
+            metrics (MetricsHook, optional): Receives token cache hits/misses and fetch timings. Defaults to None.
+        """
+        self._fetch = fetch
+        self.metrics: MetricsHook = metrics or MetricsHook()
+        self.refresh_margin: float = refresh_margin
+        self.default_lifetime: float = default_lifetime
+        # (token, monotonic deadline) swapped as one tuple so readers never see a torn pair
+        self._state: Tuple[Optional[str], float] = (None, 0.0)
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> str:
+        if not self.metrics.enabled:
+            return self._accept(self._fetch())
+        self.metrics.increment(CACHE, tags=_MISS)
+        with self.metrics.timer(PHASE, _FETCH):
+            response = self._fetch()
+        return self._accept(response)
+
+    def _accept(self, response: Dict[str, Any]) -> str:
+        info = TokenInfo.from_response(response)
+        token = info.access_token
+        expires_at = parse_expiry(info.expire)
+        if expires_at is None:
+            lifetime = self.default_lifetime
+        else:
+            lifetime = expires_at - time.time()
+        self._state = (token, time.monotonic() + lifetime)
+        logger.debug(
+            "Access token generated: %s",
+            info.message,
+            extra={"expires_in": lifetime},
+        )
+        return token
+
+    @property
+    def expires_in(self) -> float:
+        """expires_in
+
+        Returns:
+            float: Seconds until the current token expires, 0 when there is none
+        """
+        token, deadline = self._state
+        if token is None:
+            return 0.0
+        return max(0.0, deadline - time.monotonic())
+
+    def get(self) -> str:
+        """get
+
+        Returns a valid token, fetching or refreshing it when needed
+
+        Returns:
+            str: The bearer token
+        """
+        token, deadline = self._state
+        now = time.monotonic()
+        if token is not None and now < deadline - self.refresh_margin:
+            if self.metrics.enabled:
+                self.metrics.increment(CACHE, tags=_HIT)
+            return token
+        if token is not None and now < deadline:
+            # refresh window: whoever gets the lock refreshes, everyone else moves on
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self._state[0] == token:
+                        return self._refresh()
+                except Exception as e:
+                    logger.warning("Refreshing the access token failed: %s", e)
+                finally:
+                    self._lock.release()
+            return self._state[0] or token
+        with self._lock:
+            token, deadline = self._state
+            if token is not None and time.monotonic() < deadline:
+                return token
+            return self._refresh()
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """invalidate
+
+        Forgets the token so the next call fetches a new one
+
+        Args:
+            token (str, optional): Only invalidate if this is still the current token,
+                so that concurrent rejections trigger a single refresh. Defaults to None.
+        """
+        with self._lock:
+            if token is None or self._state[0] == token:
+                self._state = (None, 0.0)
+
+
+class AsyncTokenManager(TokenManager):
+    """
+    TokenManager for the asyncio client
+
+    Same refresh rules, guarded by an ``asyncio.Lock`` so a single task refreshes
+    the token while the others keep using the valid one.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+        *,
+        refresh_margin: float = 60.0,
+        default_lifetime: float = 3600.0,
+        metrics: Optional[MetricsHook] = None,
+    ):
+        super().__init__(
+            fetch,
+            refresh_margin=refresh_margin,
+            default_lifetime=default_lifetime,
+            metrics=metrics,
+        )
+        # created on first use so it binds to the running loop
+        self._lock = None
+
+    def _async_lock(self) -> "asyncio.Lock":
+        if self._lock is None:
+            import asyncio
+
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _refresh(self) -> str:
+        if not self.metrics.enabled:
+            return self._accept(await self._fetch())
+        self.metrics.increment(CACHE, tags=_MISS)
+        with self.metrics.timer(PHASE, _FETCH):
+            response = await self._fetch()
+        return self._accept(response)
+
+    async def get(self) -> str:
+        token, deadline = self._state
+        now = time.monotonic()
+        if token is not None and now < deadline - self.refresh_margin:
+            if self.metrics.enabled:
+                self.metrics.increment(CACHE, tags=_HIT)
+            return token
+        lock = self._async_lock()
+        if token is not None and now < deadline:
+            if not lock.locked():
+                async with lock:
+                    try:
+                        if self._state[0] == token:
+                            return await self._refresh()
+                    except Exception as e:
+                        logger.warning("Refreshing the access token failed: %s", e)
+            return self._state[0] or token
+        async with lock:
+            token, deadline = self._state
+            if token is not None and time.monotonic() < deadline:
+                return token
+            return await self._refresh()
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        if token is None or self._state[0] == token:
+            self._state = (None, 0.0)
@@ -74,3 +74,59 @@ class InternalServerError(Exception):
 
     def __init__(self, error_message=error_message) -> None:
         super().__init__(error_message)
+
+
+class CircuitOpen(Exception):
+    """
+    This exception is raised without calling the server when the circuit breaker
+    of the endpoint is open, i.e. it recently failed repeatedly
+
+    The breaker lets a probe request through once its recovery timeout has elapsed
+    """
+
+    error_message: str = """
+    Ooops, This AzamPay endpoint is failing right now
+    
+    The request was not sent to avoid piling up on a degraded service
+    
+    Please try again in a few seconds
+    """
+
+    def __init__(self, error_message=error_message) -> None:
+        super().__init__(error_message)
+
+
+class EndpointOverloaded(Exception):
+    """
+    This exception is raised without calling the server when the endpoint
+    already has as many requests in flight as its budget allows
+
+    Requests are rejected immediately instead of being queued
+    """
+
+    error_message: str = """
+    Ooops, Too many requests are in flight to this AzamPay endpoint
+    
+    Please slow down and try again
+    """
+
+    def __init__(self, error_message=error_message) -> None:
+        super().__init__(error_message)
+
+
+class InvalidCallback(ValueError):
+    """
+    This exception is raised when a callback payload posted to the webhook
+    does not match the AzamPay callback schema
+
+    Most likely a required field is missing or has the wrong type
+    """
+
+    error_message: str = """
+    Ooops, This callback payload is invalid
+    
+    Please check that it was sent by AzamPay
+    """
+
+    def __init__(self, error_message=error_message) -> None:
+        super().__init__(error_message)
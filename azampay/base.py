@@ -0,0 +1,343 @@
+"""
+Configuration, validation and request building shared by the sync and async clients
+"""
+
+import re
+import time
+from functools import partial
+from urllib.parse import urlencode, urlsplit
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from azampay.azampay_exceptions import (
+    InvalidCredentials,
+    BadRequest,
+    InvalidURL,
+    InternalServerError,
+)
+from azampay.msisdn import normalize_msisdn, resolver
+from azampay.checkout import (
+    SUPPORTED_BANKS,
+    SUPPORTED_CURRENCIES,
+    BankCheckoutRequest,
+    CheckoutRequest,
+    MobileCheckoutRequest,
+    PaymentLinkRequest,
+    PaymentLinkTemplate,
+    clean_amount,
+)
+from azampay.response import APIResponse, ResponseMeta
+from azampay.metrics import MetricsHook, timed_phase
+from azampay.log import logger
+from azampay.serialization import loads
+from azampay.transactions import FAILURE, TransactionRegistry
+from azampay.hedge import HedgePolicy
+from azampay.batch import BatchResult
+
+
+class BaseAzampay(object):
+    """
+    Everything an AzamPay client does that does not touch the network
+    """
+
+    SANDBOX_AUTH_BASE_URL: str = "https://authenticator-sandbox.azampay.co.tz"
+    SANDBOX_BASE_URL: str = "https://sandbox.azampay.co.tz"
+    AUTH_BASE_URL: Optional[str] = "https://authenticator.azampay.co.tz"
+    BASE_URL: Optional[str] = "https://checkout.azampay.co.tz"
+
+    MNOS_MAP: Dict[str, str] = {
+        "Tigo": "Tigo",
+        "Airtel": "Airtel",
+        "Halopesa": "Halopesa",
+        "Azampesa": "Azampesa",
+        "Mpesa": "Mpesa",
+    }
+
+    SUPPORTED_BANKS: List[str] = SUPPORTED_BANKS
+
+    SUPPORTED_CURRENCIES: List[str] = SUPPORTED_CURRENCIES
+
+    def __init__(
+        self,
+        *,
+        app_name: str,
+        client_id: str,
+        client_secret: str,
+        x_api_key: str = None,
+        sandbox: Optional[bool] = True,
+        metrics: Optional[MetricsHook] = None,
+        transactions: Optional[TransactionRegistry] = None,
+        hedging: Optional[HedgePolicy] = None,
+    ):
+        if sandbox:
+            self.AUTH_BASE_URL = self.SANDBOX_AUTH_BASE_URL
+            self.BASE_URL = self.SANDBOX_BASE_URL
+
+        self.app_name: str = app_name
+        self.client_id: str = client_id
+        self.__client_secret: str = client_secret
+        self.__x_api_key = x_api_key
+        self.metrics: MetricsHook = metrics or MetricsHook()
+        self.transactions: Optional[TransactionRegistry] = transactions
+        self.hedging: Optional[HedgePolicy] = hedging
+
+    @property
+    def _token_url(self) -> str:
+        return f"{self.AUTH_BASE_URL}/AppRegistration/GenerateToken"
+
+    @property
+    def _partners_url(self) -> str:
+        return f"{self.BASE_URL}/api/v1/Partner/GetPaymentPartners"
+
+    def _transaction_status_url(self, reference: str, bank_name: Optional[str] = None) -> str:
+        query = {"reference": reference}
+        if bank_name:
+            query["bankName"] = bank_name
+        return f"{self.BASE_URL}/azampay/gettransactionstatus?{urlencode(query)}"
+
+    def _hedge_urls(self, url: str) -> List[str]:
+        # the attempts of a hedged call: the primary host first, then the alternates
+        if self.AUTH_BASE_URL and url.startswith(self.AUTH_BASE_URL):
+            return self.hedging.urls(url, self.AUTH_BASE_URL, self.hedging.auth_base_urls)
+        if self.BASE_URL and url.startswith(self.BASE_URL):
+            return self.hedging.urls(url, self.BASE_URL, self.hedging.base_urls)
+        return self.hedging.urls(url, "", ())
+
+    def _observe_latency(self, url: str, started: float) -> None:
+        if self.hedging is not None:
+            self.hedging.tracker.observe(self._host(url), time.perf_counter() - started)
+
+    @staticmethod
+    def _hedge_accepts(response: Any) -> bool:
+        # a 5xx from one host is worth waiting for another
+        return response.status_code < 500
+
+    def _token_body(self) -> Dict[str, str]:
+        return {
+            "appName": self.app_name,
+            "clientId": self.client_id,
+            "clientSecret": self.__client_secret,
+        }
+
+    def _auth_headers(self, token: str) -> Dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        # production calls are made without an API key
+        if self.__x_api_key is not None:
+            headers["X-API-Key"] = self.__x_api_key
+        return headers
+
+    @timed_phase("carrier_lookup")
+    def _get_carrier(self, mobile: str) -> str:
+        """_get_carrier
+
+        Returns the carrier of the mobile number
+
+        Args:
+            mobile (str): The mobile number
+
+        Returns:
+            str: The carrier of the mobile number
+        """
+        return resolver.carrier(mobile)
+
+    def _record_checkout(
+        self, request: CheckoutRequest, response: Dict[str, Any]
+    ) -> None:
+        if (
+            self.transactions is None
+            or not request.external_id
+            or isinstance(request, PaymentLinkRequest)
+        ):
+            return
+        if response.get("success") is False:
+            # rejected up front: no callback will come and there is nothing to poll for
+            self.transactions.complete(
+                request.external_id,
+                FAILURE,
+                transaction_id=response.get("transactionId"),
+                message=response.get("message"),
+                amount=request.amount,
+                provider=request.provider,
+                account=request.account,
+            )
+            return
+        self.transactions.record_submission(
+            request.external_id,
+            response,
+            amount=request.amount,
+            provider=request.provider,
+            account=request.account,
+        )
+
+    @staticmethod
+    def _endpoint(url: str) -> str:
+        return urlsplit(url).path
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc
+
+    @staticmethod
+    def _wrap_response(decoded: Any, meta: ResponseMeta) -> Any:
+        if isinstance(decoded, dict):
+            return APIResponse(decoded, meta)
+        return decoded
+
+    @staticmethod
+    def _handle_response(status_code: int, content: bytes, url: str) -> Dict[str, Any]:
+        """_handle_response
+
+        Maps error status codes to exceptions and decodes the JSON body otherwise
+
+        Args:
+            status_code (int): HTTP status code
+            content (bytes): Raw response body, decoded with the serialization backend
+            url (str): The requested url
+
+        Returns:
+            Dict[str, Any]: JSON response from the server
+        """
+        if status_code in (401, 423):
+            raise InvalidCredentials
+        elif status_code == 400:
+            raise BadRequest(f"Bad Request: {content.decode('utf-8', 'replace')}")
+        elif status_code == 404:
+            raise InvalidURL("{} is not a valid url".format(url))
+        elif status_code == 500:
+            raise InternalServerError
+        else:
+            try:
+                return loads(content)
+            except ValueError as e:
+                logger.error(
+                    "Could not decode the response of %s: %s",
+                    url,
+                    e,
+                    extra={"status": status_code},
+                )
+                return {
+                    "message": "Something went wrong with decoding the response",
+                    "status": status_code,
+                    "data": content.decode("utf-8", "replace"),
+                }
+
+    @staticmethod
+    def clean_mobile_number(mobile_number: str) -> str:
+        """clean_mobile_number
+
+        Cleans the mobile number to remove any whitespace or dashes
+
+        Args:
+            mobile_number (str): The mobile number to clean
+
+        Returns:
+            str: The cleaned mobile number
+        """
+
+        # remove any non-numeric characters
+        mobile_number = normalize_msisdn(re.sub(r"[^0-9]", "", mobile_number))
+        if mobile_number is None:
+            raise ValueError("Invalid mobile number")
+        return mobile_number
+
+    @staticmethod
+    def clean_amount(amount: str):
+        # remove spaces and commas
+        return clean_amount(amount)
+
+    def _mobile_provider(self, mobile: str, provider: Optional[str]) -> str:
+        # Check if user specified provider
+        if not provider:
+            provider = self._get_carrier(mobile)
+        return provider.strip().capitalize()
+
+    @timed_phase("validation")
+    def _mobile_checkout_request(self, **kwargs: Any) -> MobileCheckoutRequest:
+        return MobileCheckoutRequest(**kwargs)
+
+    @timed_phase("validation")
+    def _bank_checkout_request(self, **kwargs: Any) -> BankCheckoutRequest:
+        return BankCheckoutRequest(**kwargs)
+
+    def _payment_link_vendor(
+        self,
+        provider: Optional[str],
+        vendor_id: Optional[str],
+        vendor_name: Optional[str],
+    ) -> Optional[str]:
+        if not ((vendor_id and vendor_name) or provider):
+            raise ValueError("Please provide vendor_id and vendor_name or provider")
+        if provider:
+            return provider.strip().capitalize()
+        return None
+
+    @timed_phase("validation")
+    def _payment_link_request(
+        self,
+        *,
+        app_name: Optional[str],
+        client_id: Optional[str],
+        **kwargs: Any,
+    ) -> PaymentLinkRequest:
+        return PaymentLinkRequest(
+            app_name=app_name or self.app_name,
+            client_id=client_id or self.client_id,
+            **kwargs,
+        )
+
+    def _check_link_provider(self, provider: str, unmapped_supported_mnos: List[str]) -> None:
+        if provider not in unmapped_supported_mnos:
+            raise ValueError(f"{provider} is not a supported mno")
+
+    def _cached_payment_link(self, request: PaymentLinkRequest) -> Optional[Dict[str, Any]]:
+        # a link already minted for this exact invoice is reused
+        return self.payment_links.get(request)
+
+    def _remember_payment_link(
+        self, request: PaymentLinkRequest, response: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        self.payment_links.put(request, response)
+        return response
+
+    def _prepared_payment_links(
+        self,
+        links: PaymentLinkTemplate,
+        invoices: Iterable[Dict[str, Any]],
+        send: Any,
+    ) -> Tuple[List[BatchResult], List[Tuple[Any, Any]]]:
+        # cache hits and invalid invoices are ready at once, the rest become ``send`` jobs
+        ready: List[BatchResult] = []
+        jobs: List[Tuple[Any, Any]] = []
+        for invoice in invoices:
+            try:
+                request = links.fill(**invoice)
+            except Exception as e:
+                ready.append(BatchResult(invoice.get("external_id"), error=e))
+                continue
+            response = self._cached_payment_link(request)
+            if response is not None:
+                ready.append(BatchResult(request.external_id, response=response))
+            else:
+                jobs.append((request.external_id, partial(send, request)))
+        return ready, jobs
+
+    def _payment_link_template(
+        self,
+        *,
+        app_name: Optional[str],
+        client_id: Optional[str],
+        **kwargs: Any,
+    ) -> PaymentLinkTemplate:
+        return PaymentLinkTemplate(
+            app_name=app_name or self.app_name,
+            client_id=client_id or self.client_id,
+            **kwargs,
+        )
+
+    def _checkout_url(self, request: CheckoutRequest) -> str:
+        return f"{self.BASE_URL}{request.PATH}"
+
+    def _check_provider(self, request: CheckoutRequest, supported_mnos: List[str]) -> None:
+        if isinstance(request, MobileCheckoutRequest) and request.provider not in supported_mnos:
+            raise ValueError(f"{request.provider} is not a supported mno")
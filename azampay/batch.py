@@ -0,0 +1,164 @@
+"""
+Bounded-concurrency batch execution
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from azampay.ratelimit import TokenBucket
+
+Job = Tuple[Any, Callable[[], Dict[str, Any]]]
+AsyncJob = Tuple[Any, Callable[[], Awaitable[Dict[str, Any]]]]
+
+
+class BatchResult(object):
+    """
+    Outcome of one item of a batch, tied to its external id
+    """
+
+    __slots__ = ("external_id", "response", "error")
+
+    def __init__(
+        self,
+        external_id: Any,
+        response: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None,
+    ):
+        self.external_id = external_id
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"BatchResult(external_id={self.external_id!r}, response={self.response!r})"
+        return f"BatchResult(external_id={self.external_id!r}, error={self.error!r})"
+
+
+def _call(external_id: Any, call: Callable[[], Dict[str, Any]]) -> BatchResult:
+    try:
+        return BatchResult(external_id, response=call())
+    except Exception as e:
+        return BatchResult(external_id, error=e)
+
+
+def run_batch(
+    jobs: Iterable[Job],
+    *,
+    max_concurrency: int = 8,
+    rate_limit: Optional[Union[float, TokenBucket]] = None,
+) -> Iterator[BatchResult]:
+    """run_batch
+
+    Runs ``(external_id, call)`` jobs on a thread pool and yields results as they complete
+
+    Jobs are pulled lazily, at most ``2 * max_concurrency`` are queued at a time so
+    arbitrarily large iterables run in bounded memory. Errors are returned per item
+    and never abort the batch.
+
+    Args:
+        jobs (Iterable[Job]): Pairs of external id and a zero-argument call
+        max_concurrency (int, optional): Calls in flight at once. Defaults to 8.
+        rate_limit (Union[float, TokenBucket], optional): Maximum calls started per second, or a bucket
+            shared with other batches. Defaults to None (unlimited).
+
+    Returns:
+        Iterator[BatchResult]: One result per job, in completion order
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    if isinstance(rate_limit, TokenBucket):
+        bucket: Optional[TokenBucket] = rate_limit
+    else:
+        bucket = TokenBucket(rate_limit) if rate_limit else None
+    window = 2 * max_concurrency
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        for external_id, call in jobs:
+            if bucket is not None:
+                bucket.acquire()
+            pending.add(pool.submit(_call, external_id, call))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+async def arun_batch(
+    jobs: Iterable[AsyncJob],
+    *,
+    max_concurrency: int = 8,
+    rate_limit: Optional[Union[float, TokenBucket]] = None,
+) -> AsyncIterator[BatchResult]:
+    """arun_batch
+
+    Asyncio flavour of ``run_batch``: the calls are coroutine functions, run as tasks
+    of which an ``asyncio.Semaphore`` lets at most ``max_concurrency`` exist at a time
+
+    Args:
+        jobs (Iterable[AsyncJob]): Pairs of external id and a zero-argument coroutine function
+        max_concurrency (int, optional): Calls in flight at once. Defaults to 8.
+        rate_limit (Union[float, TokenBucket], optional): Maximum calls started per second, or a bucket
+            shared with other batches. Defaults to None (unlimited).
+
+    Returns:
+        AsyncIterator[BatchResult]: One result per job, in completion order
+    """
+    import asyncio
+
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    if isinstance(rate_limit, TokenBucket):
+        bucket: Optional[TokenBucket] = rate_limit
+    else:
+        bucket = TokenBucket(rate_limit) if rate_limit else None
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(external_id: Any, call: Callable[[], Awaitable[Dict[str, Any]]]) -> BatchResult:
+        try:
+            return BatchResult(external_id, response=await call())
+        except Exception as e:
+            return BatchResult(external_id, error=e)
+        finally:
+            semaphore.release()
+
+    pending: Set["asyncio.Task"] = set()
+    try:
+        for external_id, call in jobs:
+            await semaphore.acquire()
+            if bucket is not None:
+                # poll the bucket without blocking the loop
+                wait_for = bucket.try_acquire()
+                while wait_for > 0:
+                    await asyncio.sleep(wait_for)
+                    wait_for = bucket.try_acquire()
+            pending.add(asyncio.ensure_future(run(external_id, call)))
+            for task in [task for task in pending if task.done()]:
+                pending.discard(task)
+                yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # the caller stopped iterating early
+        for task in pending:
+            task.cancel()
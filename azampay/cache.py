@@ -0,0 +1,286 @@
+"""
+Payment partner catalog and payment link caches
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from azampay.metrics import CACHE, PHASE, MetricsHook
+from azampay.models import Partner
+
+_HIT = {"cache": "partners", "result": "hit"}
+_MISS = {"cache": "partners", "result": "miss"}
+_FETCH = {"phase": "partner_fetch"}
+_LINK_HIT = {"cache": "payment_links", "result": "hit"}
+_LINK_MISS = {"cache": "payment_links", "result": "miss"}
+# seconds a stale catalog is served after a failed refresh
+_RETRY_AFTER = 5.0
+
+Fetcher = Callable[[], List[Dict[str, Any]]]
+AsyncFetcher = Callable[[], Awaitable[List[Dict[str, Any]]]]
+
+
+def normalize_partner_name(name: str) -> str:
+    """normalize_partner_name
+
+    Normalizes a partner/provider name the way AzamPay partner names are compared
+
+    Args:
+        name (str): The partner name, e.g. " tigo"
+
+    Returns:
+        str: The normalized name, e.g. "Tigo"
+    """
+    return name.strip().capitalize()
+
+
+class _CatalogEntry(object):
+    __slots__ = ("partners", "models", "index", "expires_at")
+
+    def __init__(
+        self,
+        partners: List[Dict[str, Any]],
+        models: List[Partner],
+        index: Dict[str, Tuple[str, str]],
+        expires_at: float,
+    ):
+        self.partners = partners
+        self.models = models
+        self.index = index
+        self.expires_at = expires_at
+
+
+class PartnerCatalog(object):
+    """
+    TTL cache of the payment partners returned by GetPaymentPartners
+
+    Entries are swapped atomically, so readers never take a lock on a hit.
+    When the entry expires only one caller refreshes it (single-flight) while
+    concurrent callers wait for that refresh instead of refetching.
+    """
+
+    def __init__(self, ttl: float = 300.0, metrics: Optional[MetricsHook] = None):
+        """__init__ method
+
+        Args:
+            ttl (float, optional): Seconds a fetched catalog stays fresh. Defaults to 300.
+            metrics (MetricsHook, optional): Receives cache hits/misses and fetch timings. Defaults to None.
+        """
+        self.ttl: float = ttl
+        self.metrics: MetricsHook = metrics or MetricsHook()
+        self._entry: Optional[_CatalogEntry] = None
+        self._refresh_lock = threading.Lock()
+
+    def _build(self, partners: List[Dict[str, Any]]) -> _CatalogEntry:
+        # parsed once per refresh, lookups then never walk the raw dicts
+        models = [Partner.from_dict(partner) for partner in partners]
+        index: Dict[str, Tuple[str, str]] = {}
+        for partner in models:
+            index.setdefault(partner.name, (partner.vendor_id, partner.partner_name))
+        return _CatalogEntry(partners, models, index, time.monotonic() + self.ttl)
+
+    def _stale(self, entry: Optional[_CatalogEntry]) -> _CatalogEntry:
+        # a failed fetch is never cached; the stale catalog is served until a
+        # short retry deadline so callers do not queue up to refetch one by one
+        if entry is None:
+            return _CatalogEntry([], [], {}, 0.0)
+        entry = _CatalogEntry(
+            entry.partners,
+            entry.models,
+            entry.index,
+            time.monotonic() + min(self.ttl, _RETRY_AFTER),
+        )
+        self._entry = entry
+        return entry
+
+    def _snapshot(self, fetch: Fetcher) -> _CatalogEntry:
+        entry = self._entry
+        if entry is not None and entry.expires_at > time.monotonic():
+            if self.metrics.enabled:
+                self.metrics.increment(CACHE, tags=_HIT)
+            return entry
+        with self._refresh_lock:
+            entry = self._entry
+            if entry is not None and entry.expires_at > time.monotonic():
+                return entry
+            if self.metrics.enabled:
+                self.metrics.increment(CACHE, tags=_MISS)
+                with self.metrics.timer(PHASE, _FETCH):
+                    partners = fetch()
+            else:
+                partners = fetch()
+            if not partners:
+                return self._stale(entry)
+            entry = self._build(partners)
+            self._entry = entry
+            return entry
+
+    def get(self, fetch: Fetcher) -> List[Dict[str, Any]]:
+        """get
+
+        Returns the cached partners, calling ``fetch`` when the cache is empty or expired
+
+        Args:
+            fetch (Fetcher): Loads the partner list from the API
+
+        Returns:
+            List[Dict[str, Any]]: The raw partner list
+        """
+        return self._snapshot(fetch).partners
+
+    def models(self, fetch: Fetcher) -> List[Partner]:
+        """models
+
+        Returns:
+            List[Partner]: The cached partners, parsed
+        """
+        return list(self._snapshot(fetch).models)
+
+    def names(self, fetch: Fetcher) -> List[str]:
+        """names
+
+        Returns:
+            List[str]: Normalized names of every partner
+        """
+        return list(self._snapshot(fetch).index)
+
+    def lookup(self, name: str, fetch: Fetcher) -> Optional[Tuple[str, str]]:
+        """lookup
+
+        Finds a partner by name
+
+        Args:
+            name (str): The partner name, in any case
+            fetch (Fetcher): Loads the partner list from the API
+
+        Returns:
+            Optional[Tuple[str, str]]: (paymentVendorId, partnerName) or None when unknown
+        """
+        return self._snapshot(fetch).index.get(normalize_partner_name(name))
+
+    def invalidate(self) -> None:
+        """invalidate
+
+        Drops the cached catalog so that the next read refetches it
+        """
+        self._entry = None
+
+
+class AsyncPartnerCatalog(PartnerCatalog):
+    """
+    PartnerCatalog for the asyncio client, refreshed single-flight under an ``asyncio.Lock``
+    """
+
+    def __init__(self, ttl: float = 300.0, metrics: Optional[MetricsHook] = None):
+        super().__init__(ttl=ttl, metrics=metrics)
+        # created on first use so it binds to the running loop
+        self._refresh_lock = None
+
+    async def _snapshot(self, fetch: AsyncFetcher) -> _CatalogEntry:
+        entry = self._entry
+        if entry is not None and entry.expires_at > time.monotonic():
+            if self.metrics.enabled:
+                self.metrics.increment(CACHE, tags=_HIT)
+            return entry
+        if self._refresh_lock is None:
+            import asyncio
+
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            entry = self._entry
+            if entry is not None and entry.expires_at > time.monotonic():
+                return entry
+            if self.metrics.enabled:
+                self.metrics.increment(CACHE, tags=_MISS)
+                with self.metrics.timer(PHASE, _FETCH):
+                    partners = await fetch()
+            else:
+                partners = await fetch()
+            if not partners:
+                return self._stale(entry)
+            entry = self._build(partners)
+            self._entry = entry
+            return entry
+
+    async def get(self, fetch: AsyncFetcher) -> List[Dict[str, Any]]:
+        return (await self._snapshot(fetch)).partners
+
+    async def models(self, fetch: AsyncFetcher) -> List[Partner]:
+        return list((await self._snapshot(fetch)).models)
+
+    async def names(self, fetch: AsyncFetcher) -> List[str]:
+        return list((await self._snapshot(fetch)).index)
+
+    async def lookup(
+        self, name: str, fetch: AsyncFetcher
+    ) -> Optional[Tuple[str, str]]:
+        return (await self._snapshot(fetch)).index.get(normalize_partner_name(name))
+
+
+class PaymentLinkCache(object):
+    """
+    Bounded LRU of minted payment links, keyed by external id
+
+    A link is only reused for the very same request: an invoice sent again with
+    another amount, vendor or redirect mints a new link and replaces the old one.
+    Only responses carrying a link are kept, failures are never cached.
+    """
+
+    def __init__(self, max_size: int = 10000, metrics: Optional[MetricsHook] = None):
+        """__init__ method
+
+        Args:
+            max_size (int, optional): Links kept before the least recently used is evicted, 0 disables the cache. Defaults to 10000.
+            metrics (MetricsHook, optional): Receives cache hits/misses. Defaults to None.
+        """
+        self.max_size: int = max_size
+        self.metrics: MetricsHook = metrics or MetricsHook()
+        self._links: "OrderedDict[str, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, request: Any) -> Optional[Any]:
+        """get
+
+        Args:
+            request (PaymentLinkRequest): The request about to be sent
+
+        Returns:
+            Optional[Any]: The response that minted a link for this exact request, or None
+        """
+        if not self.max_size:
+            return None
+        with self._lock:
+            entry = self._links.get(request.external_id)
+            if entry is not None and entry[0] == request:
+                self._links.move_to_end(request.external_id)
+                response = entry[1]
+            else:
+                response = None
+        if self.metrics.enabled:
+            self.metrics.increment(CACHE, tags=_LINK_MISS if response is None else _LINK_HIT)
+        return response
+
+    def put(self, request: Any, response: Any) -> None:
+        """put
+
+        Remembers the response of a request if it carries a link
+
+        Args:
+            request (PaymentLinkRequest): The request that was sent
+            response (Any): Its decoded response
+        """
+        if not (self.max_size and isinstance(response, dict) and response.get("data")):
+            return
+        with self._lock:
+            self._links[request.external_id] = (request, response)
+            self._links.move_to_end(request.external_id)
+            while len(self._links) > self.max_size:
+                self._links.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._links.clear()
+
+    def __len__(self) -> int:
+        return len(self._links)
@@ -0,0 +1,377 @@
+"""
+Callback ingestion: typed schema, deduplication and batched async delivery
+"""
+
+import asyncio
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from azampay.azampay_exceptions import InvalidCallback
+from azampay.log import logger
+from azampay.serialization import loads
+
+CALLBACK_PATH: str = "/api/v1/Checkout/Callback"
+
+
+class CallbackEvent(object):
+    """
+    A validated AzamPay checkout callback
+
+    ``reference`` is AzamPay's transaction id and ``utilityref`` the external id
+    the checkout was submitted with.
+    """
+
+    __slots__ = (
+        "msisdn",
+        "amount",
+        "message",
+        "utilityref",
+        "operator",
+        "reference",
+        "transactionstatus",
+        "submerchant_acc",
+        "fsp_reference_id",
+        "additional_properties",
+        "raw",
+    )
+
+    REQUIRED: Tuple[str, ...] = ("reference", "utilityref", "transactionstatus")
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.raw: Dict[str, Any] = payload
+        self.msisdn: Optional[str] = self._text(payload, "msisdn")
+        self.amount: Optional[str] = self._text(payload, "amount")
+        self.message: Optional[str] = self._text(payload, "message")
+        self.utilityref: str = self._text(payload, "utilityref")
+        self.operator: Optional[str] = self._text(payload, "operator")
+        self.reference: str = self._text(payload, "reference")
+        self.transactionstatus: str = self._text(payload, "transactionstatus")
+        self.submerchant_acc: Optional[str] = self._text(payload, "submerchantAcc")
+        self.fsp_reference_id: Optional[str] = self._text(payload, "fspReferenceId")
+        self.additional_properties: Optional[Dict[str, Any]] = payload.get(
+            "additionalProperties"
+        )
+
+    @staticmethod
+    def _text(payload: Dict[str, Any], field: str) -> Optional[str]:
+        value = payload.get(field)
+        if value is None:
+            return None
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return str(value)
+        raise InvalidCallback(f"{field} must be a string, got {type(value).__name__}")
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "CallbackEvent":
+        """from_payload
+
+        Validates a decoded callback body
+
+        Args:
+            payload (Any): The decoded JSON body
+
+        Raises:
+            InvalidCallback: When the payload is not an object or misses a required field
+
+        Returns:
+            CallbackEvent: The event
+        """
+        if not isinstance(payload, dict):
+            raise InvalidCallback("The callback body must be a JSON object")
+        event = cls(payload)
+        missing = [field for field in cls.REQUIRED if not getattr(event, field)]
+        if missing:
+            raise InvalidCallback(f"Missing callback fields: {', '.join(missing)}")
+        return event
+
+    @property
+    def transaction_id(self) -> str:
+        return self.reference
+
+    @property
+    def external_id(self) -> str:
+        return self.utilityref
+
+    @property
+    def succeeded(self) -> bool:
+        return self.transactionstatus.lower() == "success"
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """key
+
+        Returns:
+            Tuple[str, str]: (transaction id, external id), identifying repeated deliveries
+        """
+        return (self.reference, self.utilityref)
+
+    def __repr__(self) -> str:
+        return (
+            f"CallbackEvent(reference={self.reference!r}, utilityref={self.utilityref!r}, "
+            f"transactionstatus={self.transactionstatus!r})"
+        )
+
+
+class DedupeIndex(object):
+    """
+    Bounded set of recently seen keys, evicting the oldest first
+    """
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size: int = max_size
+        self._keys: "OrderedDict[Any, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._keys
+
+    def add(self, key: Any) -> bool:
+        """add
+
+        Args:
+            key (Any): The key to remember
+
+        Returns:
+            bool: True when the key is new, False for a duplicate
+        """
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+        return True
+
+    def discard(self, key: Any) -> None:
+        self._keys.pop(key, None)
+
+
+BatchHandler = Callable[[List[CallbackEvent]], Union[None, Awaitable[None]]]
+
+
+class CallbackDispatcher(object):
+    """
+    Hands callbacks to the application in batches, off the request path
+
+    ``submit`` only validates, dedupes and enqueues, so the webhook can acknowledge
+    immediately. A consumer task delivers batches of up to ``batch_size`` events,
+    or whatever arrived within ``flush_interval``. When the queue is full ``submit``
+    refuses the event, which the webhook turns into a 503 so AzamPay retries later.
+    The events of a batch the handler fails on are forgotten by the dedupe index,
+    so a redelivery of them is handled again.
+    """
+
+    def __init__(
+        self,
+        handler: BatchHandler,
+        *,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        max_queue: int = 10000,
+        dedupe_size: int = 100000,
+    ):
+        """__init__ method
+
+        Args:
+            handler (BatchHandler): Called with each batch of events, may be a coroutine function
+            batch_size (int, optional): Largest batch delivered at once. Defaults to 100.
+            flush_interval (float, optional): Seconds to wait for a batch to fill up. Defaults to 0.05.
+            max_queue (int, optional): Events buffered before applying backpressure. Defaults to 10000.
+            dedupe_size (int, optional): Recent callbacks remembered for deduplication. Defaults to 100000.
+        """
+        self.handler = handler
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.max_queue: int = max_queue
+        self.dedupe = DedupeIndex(dedupe_size)
+        self.accepted: int = 0
+        self.duplicates: int = 0
+        self.rejected: int = 0
+        self.delivered: int = 0
+        self.failed: int = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """start
+
+        Starts the consumer task on the running loop, submit calls it on first use
+        """
+        if self._consumer is None or self._consumer.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(self.max_queue)
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    async def stop(self) -> None:
+        """stop
+
+        Delivers everything still queued, then stops the consumer
+        """
+        if self._queue is not None and self._consumer is not None:
+            await self._queue.join()
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+            self._consumer = None
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, event: CallbackEvent) -> bool:
+        """submit
+
+        Args:
+            event (CallbackEvent): A validated callback
+
+        Returns:
+            bool: False when the queue is full and the sender should retry later,
+                True otherwise (including duplicates, which are acknowledged but not delivered)
+        """
+        self.start()
+        if event.key in self.dedupe:
+            self.duplicates += 1
+            return True
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.dedupe.add(event.key)
+        self.accepted += 1
+        return True
+
+    async def _next_batch(self) -> List[CallbackEvent]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _consume(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                result = self.handler(batch)
+                if inspect.isawaitable(result):
+                    await result
+                self.delivered += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                # keys are taken at enqueue, so duplicates of queued events are dropped too
+                for event in batch:
+                    self.dedupe.discard(event.key)
+                logger.exception(
+                    "Callback handler failed on a batch of %d events", len(batch)
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "backlog": self.backlog,
+        }
+
+
+def _with_registry(transactions: Any, handler: Optional[BatchHandler]) -> BatchHandler:
+    async def deliver(events: List[CallbackEvent]) -> None:
+        transactions.update_from_callbacks(events)
+        if handler is not None:
+            result = handler(events)
+            if inspect.isawaitable(result):
+                await result
+
+    return deliver
+
+
+def create_callback_app(
+    handler: Optional[BatchHandler] = None,
+    *,
+    transactions: Any = None,
+    path: str = CALLBACK_PATH,
+    dispatcher: Optional[CallbackDispatcher] = None,
+    **dispatcher_options: Any,
+) -> Any:
+    """create_callback_app
+
+    Builds a FastAPI app receiving AzamPay callbacks (pip install azampay[callbacks])
+
+    Args:
+        handler (BatchHandler, optional): Called with each batch of new, validated events. Defaults to None.
+        transactions (TransactionRegistry, optional): Completed from every event before ``handler``
+            runs, waking up its waiters. Defaults to None.
+        path (str, optional): The webhook path. Defaults to "/api/v1/Checkout/Callback".
+        dispatcher (CallbackDispatcher, optional): A preconfigured dispatcher, otherwise one is
+            built from ``handler`` and ``dispatcher_options``. Defaults to None.
+
+    Returns:
+        fastapi.FastAPI: The app, e.g. served with ``uvicorn module:app``
+
+    Example:
+
+    >>> from azampay.callbacks import create_callback_app
+    >>> async def handle(events):
+    ...     for event in events:
+    ...         print(event.external_id, event.succeeded)
+    >>> app = create_callback_app(handle, batch_size=500)
+    """
+    try:
+        from fastapi import FastAPI, Request
+        from fastapi.responses import JSONResponse
+    except ImportError:
+        raise ImportError(
+            "create_callback_app needs fastapi, install it with: pip install azampay[callbacks]"
+        )
+    from contextlib import asynccontextmanager
+
+    if dispatcher is None:
+        if handler is None and transactions is None:
+            raise ValueError("create_callback_app needs a handler or a transactions registry")
+        if transactions is not None:
+            handler = _with_registry(transactions, handler)
+        dispatcher = CallbackDispatcher(handler, **dispatcher_options)
+
+    @asynccontextmanager
+    async def lifespan(app: Any) -> Any:
+        dispatcher.start()
+        yield
+        await dispatcher.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.dispatcher = dispatcher
+
+    @app.post(path)
+    async def callback(request: Request) -> Any:
+        try:
+            event = CallbackEvent.from_payload(loads(await request.body()))
+        except ValueError as e:
+            return JSONResponse({"status": "error", "message": str(e)}, status_code=422)
+        if not dispatcher.submit(event):
+            return JSONResponse(
+                {"status": "busy"}, status_code=503, headers={"Retry-After": "1"}
+            )
+        return {"status": "success"}
+
+    return app
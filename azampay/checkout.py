@@ -0,0 +1,446 @@
+"""
+Immutable, validated checkout requests carrying their serialized JSON body
+"""
+
+import abc
+from typing import Any, Dict, List, Optional, Tuple
+from azampay.amount import CURRENCIES, parse_amount
+from azampay.msisdn import resolver
+from azampay.serialization import dumps, loads
+
+SUPPORTED_BANKS: List[str] = ["CRDB", "NMB"]
+
+SUPPORTED_CURRENCIES: List[str] = list(CURRENCIES)
+
+MOBILE_CHECKOUT_PATH: str = "/azampay/mno/checkout"
+BANK_CHECKOUT_PATH: str = "/azampay/bank/checkout"
+PAYMENT_LINK_PATH: str = "/api/v1/Partner/PostCheckout"
+
+
+def clean_amount(amount: Any) -> str:
+    """clean_amount
+
+    Args:
+        amount (Any): e.g. "1,000" or 1000
+
+    Returns:
+        str: The amount without spaces and commas, e.g. "1000"
+    """
+    return str(amount).replace(" ", "").replace(",", "")
+
+
+def check_currency(currency: Optional[str]) -> str:
+    if currency not in SUPPORTED_CURRENCIES:
+        raise ValueError(f"{currency} is not a supported currency")
+    return currency
+
+
+def dump_body(body: Dict[str, Any]) -> bytes:
+    """dump_body
+
+    Serializes a request body once, compactly, to the bytes put on the wire
+    """
+    return dumps(body)
+
+
+def _slot_names(cls: type) -> Tuple[str, ...]:
+    return tuple(
+        name for klass in reversed(cls.__mro__) for name in klass.__dict__.get("__slots__", ())
+    )
+
+
+def _restore(cls: type, values: Tuple[Any, ...]) -> "CheckoutRequest":
+    request = object.__new__(cls)
+    for name, value in zip(_slot_names(cls), values):
+        object.__setattr__(request, name, value)
+    return request
+
+
+class CheckoutRequest(abc.ABC):
+    """
+    Base of the request types, validated at construction and immutable afterwards
+
+    ``body`` holds the JSON bytes sent to ``PATH``, so a request can be built once,
+    e.g. in a worker process, and submitted any number of times without being
+    validated or serialized again. Requests pickle without revalidation.
+    """
+
+    __slots__ = ("body",)
+
+    PATH: str = ""
+
+    def _freeze(self, fields: Dict[str, Any], body: Dict[str, Any]) -> None:
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "body", dump_body(body))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (
+            _restore,
+            (type(self), tuple(getattr(self, name) for name in _slot_names(type(self)))),
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and other.body == self.body
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.body))
+
+    @property
+    @abc.abstractmethod
+    def external_id(self) -> str:
+        """external_id
+
+        Returns:
+            str: The calling application's id of the checkout, e.g. externalId or referenceId
+        """
+
+    @property
+    def account(self) -> Optional[str]:
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """as_dict
+
+        Returns:
+            Dict[str, Any]: The decoded JSON body
+        """
+        return loads(self.body)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.body.decode('utf-8')})"
+
+
+class MobileCheckoutRequest(CheckoutRequest):
+    """
+    A mobile (MNO) checkout
+
+    Example:
+
+    >>> from azampay.checkout import MobileCheckoutRequest
+    >>> request = MobileCheckoutRequest(mobile='0687649154', amount='1,000', external_id='order-1')
+    >>> request.provider, request.account_number, request.amount
+    ('Airtel', '255687649154', '1000')
+    >>> azampay.submit(request)
+    """
+
+    __slots__ = (
+        "account_number",
+        "amount",
+        "currency",
+        "_external_id",
+        "provider",
+        "additional_properties",
+    )
+
+    PATH: str = MOBILE_CHECKOUT_PATH
+
+    def __init__(
+        self,
+        *,
+        mobile: str,
+        amount: Any,
+        external_id: str,
+        provider: Optional[str] = None,
+        currency: Optional[str] = "TZS",
+        additional_properties: Optional[Dict[str, Any]] = None,
+    ):
+        """__init__ method
+
+        Args:
+            mobile (str): The account number/MSISDN the amount is deducted from, in any format
+            amount (Any): The amount to charge, see ``azampay.amount.Amount`` for the accepted formats
+            external_id (str): This id belongs to the calling application
+            provider (str, optional): The MNO, inferred from the number when omitted. Defaults to None.
+            currency (Optional[str], optional): The transaction currency. Defaults to "TZS".
+            additional_properties (Dict[str, Any], optional): Extra JSON data for the callback. Defaults to None.
+
+        Raises:
+            ValueError: When the amount, the currency or the mobile number is invalid
+
+        Whether the provider is one of the app's payment partners is only known to the
+        gateway, so the client checks it (from its cached partner list) on submit.
+        """
+        check_currency(currency)
+        resolution = resolver.resolve(mobile)
+        if resolution.msisdn is None:
+            raise ValueError("Invalid mobile number")
+        provider = (provider or resolution.carrier).strip().capitalize()
+        amount = parse_amount(amount, currency)
+        self._freeze(
+            {
+                "account_number": resolution.msisdn,
+                "amount": amount,
+                "currency": currency,
+                "_external_id": external_id,
+                "provider": provider,
+                "additional_properties": additional_properties,
+            },
+            {
+                "accountNumber": resolution.msisdn,
+                "amount": amount,
+                "currency": currency,
+                "externalId": external_id,
+                "provider": provider,
+                "additionalProperties": additional_properties,
+            },
+        )
+
+    @property
+    def external_id(self) -> str:
+        return self._external_id
+
+    @property
+    def account(self) -> str:
+        return self.account_number
+
+
+class BankCheckoutRequest(CheckoutRequest):
+    """
+    A bank checkout, identified by its ``reference_id``
+    """
+
+    __slots__ = (
+        "amount",
+        "currency",
+        "merchant_account_number",
+        "merchant_mobile_number",
+        "merchant_name",
+        "otp",
+        "provider",
+        "reference_id",
+        "additional_properties",
+    )
+
+    PATH: str = BANK_CHECKOUT_PATH
+
+    def __init__(
+        self,
+        *,
+        merchant_account_number: str,
+        merchant_mobile_number: str,
+        amount: Any,
+        otp: str,
+        provider: str,
+        reference_id: str,
+        currency: Optional[str] = "TZS",
+        merchant_name: Optional[str] = None,
+        additional_properties: Optional[Dict[str, Any]] = None,
+    ):
+        """__init__ method
+
+        See ``Azampay.bank_checkout`` for the arguments
+
+        Raises:
+            ValueError: When the bank, the amount, the currency or the mobile number is invalid
+        """
+        provider = provider.strip().upper()
+        if provider not in SUPPORTED_BANKS:
+            raise ValueError(f"{provider} is not a supported bank")
+        check_currency(currency)
+        mobile = resolver.resolve(merchant_mobile_number).msisdn
+        if mobile is None:
+            raise ValueError("Invalid mobile number")
+        amount = parse_amount(amount, currency)
+        reference_id = str(reference_id)
+        self._freeze(
+            {
+                "amount": amount,
+                "currency": currency,
+                "merchant_account_number": merchant_account_number,
+                "merchant_mobile_number": mobile,
+                "merchant_name": merchant_name,
+                "otp": otp,
+                "provider": provider,
+                "reference_id": reference_id,
+                "additional_properties": additional_properties,
+            },
+            {
+                "amount": amount,
+                "currencyCode": currency,
+                "merchantAccountNumber": merchant_account_number,
+                "merchantMobileNumber": mobile,
+                "merchantName": merchant_name,
+                "otp": otp,
+                "provider": provider,
+                "referenceId": reference_id,
+                "additionalProperties": additional_properties,
+            },
+        )
+
+    @property
+    def external_id(self) -> str:
+        return self.reference_id
+
+    @property
+    def account(self) -> str:
+        return self.merchant_account_number
+
+
+class PaymentLinkRequest(CheckoutRequest):
+    """
+    A hosted checkout page (payment link) for a known vendor
+
+    The vendor id and name come from the payment partners list, see
+    ``Azampay.supported_mnos_data``; ``Azampay.generate_payment_link`` resolves
+    them from a provider name instead.
+    """
+
+    __slots__ = (
+        "amount",
+        "_external_id",
+        "app_name",
+        "client_id",
+        "vendor_id",
+        "vendor_name",
+        "request_origin",
+        "redirect_fail_url",
+        "redirect_success_url",
+        "language",
+        "cart",
+        "currency",
+    )
+
+    PATH: str = PAYMENT_LINK_PATH
+
+    def __init__(
+        self,
+        *,
+        amount: Any,
+        external_id: str,
+        app_name: str,
+        client_id: str,
+        vendor_id: str,
+        vendor_name: str,
+        request_origin: str = "https://requestorigin.org",
+        redirect_fail_url: str = "https://failure",
+        redirect_success_url: str = "https://success",
+        language: str = "en",
+        cart: Optional[Dict[str, List[Dict[str, str]]]] = None,
+        currency: str = "TZS",
+    ):
+        """__init__ method
+
+        See ``Azampay.generate_payment_link`` for the arguments
+
+        Raises:
+            ValueError: When the vendor is missing or the amount or currency is invalid
+        """
+        if not (vendor_id and vendor_name):
+            raise ValueError("Please provide vendor_id and vendor_name or provider")
+        check_currency(currency)
+        amount = parse_amount(amount, currency)
+        cart = cart or {}
+        self._freeze(
+            {
+                "amount": amount,
+                "_external_id": external_id,
+                "app_name": app_name,
+                "client_id": client_id,
+                "vendor_id": vendor_id,
+                "vendor_name": vendor_name,
+                "request_origin": request_origin,
+                "redirect_fail_url": redirect_fail_url,
+                "redirect_success_url": redirect_success_url,
+                "language": language,
+                "cart": cart,
+                "currency": currency,
+            },
+            {
+                "amount": amount,
+                "externalId": external_id,
+                "appName": app_name,
+                "clientId": client_id,
+                "vendorId": vendor_id,
+                "vendorName": vendor_name,
+                "requestOrigin": request_origin,
+                "redirectFailURL": redirect_fail_url,
+                "redirectSuccessURL": redirect_success_url,
+                "language": language,
+                "cart": cart,
+                "currency": currency,
+            },
+        )
+
+    @property
+    def external_id(self) -> str:
+        return self._external_id
+
+
+class PaymentLinkTemplate(object):
+    """
+    The fields shared by a run of payment links, filled in per invoice
+
+    The vendor, app, redirects, language and currency are checked once here;
+    ``fill`` only adds the invoice's amount and external id (and optionally a
+    cart or any other override) to build each PaymentLinkRequest.
+
+    Example:
+
+    >>> from azampay.checkout import PaymentLinkTemplate
+    >>> template = PaymentLinkTemplate(app_name='abc', client_id='xxx', vendor_id='v-1', vendor_name='Airtel')
+    >>> template.fill(amount='5,000', external_id='invoice-1').amount
+    '5000'
+    """
+
+    __slots__ = ("fields",)
+
+    def __init__(
+        self,
+        *,
+        app_name: str,
+        client_id: str,
+        vendor_id: str,
+        vendor_name: str,
+        request_origin: str = "https://requestorigin.org",
+        redirect_fail_url: str = "https://failure",
+        redirect_success_url: str = "https://success",
+        language: str = "en",
+        cart: Optional[Dict[str, List[Dict[str, str]]]] = None,
+        currency: str = "TZS",
+    ):
+        """__init__ method
+
+        See ``Azampay.generate_payment_link`` for the arguments
+
+        Raises:
+            ValueError: When the vendor is missing or the currency is invalid
+        """
+        if not (vendor_id and vendor_name):
+            raise ValueError("Please provide vendor_id and vendor_name or provider")
+        check_currency(currency)
+        self.fields: Dict[str, Any] = {
+            "app_name": app_name,
+            "client_id": client_id,
+            "vendor_id": vendor_id,
+            "vendor_name": vendor_name,
+            "request_origin": request_origin,
+            "redirect_fail_url": redirect_fail_url,
+            "redirect_success_url": redirect_success_url,
+            "language": language,
+            "cart": cart,
+            "currency": currency,
+        }
+
+    def fill(self, *, amount: Any, external_id: str, **overrides: Any) -> PaymentLinkRequest:
+        """fill
+
+        Args:
+            amount (Any): The invoice amount
+            external_id (str): The invoice's id in the calling application
+            **overrides: Any other PaymentLinkRequest field, e.g. cart
+
+        Returns:
+            PaymentLinkRequest: The request for that invoice
+
+        Raises:
+            ValueError: When the amount or an override is invalid
+        """
+        fields = dict(self.fields, **overrides) if overrides else self.fields
+        return PaymentLinkRequest(amount=amount, external_id=external_id, **fields)
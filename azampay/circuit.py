@@ -0,0 +1,202 @@
+"""
+Circuit breakers and in-flight budgets per AzamPay endpoint
+"""
+
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+from azampay.azampay_exceptions import CircuitOpen, EndpointOverloaded
+
+CLOSED: str = "closed"
+OPEN: str = "open"
+HALF_OPEN: str = "half_open"
+
+
+class CircuitBreaker(object):
+    """
+    Fails fast while an endpoint is unhealthy and caps its concurrent requests
+
+    After ``failure_threshold`` consecutive failures the breaker opens and every
+    call is rejected with CircuitOpen. Once ``recovery_timeout`` has elapsed it
+    turns half-open and lets ``half_open_max_calls`` probes through: a successful
+    probe closes it, a failed one opens it again.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        max_in_flight: Optional[int] = None,
+    ):
+        """__init__ method
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the breaker. Defaults to 5.
+            recovery_timeout (float, optional): Seconds the breaker stays open before probing. Defaults to 30.
+            half_open_max_calls (int, optional): Concurrent probes allowed while half-open. Defaults to 1.
+            max_in_flight (int, optional): Requests allowed in flight at once, None for no cap. Defaults to None.
+        """
+        self.failure_threshold: int = failure_threshold
+        self.recovery_timeout: float = recovery_timeout
+        self.half_open_max_calls: int = half_open_max_calls
+        self.max_in_flight: Optional[int] = max_in_flight
+        self._state: str = CLOSED
+        self._failures: int = 0
+        self._opened_at: float = 0.0
+        self._in_flight: int = 0
+        self._probes: int = 0
+        self._lock = threading.Lock()
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def acquire(self) -> None:
+        """acquire
+
+        Reserves a slot for one request
+
+        Raises:
+            CircuitOpen: When the breaker is open, or half-open with all probes taken
+            EndpointOverloaded: When max_in_flight requests are already running
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == OPEN:
+                raise CircuitOpen
+            if state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpen
+                self._probes += 1
+            if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+                if state == HALF_OPEN:
+                    self._probes -= 1
+                raise EndpointOverloaded
+            self._in_flight += 1
+
+    def release(self, success: Optional[bool]) -> None:
+        """release
+
+        Frees the slot taken by acquire and records the outcome of the request
+
+        Args:
+            success (Optional[bool]): False for transport errors and 5xx responses, None when
+                the request ended without a response, e.g. interrupted or cancelled, which
+                neither closes nor opens the breaker
+        """
+        with self._lock:
+            self._in_flight -= 1
+            state = self._current_state(time.monotonic())
+            if success is None:
+                # hand the probe back, so the next call can probe instead
+                if state == HALF_OPEN and self._probes > 0:
+                    self._probes -= 1
+                return
+            if success:
+                self._failures = 0
+                if state == HALF_OPEN:
+                    self._state = CLOSED
+                return
+            self._failures += 1
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """snapshot
+
+        Returns:
+            Dict[str, Any]: state, consecutive failures and requests in flight
+        """
+        with self._lock:
+            return {
+                "state": self._current_state(time.monotonic()),
+                "failures": self._failures,
+                "in_flight": self._in_flight,
+            }
+
+
+class CircuitBreakerRegistry(object):
+    """
+    One CircuitBreaker per (host, endpoint), created on first use
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        max_in_flight: Optional[int] = None,
+        in_flight_limits: Optional[Dict[str, int]] = None,
+    ):
+        """__init__ method
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open a breaker. Defaults to 5.
+            recovery_timeout (float, optional): Seconds a breaker stays open before probing. Defaults to 30.
+            half_open_max_calls (int, optional): Concurrent probes allowed while half-open. Defaults to 1.
+            max_in_flight (int, optional): Default in-flight cap per endpoint. Defaults to None (no cap).
+            in_flight_limits (Dict[str, int], optional): In-flight caps per endpoint path,
+                e.g. {"/azampay/mno/checkout": 64}. Defaults to None.
+
+        Example:
+
+        >>> from azampay import Azampay, CircuitBreakerRegistry
+        >>> breakers = CircuitBreakerRegistry(failure_threshold=3, in_flight_limits={"/azampay/mno/checkout": 64})
+        >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', circuit_breakers=breakers)
+        """
+        self.failure_threshold: int = failure_threshold
+        self.recovery_timeout: float = recovery_timeout
+        self.half_open_max_calls: int = half_open_max_calls
+        self.max_in_flight: Optional[int] = max_in_flight
+        self.in_flight_limits: Dict[str, int] = dict(in_flight_limits or {})
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str, endpoint: str) -> CircuitBreaker:
+        """get
+
+        Args:
+            host (str): The host, e.g. "sandbox.azampay.co.tz"
+            endpoint (str): The endpoint path, e.g. "/azampay/mno/checkout"
+
+        Returns:
+            CircuitBreaker: The breaker guarding that endpoint
+        """
+        key = (host, endpoint)
+        breaker = self._breakers.get(key)
+        if breaker is not None:
+            return breaker
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    recovery_timeout=self.recovery_timeout,
+                    half_open_max_calls=self.half_open_max_calls,
+                    max_in_flight=self.in_flight_limits.get(
+                        endpoint, self.max_in_flight
+                    ),
+                )
+                self._breakers[key] = breaker
+        return breaker
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        """states
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Snapshot of every breaker keyed by "host/endpoint", for health checks
+        """
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {f"{host}{endpoint}": breaker.snapshot() for (host, endpoint), breaker in breakers}
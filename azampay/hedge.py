@@ -0,0 +1,305 @@
+"""
+Hedged requests: a second attempt, possibly on another host, when the first one is slow
+"""
+
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+from azampay.log import logger
+
+TOKEN_ENDPOINT: str = "/AppRegistration/GenerateToken"
+PARTNERS_ENDPOINT: str = "/api/v1/Partner/GetPaymentPartners"
+
+Attempt = Tuple[str, Callable[[], Any]]
+
+
+class LatencyTracker(object):
+    """
+    The latest ``window`` response times of every host
+    """
+
+    def __init__(self, window: int = 256):
+        """__init__ method
+
+        Args:
+            window (int, optional): Samples kept per host. Defaults to 256.
+        """
+        self.window: int = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, host: str, seconds: float) -> None:
+        samples = self._samples.get(host)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(host, deque(maxlen=self.window))
+        # deque.append is atomic, the lock only guards creating the deque
+        samples.append(seconds)
+
+    def count(self, host: str) -> int:
+        samples = self._samples.get(host)
+        return len(samples) if samples is not None else 0
+
+    def percentile(self, host: str, percentile: float) -> Optional[float]:
+        """percentile
+
+        Args:
+            host (str): The host, e.g. "authenticator.azampay.co.tz"
+            percentile (float): Between 0 and 100, e.g. 95
+
+        Returns:
+            Optional[float]: The percentile of the host's recent response times in seconds,
+                None when nothing was observed yet
+        """
+        samples = self._samples.get(host)
+        if not samples:
+            return None
+        ordered = sorted(list(samples))
+        index = min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class HedgePolicy(object):
+    """
+    Which calls are hedged, after how long and on which hosts
+
+    A hedged call starts its first attempt and, if it has not answered within the
+    host's recent ``percentile`` response time, starts another and takes
+    whichever answers first. Until ``min_samples`` responses of the host are
+    known ``default_delay`` is used. Later attempts go to the alternate base URLs
+    in turn, and back to the primary when there are none. An attempt that fails
+    (a transport error, an open circuit or a 5xx) starts the next one right away.
+    Only calls that are safe to repeat are hedged: by default GenerateToken and
+    GetPaymentPartners, which every checkout waits on.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95.0,
+        min_delay: float = 0.05,
+        max_delay: float = 2.0,
+        default_delay: float = 0.5,
+        min_samples: int = 20,
+        max_attempts: int = 2,
+        auth_base_urls: Iterable[str] = (),
+        base_urls: Iterable[str] = (),
+        endpoints: Iterable[str] = (TOKEN_ENDPOINT, PARTNERS_ENDPOINT),
+        window: int = 256,
+    ):
+        """__init__ method
+
+        Args:
+            percentile (float, optional): Percentile of the host's response times to wait before hedging. Defaults to 95.
+            min_delay (float, optional): Lower bound of the hedge delay in seconds. Defaults to 0.05.
+            max_delay (float, optional): Upper bound of the hedge delay in seconds. Defaults to 2.
+            default_delay (float, optional): Hedge delay while fewer than ``min_samples`` responses are known. Defaults to 0.5.
+            min_samples (int, optional): Responses of a host needed before its percentile is trusted. Defaults to 20.
+            max_attempts (int, optional): Attempts per call, the first one included. Defaults to 2.
+            auth_base_urls (Iterable[str], optional): Alternates of AUTH_BASE_URL, e.g. another region. Defaults to none.
+            base_urls (Iterable[str], optional): Alternates of BASE_URL. Defaults to none.
+            endpoints (Iterable[str], optional): Endpoint paths to hedge. Defaults to GenerateToken and GetPaymentPartners.
+            window (int, optional): Response times kept per host. Defaults to 256.
+
+        Example:
+
+        >>> from azampay import Azampay, HedgePolicy
+        >>> hedging = HedgePolicy(auth_base_urls=['https://authenticator-b.example.com'])
+        >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', hedging=hedging)
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.percentile: float = percentile
+        self.min_delay: float = min_delay
+        self.max_delay: float = max_delay
+        self.default_delay: float = default_delay
+        self.min_samples: int = min_samples
+        self.max_attempts: int = max_attempts
+        self.auth_base_urls: List[str] = [url.rstrip("/") for url in auth_base_urls]
+        self.base_urls: List[str] = [url.rstrip("/") for url in base_urls]
+        self.endpoints = frozenset(endpoints)
+        self.tracker: LatencyTracker = LatencyTracker(window)
+        self.hedged: int = 0
+        self.won: int = 0
+
+    def applies(self, endpoint: str) -> bool:
+        return endpoint in self.endpoints
+
+    def delay(self, host: str) -> float:
+        """delay
+
+        Args:
+            host (str): The host of the attempt in flight
+
+        Returns:
+            float: Seconds to wait for it before starting the next attempt
+        """
+        if self.tracker.count(host) < self.min_samples:
+            delay = self.default_delay
+        else:
+            delay = self.tracker.percentile(host, self.percentile)
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def urls(self, url: str, primary: str, alternates: Sequence[str]) -> List[str]:
+        """urls
+
+        Args:
+            url (str): The url of the call
+            primary (str): The base URL it starts with
+            alternates (Sequence[str]): The alternates of that base URL
+
+        Returns:
+            List[str]: The url of every attempt, ``max_attempts`` of them
+        """
+        bases = [primary] + list(alternates)
+        path = url[len(primary):]
+        return [bases[index % len(bases)] + path for index in range(self.max_attempts)]
+
+    @staticmethod
+    def _spawn(call: Callable[[], Any]) -> Any:
+        # a thread per attempt rather than a fixed pool: an attempt that lost keeps
+        # its thread until the transport's read timeout, and must not hold up new calls
+        from concurrent.futures import Future
+
+        future: Any = Future()
+
+        def target() -> None:
+            try:
+                future.set_result(call())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=target, name="azampay-hedge", daemon=True).start()
+        return future
+
+    def _fired(self, endpoint: str, host: str, waited: float) -> None:
+        self.hedged += 1
+        logger.debug(
+            "%s on %s took over %.3fs, hedging",
+            endpoint,
+            host,
+            waited,
+            extra={"endpoint": endpoint},
+        )
+
+    def run(
+        self,
+        endpoint: str,
+        attempts: Sequence[Attempt],
+        accept: Callable[[Any], bool],
+    ) -> Any:
+        """run
+
+        Runs ``(host, call)`` attempts on threads of their own, hedging as described above
+
+        Args:
+            endpoint (str): The endpoint path, for logging
+            attempts (Sequence[Attempt]): Host and zero-argument call of every attempt, in order
+            accept (Callable[[Any], bool]): Whether a result is final, e.g. not a 5xx
+
+        Returns:
+            Any: The first accepted result, else the last result
+
+        Raises:
+            Exception: The last error, when no attempt returned
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        queued = list(attempts)
+        started: Dict[Any, int] = {}
+        pending: set = set()
+        fallback: Any = None
+        error: Optional[BaseException] = None
+
+        def start() -> str:
+            host, call = queued.pop(0)
+            future = self._spawn(call)
+            started[future] = len(started)
+            pending.add(future)
+            return host
+
+        host = start()
+        while pending:
+            timeout = self.delay(host) if queued else None
+            done, pending = wait(pending, timeout, FIRST_COMPLETED)
+            if not done:
+                self._fired(endpoint, host, timeout)
+                host = start()
+                continue
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if accept(result):
+                    if started[future]:
+                        self.won += 1
+                    # the slower attempts finish in the background and are dropped
+                    return result
+                fallback = result
+            if queued:
+                host = start()
+        if fallback is not None:
+            return fallback
+        raise error
+
+    async def arun(
+        self,
+        endpoint: str,
+        attempts: Sequence[Tuple[str, Callable[[], Awaitable[Any]]]],
+        accept: Callable[[Any], bool],
+    ) -> Any:
+        """arun
+
+        Asyncio flavour of ``run``: attempts are coroutine functions run as tasks,
+        the ones still running when a result is accepted are cancelled
+        """
+        import asyncio
+
+        queued = list(attempts)
+        started: Dict[Any, int] = {}
+        pending: set = set()
+        fallback: Any = None
+        error: Optional[BaseException] = None
+
+        def start() -> str:
+            host, call = queued.pop(0)
+            task = asyncio.ensure_future(call())
+            started[task] = len(started)
+            pending.add(task)
+            return host
+
+        host = start()
+        try:
+            while pending:
+                timeout = self.delay(host) if queued else None
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self._fired(endpoint, host, timeout)
+                    host = start()
+                    continue
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if accept(result):
+                        if started[task]:
+                            self.won += 1
+                        return result
+                    fallback = result
+                if queued:
+                    host = start()
+        finally:
+            for task in pending:
+                task.cancel()
+        if fallback is not None:
+            return fallback
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hedged": self.hedged, "won": self.won}
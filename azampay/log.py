@@ -0,0 +1,72 @@
+"""
+Library logging: the "azampay" logger and an optional non-blocking queue handler
+"""
+
+import queue
+import logging
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from logging.handlers import QueueListener
+    from azampay.queue_logging import DroppingQueueHandler
+
+logger = logging.getLogger("azampay")
+# the library never configures logging itself, applications decide where records go
+logger.addHandler(logging.NullHandler())
+
+# the handler and listener installed by enable_queue_logging, if any
+_queue_logging: Optional[Tuple["DroppingQueueHandler", "QueueListener"]] = None
+
+
+def enable_queue_logging(
+    *handlers: logging.Handler,
+    level: int = logging.INFO,
+    queue_size: int = 10000,
+) -> "QueueListener":
+    """enable_queue_logging
+
+    Routes the "azampay" logger through a bounded in-memory queue drained by a
+    background thread, so emitting a record costs a queue put on the hot path;
+    messages are formatted on that thread, after the call that logged them.
+    Calling it again replaces the previous queue, handler and listener, after
+    flushing them, rather than adding another.
+
+    Args:
+        *handlers (logging.Handler): Where records end up. Defaults to a StreamHandler on stderr.
+        level (int, optional): Level of the "azampay" logger. Defaults to logging.INFO.
+        queue_size (int, optional): Records buffered before new ones are dropped. Defaults to 10000.
+
+    Returns:
+        QueueListener: The started listener, call ``stop()`` on shutdown to flush it
+
+    Example:
+
+    >>> import logging
+    >>> from azampay.log import enable_queue_logging
+    >>> listener = enable_queue_logging(logging.FileHandler("azampay.log"))
+    >>> ...
+    >>> listener.stop()
+    """
+    # imported here, logging.handlers pulls in socket and most applications never call this
+    from logging.handlers import QueueListener
+    from azampay.queue_logging import DroppingQueueHandler
+
+    global _queue_logging
+    if _queue_logging is not None:
+        previous_handler, previous_listener = _queue_logging
+        logger.removeHandler(previous_handler)
+        try:
+            previous_listener.stop()
+        except AttributeError:
+            # already stopped by the application, before 3.12 stop() is not idempotent
+            pass
+    log_queue: "queue.Queue" = queue.Queue(queue_size)
+    if not handlers:
+        handlers = (logging.StreamHandler(),)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    handler = DroppingQueueHandler(log_queue)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    listener.start()
+    _queue_logging = (handler, listener)
+    return listener
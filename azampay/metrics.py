@@ -0,0 +1,353 @@
+"""
+Metrics and tracing hooks for the checkout hot path
+"""
+
+import bisect
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Histograms, in seconds
+PHASE: str = "azampay.phase.duration"  # tags: phase=validation|carrier_lookup|partner_fetch|token_fetch
+HTTP_CONNECT: str = "azampay.http.connect"  # tags: endpoint (async client only, requests hides it)
+HTTP_TTFB: str = "azampay.http.ttfb"  # tags: endpoint
+HTTP_TOTAL: str = "azampay.http.total"  # tags: endpoint, status; includes retries
+RATE_LIMIT_WAIT: str = "azampay.ratelimit.wait"  # tags: endpoint; only when a request had to wait
+
+# Counters
+REQUESTS: str = "azampay.requests"  # tags: endpoint, status
+RETRIES: str = "azampay.retries"  # tags: endpoint
+CACHE: str = "azampay.cache"  # tags: cache=partners|token|payment_links, result=hit|miss
+
+Tags = Optional[Dict[str, Any]]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class _Timer(object):
+    __slots__ = ("hook", "name", "tags", "started")
+
+    def __init__(self, hook: "MetricsHook", name: str, tags: Tags):
+        self.hook = hook
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.hook.observe(self.name, time.perf_counter() - self.started, self.tags)
+
+
+class MetricsHook(object):
+    """
+    Receives timings and counts from the client, does nothing by default
+
+    Subclass it and override ``observe`` and ``increment`` to ship the numbers
+    anywhere; ``enabled`` is False only on this no-op base so the client can skip
+    the bookkeeping entirely when nobody is listening.
+    """
+
+    enabled: bool = False
+
+    def observe(self, name: str, value: float, tags: Tags = None) -> None:
+        """observe
+
+        Records one sample of a histogram
+
+        Args:
+            name (str): Metric name, e.g. azampay.metrics.HTTP_TOTAL
+            value (float): The sample, seconds for every built-in histogram
+            tags (Dict[str, Any], optional): Labels of the sample. Defaults to None.
+        """
+
+    def increment(self, name: str, value: int = 1, tags: Tags = None) -> None:
+        """increment
+
+        Adds to a counter
+
+        Args:
+            name (str): Metric name, e.g. azampay.metrics.REQUESTS
+            value (int, optional): Amount to add. Defaults to 1.
+            tags (Dict[str, Any], optional): Labels of the counter. Defaults to None.
+        """
+
+    def timer(self, name: str, tags: Tags = None) -> _Timer:
+        """timer
+
+        Context manager observing the wall time of its block under ``name``
+        """
+        return _Timer(self, name, tags)
+
+
+def timed_phase(phase: str) -> Callable[[Callable], Callable]:
+    """timed_phase
+
+    Decorates a client method so its duration is observed as PHASE with the given phase tag
+
+    Args:
+        phase (str): e.g. "validation"
+    """
+    tags = {"phase": phase}
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            if not self.metrics.enabled:
+                return method(self, *args, **kwargs)
+            with self.metrics.timer(PHASE, tags):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Histogram(object):
+    """
+    Fixed-bucket histogram keeping count, sum, min and max
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.min: float = float("inf")
+        self.max: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """percentile
+
+        Estimates a percentile as the upper bound of the bucket it falls in
+
+        Args:
+            q (float): The percentile, between 0 and 100
+
+        Returns:
+            float: The estimate, 0 when the histogram is empty
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class InMemoryMetrics(MetricsHook):
+    """
+    Collects histograms and counters in process, e.g. for tests, benchmarks or a debug endpoint
+
+    Example:
+
+    >>> from azampay import Azampay, InMemoryMetrics
+    >>> metrics = InMemoryMetrics()
+    >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', metrics=metrics)
+    >>> metrics.snapshot()["histograms"]["azampay.http.total{endpoint=/azampay/mno/checkout,status=200}"]["p95"]
+    """
+
+    enabled: bool = True
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, tags: Tags = None) -> str:
+        if not tags:
+            return name
+        labels = ",".join(f"{k}={tags[k]}" for k in sorted(tags))
+        return f"{name}{{{labels}}}"
+
+    def observe(self, name: str, value: float, tags: Tags = None) -> None:
+        key = self.key(name, tags)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.add(value)
+
+    def increment(self, name: str, value: int = 1, tags: Tags = None) -> None:
+        key = self.key(name, tags)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def hit_rate(self, cache: str) -> float:
+        """hit_rate
+
+        Args:
+            cache (str): "partners" or "token"
+
+        Returns:
+            float: Share of lookups served from the cache, 0 when there were none
+        """
+        hits = self.counters.get(self.key(CACHE, {"cache": cache, "result": "hit"}), 0)
+        misses = self.counters.get(
+            self.key(CACHE, {"cache": cache, "result": "miss"}), 0
+        )
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """snapshot
+
+        Returns:
+            Dict[str, Any]: {"histograms": {key: summary}, "counters": {key: value}}
+        """
+        with self._lock:
+            return {
+                "histograms": {
+                    key: histogram.summary()
+                    for key, histogram in self.histograms.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+def _metric_name(name: str) -> str:
+    return name.replace(".", "_")
+
+
+class PrometheusMetrics(MetricsHook):
+    """
+    Exports the metrics through ``prometheus_client`` (pip install prometheus-client)
+    """
+
+    enabled: bool = True
+
+    def __init__(self, registry: Any = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImportError(
+                "PrometheusMetrics needs prometheus_client, install it with: pip install prometheus-client"
+            )
+        self._prometheus = prometheus_client
+        self.registry = registry or prometheus_client.REGISTRY
+        self.buckets = buckets
+        self._metrics: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+        self._lock = threading.Lock()
+
+    def _metric(self, kind: str, name: str, labels: Tuple[str, ...]) -> Any:
+        key = (name, labels)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    if kind == "histogram":
+                        metric = self._prometheus.Histogram(
+                            _metric_name(name) + "_seconds",
+                            name,
+                            labels,
+                            registry=self.registry,
+                            buckets=self.buckets,
+                        )
+                    else:
+                        metric = self._prometheus.Counter(
+                            _metric_name(name), name, labels, registry=self.registry
+                        )
+                    self._metrics[key] = metric
+        return metric
+
+    def observe(self, name: str, value: float, tags: Tags = None) -> None:
+        tags = tags or {}
+        metric = self._metric("histogram", name, tuple(sorted(tags)))
+        if tags:
+            metric = metric.labels(**{k: str(v) for k, v in tags.items()})
+        metric.observe(value)
+
+    def increment(self, name: str, value: int = 1, tags: Tags = None) -> None:
+        tags = tags or {}
+        metric = self._metric("counter", name, tuple(sorted(tags)))
+        if tags:
+            metric = metric.labels(**{k: str(v) for k, v in tags.items()})
+        metric.inc(value)
+
+
+class OpenTelemetryMetrics(MetricsHook):
+    """
+    Exports the metrics through the OpenTelemetry metrics API (pip install opentelemetry-api)
+    """
+
+    enabled: bool = True
+
+    def __init__(self, meter: Any = None):
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError:
+                raise ImportError(
+                    "OpenTelemetryMetrics needs opentelemetry, install it with: pip install opentelemetry-api"
+                )
+            meter = metrics.get_meter("azampay")
+        self.meter = meter
+        self._instruments: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _instrument(self, kind: str, name: str) -> Any:
+        instrument = self._instruments.get(name)
+        if instrument is None:
+            with self._lock:
+                instrument = self._instruments.get(name)
+                if instrument is None:
+                    if kind == "histogram":
+                        instrument = self.meter.create_histogram(name, unit="s")
+                    else:
+                        instrument = self.meter.create_counter(name)
+                    self._instruments[name] = instrument
+        return instrument
+
+    def observe(self, name: str, value: float, tags: Tags = None) -> None:
+        self._instrument("histogram", name).record(value, attributes=tags or {})
+
+    def increment(self, name: str, value: int = 1, tags: Tags = None) -> None:
+        self._instrument("counter", name).add(value, attributes=tags or {})
@@ -0,0 +1,161 @@
+"""
+Typed views of AzamPay responses, parsing only the fields the SDK uses
+"""
+
+from typing import Any, Dict, Optional
+
+
+class TokenInfo(object):
+    """
+    A GenerateToken response
+
+    Example:
+
+    >>> from azampay.models import TokenInfo
+    >>> TokenInfo.from_response({"data": {"accessToken": "abc", "expire": "2023-03-26T12:30:24Z"}}).access_token
+    'abc'
+    """
+
+    __slots__ = ("access_token", "expire", "message", "raw")
+
+    def __init__(
+        self,
+        access_token: str,
+        expire: Optional[str] = None,
+        message: Optional[str] = None,
+        raw: Optional[Dict[str, Any]] = None,
+    ):
+        self.access_token: str = access_token
+        self.expire: Optional[str] = expire
+        self.message: Optional[str] = message
+        self.raw: Optional[Dict[str, Any]] = raw
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any]) -> "TokenInfo":
+        """from_response
+
+        Args:
+            response (Dict[str, Any]): The decoded GenerateToken response
+
+        Returns:
+            TokenInfo: The token and its expiry
+
+        Raises:
+            KeyError: When the response carries no access token
+        """
+        data = response["data"]
+        return cls(data["accessToken"], data.get("expire"), response.get("message"), response)
+
+    def __repr__(self) -> str:
+        # never print the token itself
+        return f"TokenInfo(expire={self.expire!r})"
+
+
+class Partner(object):
+    """
+    One entry of GetPaymentPartners
+
+    ``name`` is the normalized partner name the SDK matches providers against.
+    """
+
+    __slots__ = ("vendor_id", "partner_name", "name", "provider", "vendor_name", "currency", "raw")
+
+    def __init__(
+        self,
+        vendor_id: str,
+        partner_name: str,
+        provider: Optional[str] = None,
+        vendor_name: Optional[str] = None,
+        currency: Optional[str] = None,
+        raw: Optional[Dict[str, Any]] = None,
+    ):
+        self.vendor_id: str = vendor_id
+        self.partner_name: str = partner_name
+        self.name: str = partner_name.strip().capitalize()
+        self.provider: Optional[str] = provider
+        self.vendor_name: Optional[str] = vendor_name
+        self.currency: Optional[str] = currency
+        self.raw: Optional[Dict[str, Any]] = raw
+
+    @classmethod
+    def from_dict(cls, partner: Dict[str, Any]) -> "Partner":
+        """from_dict
+
+        Args:
+            partner (Dict[str, Any]): One item of the GetPaymentPartners response
+
+        Returns:
+            Partner: The partner
+
+        Raises:
+            KeyError: When paymentVendorId or partnerName is missing
+        """
+        return cls(
+            partner["paymentVendorId"],
+            partner["partnerName"],
+            partner.get("provider"),
+            partner.get("vendorName"),
+            partner.get("currency"),
+            partner,
+        )
+
+    def __repr__(self) -> str:
+        return f"Partner(vendor_id={self.vendor_id!r}, name={self.name!r})"
+
+
+class CheckoutResult(object):
+    """
+    A checkout response: whether AzamPay accepted it and the transaction id it assigned
+
+    Example:
+
+    >>> from azampay.models import CheckoutResult
+    >>> result = CheckoutResult.from_response(azampay.mobile_checkout(mobile='0687649154', amount=1000, external_id='1'))
+    >>> result.success, result.transaction_id
+    """
+
+    __slots__ = ("success", "transaction_id", "message", "raw")
+
+    def __init__(
+        self,
+        success: bool,
+        transaction_id: Optional[str] = None,
+        message: Optional[str] = None,
+        raw: Optional[Dict[str, Any]] = None,
+    ):
+        self.success: bool = success
+        self.transaction_id: Optional[str] = transaction_id
+        self.message: Optional[str] = message
+        self.raw: Optional[Dict[str, Any]] = raw
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any]) -> "CheckoutResult":
+        """from_response
+
+        Args:
+            response (Dict[str, Any]): The decoded checkout response
+
+        Returns:
+            CheckoutResult: The parsed result
+        """
+        return cls(
+            response.get("success") is True,
+            response.get("transactionId"),
+            response.get("message"),
+            response,
+        )
+
+    @property
+    def meta(self) -> Any:
+        """meta
+
+        Returns:
+            Optional[ResponseMeta]: Endpoint, status and retries of the call, when the raw response carries them
+        """
+        return getattr(self.raw, "meta", None)
+
+    def __repr__(self) -> str:
+        return (
+            f"CheckoutResult(success={self.success!r}, "
+            f"transaction_id={self.transaction_id!r}, message={self.message!r})"
+        )
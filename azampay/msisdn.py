@@ -0,0 +1,142 @@
+"""
+Offline MSISDN normalization and carrier resolution for Tanzanian numbers
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional
+
+# National significant number prefix -> carrier, as reported by
+# phonenumbers.carrier.name_for_number(..., "en") for Tanzanian mobiles.
+# tests/test_msisdn.py checks the prefixes the installed phonenumbers also knows against it.
+CARRIER_PREFIXES = {
+    "60": "Airtel",
+    "61": "Viettel",
+    "62": "Viettel",
+    "63": "Viettel",
+    "65": "Yas",
+    "66": "Airtel",
+    "67": "Yas",
+    "68": "Airtel",
+    "69": "Airtel",
+    "70": "Yas",
+    "71": "Yas",
+    "72": "Vodacom",
+    "73": "Tanzania Telecom",
+    "74": "Vodacom",
+    "75": "Vodacom",
+    "76": "Vodacom",
+    "77": "Yas",
+    "78": "Airtel",
+    "79": "Vodacom",
+}
+
+COUNTRY_CODE = "255"
+
+# characters phonenumbers would treat as punctuation; anything else (letters,
+# other prefixes) goes through phonenumbers itself so results never diverge
+_PLAIN_NUMBER = re.compile(r"^[+\d\s\-().]*$")
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+
+class Resolution(NamedTuple):
+    """
+    A resolved mobile number
+
+    ``msisdn`` is the number as clean_mobile_number formats it (None when it would
+    be rejected) and ``carrier`` the carrier name, empty when it is not a mobile.
+    """
+
+    msisdn: Optional[str]
+    carrier: str
+
+
+def normalize_msisdn(digits: str) -> Optional[str]:
+    """normalize_msisdn
+
+    Formats a digits-only number the way Azampay.clean_mobile_number does
+
+    Args:
+        digits (str): The number with every non-digit removed
+
+    Returns:
+        Optional[str]: The MSISDN or None when it has fewer than 9 or more than 12 digits
+    """
+    if len(digits) < 9 or len(digits) > 12:
+        return None
+    if len(digits) == 9:
+        return f"{COUNTRY_CODE}{digits}"
+    if len(digits) == 10:
+        return digits.replace("0", COUNTRY_CODE, 1)
+    return digits
+
+
+def _national_number(digits: str) -> Optional[str]:
+    if len(digits) == 9:
+        return digits
+    if len(digits) == 10 and digits[0] == "0":
+        return digits[1:]
+    if len(digits) == 12 and digits.startswith(COUNTRY_CODE):
+        return digits[3:]
+    return None
+
+
+def _phonenumbers_carrier(mobile: str) -> str:
+    import phonenumbers
+    from phonenumbers import carrier
+
+    return carrier.name_for_number(phonenumbers.parse(mobile, "TZ"), "en")
+
+
+class MsisdnResolver(object):
+    """
+    Normalizes a mobile number and finds its carrier in one pass
+
+    Tanzanian numbers are resolved from a precompiled prefix table, without loading
+    the phonenumbers metadata; repeat numbers are served from an LRU cache.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        """__init__ method
+
+        Args:
+            cache_size (int, optional): Number of resolutions kept in the LRU cache. Defaults to 4096.
+        """
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @staticmethod
+    def _resolve(mobile: str) -> Resolution:
+        digits = _NON_DIGITS.sub("", mobile)
+        msisdn = normalize_msisdn(digits)
+        national = _national_number(digits) if _PLAIN_NUMBER.match(mobile) else None
+        if national is None:
+            return Resolution(msisdn, _phonenumbers_carrier(mobile))
+        return Resolution(msisdn, CARRIER_PREFIXES.get(national[:2], ""))
+
+    def carrier(self, mobile: str) -> str:
+        """carrier
+
+        Args:
+            mobile (str): The mobile number, in any format
+
+        Returns:
+            str: The carrier name, empty when the number is not a mobile
+        """
+        return self.resolve(mobile).carrier
+
+    def resolve_many(self, mobiles: Iterable[str]) -> List[Resolution]:
+        """resolve_many
+
+        Resolves a whole column of numbers, e.g. from a batch file
+
+        Args:
+            mobiles (Iterable[str]): The mobile numbers
+
+        Returns:
+            List[Resolution]: One resolution per number, in order
+        """
+        resolve = self.resolve
+        return [resolve(mobile) for mobile in mobiles]
+
+
+resolver = MsisdnResolver()
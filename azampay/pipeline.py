@@ -0,0 +1,261 @@
+"""
+Two-stage batch pipeline: requests are built on a process pool and sent from a thread pool
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from azampay.batch import BatchResult, Job, run_batch
+from azampay.checkout import BankCheckoutRequest, CheckoutRequest, MobileCheckoutRequest
+from azampay.log import logger
+from azampay.runner import BANK_FIELDS, MOBILE_FIELDS
+
+_KINDS: Dict[str, Tuple[type, Tuple[str, ...], str]] = {
+    "mobile": (MobileCheckoutRequest, MOBILE_FIELDS, "external_id"),
+    "bank": (BankCheckoutRequest, BANK_FIELDS, "reference_id"),
+}
+
+Prepared = Tuple[str, Optional[CheckoutRequest], Optional[BaseException]]
+
+
+def _prepare_chunk(
+    kind: str, rows: List[Tuple[str, Dict[str, Any]]]
+) -> Tuple[List[Prepared], float]:
+    # runs in a worker process: the number and amount parsing, carrier lookup and
+    # JSON encoding all happen here, only the finished requests are pickled back
+    started = time.perf_counter()
+    build = _KINDS[kind][0]
+    prepared: List[Prepared] = []
+    for external_id, fields in rows:
+        try:
+            prepared.append((external_id, build(**fields), None))
+        except Exception as e:
+            prepared.append((external_id, None, e))
+    return prepared, time.perf_counter() - started
+
+
+class StageStats(object):
+    """
+    Items handled by one pipeline stage, its wall time and the time its workers were busy
+    """
+
+    __slots__ = ("name", "items", "busy", "started", "finished")
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.items: int = 0
+        self.busy: float = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """throughput
+
+        Returns:
+            float: Items per second of wall time
+        """
+        elapsed = self.elapsed
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def workers_busy(self) -> float:
+        """workers_busy
+
+        Returns:
+            float: Average number of workers at work, e.g. close to the process count when the stage is the bottleneck
+        """
+        elapsed = self.elapsed
+        return self.busy / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "items": self.items,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "workers_busy": self.workers_busy,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: {self.items} rows in {self.elapsed:.2f}s "
+            f"({self.throughput:,.1f} rows/s, {self.workers_busy:.1f} workers busy)"
+        )
+
+
+class CheckoutPipeline(object):
+    """
+    Runs large batches with request building spread over all cores
+
+    Rows are sent in chunks of ``chunk_size`` to a pool of ``processes`` worker
+    processes, which validate them, resolve carriers and serialize the JSON
+    bodies, away from the GIL. The prepared requests come back pickled over the
+    pool's pipes, carrying their finished body bytes. The I/O stage, on this
+    process, checks providers against the cached partners and submits them
+    ``max_concurrency`` at a time. At most two chunks per process are in flight, so
+    memory stays bounded whatever the input size. ``stages`` holds the throughput
+    of each stage.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        kind: str = "mobile",
+        processes: Optional[int] = None,
+        chunk_size: int = 500,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+    ):
+        """__init__ method
+
+        Args:
+            client (Azampay): The client to submit through
+            kind (str, optional): "mobile" or "bank" checkouts. Defaults to "mobile".
+            processes (int, optional): Worker processes building requests. Defaults to the number of CPUs.
+            chunk_size (int, optional): Rows sent to a worker at a time. Defaults to 500.
+            max_concurrency (int, optional): Checkouts in flight at once. Defaults to 8.
+            rate_limit (float, optional): Maximum checkouts started per second. Defaults to None.
+
+        Example:
+
+        >>> from azampay.pipeline import CheckoutPipeline
+        >>> from azampay.runner import read_rows
+        >>> pipeline = CheckoutPipeline(azampay, processes=4, max_concurrency=32)
+        >>> for result in pipeline.run(read_rows('payouts.csv')):
+        ...     print(result.external_id, result.ok)
+        >>> print(*pipeline.stages.values(), sep='\\n')
+        """
+        if kind not in _KINDS:
+            raise ValueError(f"kind must be 'mobile' or 'bank', got {kind!r}")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.client = client
+        self.kind: str = kind
+        self.processes: int = processes or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        self.max_concurrency: int = max_concurrency
+        self.rate_limit: Optional[float] = rate_limit
+        self.stages: Dict[str, StageStats] = {
+            "prepare": StageStats("prepare"),
+            "submit": StageStats("submit"),
+        }
+        self._lock = threading.Lock()
+
+    def _chunks(
+        self, rows: Iterable[Dict[str, Any]], reject: Callable[[BatchResult], None]
+    ) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+        _, fields, id_field = _KINDS[self.kind]
+        chunk: List[Tuple[str, Dict[str, Any]]] = []
+        for row in rows:
+            external_id = str(row.get(id_field) or "")
+            if not external_id:
+                reject(BatchResult(external_id, error=ValueError(f"Missing {id_field}")))
+                continue
+            chunk.append((external_id, {key: row[key] for key in fields if key in row}))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _jobs(
+        self,
+        prepared: List[Prepared],
+        busy: float,
+        reject: Callable[[BatchResult], None],
+        on_submit: Optional[Callable[[str], None]],
+    ) -> Iterator[Job]:
+        prepare = self.stages["prepare"]
+        prepare.items += len(prepared)
+        prepare.busy += busy
+        prepare.finished = time.monotonic()
+        supported = self.client.supported_mnos if self.kind == "mobile" else None
+        for external_id, request, error in prepared:
+            if request is not None and supported is not None:
+                try:
+                    self.client._check_provider(request, supported)
+                except ValueError as e:
+                    request, error = None, e
+            if request is None:
+                reject(BatchResult(external_id, error=error))
+                continue
+            if on_submit is not None:
+                on_submit(external_id)
+            yield external_id, partial(self._submit, request)
+
+    def _submit(self, request: CheckoutRequest) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return self.client._send_request(request)
+        finally:
+            busy = time.perf_counter() - started
+            with self._lock:
+                self.stages["submit"].busy += busy
+
+    def run(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        *,
+        on_rejected: Optional[Callable[[BatchResult], None]] = None,
+        on_submit: Optional[Callable[[str], None]] = None,
+    ) -> Iterator[BatchResult]:
+        """run
+
+        Builds and submits a checkout per row, yielding results as they complete
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): Keyword arguments of each checkout, e.g. from ``read_rows``
+            on_rejected (Callable[[BatchResult], None], optional): Receives the rows that failed
+                validation instead of them being yielded. Defaults to None.
+            on_submit (Callable[[str], None], optional): Called with the external id of every
+                checkout just before it is queued for sending, e.g. to journal it. Defaults to None.
+
+        Returns:
+            Iterator[BatchResult]: One result per row
+        """
+        from concurrent.futures import Future, ProcessPoolExecutor
+
+        for name in self.stages:
+            self.stages[name] = StageStats(name)
+        prepare, submit = self.stages["prepare"], self.stages["submit"]
+        rejected: Deque[BatchResult] = deque()
+        reject = on_rejected or rejected.append
+
+        def jobs() -> Iterator[Job]:
+            in_flight: Deque[Future] = deque()
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                prepare.started = time.monotonic()
+                for chunk in self._chunks(rows, reject):
+                    in_flight.append(pool.submit(_prepare_chunk, self.kind, chunk))
+                    # oldest first, so checkouts go out in input order
+                    if len(in_flight) >= 2 * self.processes:
+                        prepared, busy = in_flight.popleft().result()
+                        for job in self._jobs(prepared, busy, reject, on_submit):
+                            yield job
+                while in_flight:
+                    prepared, busy = in_flight.popleft().result()
+                    for job in self._jobs(prepared, busy, reject, on_submit):
+                        yield job
+
+        submit.started = time.monotonic()
+        for result in run_batch(
+            jobs(), max_concurrency=self.max_concurrency, rate_limit=self.rate_limit
+        ):
+            submit.items += 1
+            while rejected:
+                yield rejected.popleft()
+            yield result
+        submit.finished = time.monotonic()
+        while rejected:
+            yield rejected.popleft()
+        logger.info("Pipeline done: %s | %s", prepare, submit)
@@ -0,0 +1,204 @@
+"""
+Per-tenant Azampay clients sharing one connection pool
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional
+from azampay import Azampay
+from azampay.cache import PartnerCatalog
+from azampay.circuit import CircuitBreakerRegistry
+from azampay.log import logger
+from azampay.transport import HTTPTransport
+
+Credentials = Dict[str, Optional[str]]
+CredentialsLoader = Callable[[str], Optional[Credentials]]
+
+_CREDENTIALS = ("app_name", "client_id", "client_secret", "x_api_key")
+
+
+class AzampayPool(object):
+    """
+    Hands out one Azampay client per merchant app (tenant), built on first use
+
+    Every client sends through the same HTTPTransport, so keep-alive connections
+    to AzamPay are shared by all tenants. The clients also share the partner
+    catalog and the circuit breakers, which describe the gateway rather than a
+    merchant. Each client keeps its own access token, refreshed before it expires.
+    At most ``max_clients`` clients are kept. The least recently used one is
+    evicted beyond that and rebuilt, with a fresh token, when its tenant returns.
+    Only the credentials of registered tenants are held for every tenant, or
+    nothing at all when they come from a ``credentials`` loader.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_clients: int = 1000,
+        credentials: Optional[CredentialsLoader] = None,
+        sandbox: bool = True,
+        transport: Optional[HTTPTransport] = None,
+        partner_cache_ttl: float = 300.0,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        **client_options: Any,
+    ):
+        """__init__ method
+
+        Args:
+            max_clients (int, optional): Clients kept alive before the least recently used is evicted. Defaults to 1000.
+            credentials (CredentialsLoader, optional): Returns {"app_name", "client_id", "client_secret",
+                "x_api_key"} of a tenant id that was not registered, or None when it is unknown,
+                e.g. a database lookup. Defaults to None.
+            sandbox (bool, optional): Whether the tenants use the sandbox. Defaults to True.
+            transport (HTTPTransport, optional): Transport shared by every client. Defaults to a new HTTPTransport.
+            partner_cache_ttl (float, optional): Seconds the shared partners list is cached for. Defaults to 300.
+            circuit_breakers (CircuitBreakerRegistry, optional): Breakers shared by every client. Defaults to CircuitBreakerRegistry().
+            **client_options: Passed to every Azampay client, e.g. retry_policy, metrics or transactions
+
+        Example:
+
+        >>> from azampay.pool import AzampayPool
+        >>> pool = AzampayPool(max_clients=500, sandbox=False)
+        >>> pool.register('shop-1', app_name='shop', client_id='xxx', client_secret='xyz')
+        >>> pool.get('shop-1').mobile_checkout(mobile='0687649154', amount=1000, external_id='order-1')
+        """
+        if max_clients < 1:
+            raise ValueError("max_clients must be at least 1")
+        self.max_clients: int = max_clients
+        self.sandbox: bool = sandbox
+        self.client_options: Dict[str, Any] = client_options
+        self._loader: Optional[CredentialsLoader] = credentials
+        self._owns_transport: bool = transport is None
+        self.transport: HTTPTransport = transport or HTTPTransport()
+        self.partners: PartnerCatalog = PartnerCatalog(
+            ttl=partner_cache_ttl, metrics=client_options.get("metrics")
+        )
+        self.circuit_breakers: CircuitBreakerRegistry = (
+            circuit_breakers or CircuitBreakerRegistry()
+        )
+        self.evictions: int = 0
+        self._credentials: Dict[str, Credentials] = {}
+        self._clients: "OrderedDict[str, Azampay]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        tenant_id: str,
+        *,
+        app_name: str,
+        client_id: str,
+        client_secret: str,
+        x_api_key: Optional[str] = None,
+    ) -> None:
+        """register
+
+        Adds or replaces the credentials of a tenant; a client built with the old ones is dropped
+
+        Args:
+            tenant_id (str): Your id of the merchant app
+            app_name (str): The app name
+            client_id (str): The client id
+            client_secret (str): The client secret
+            x_api_key (str, optional): The API key. Defaults to None.
+        """
+        with self._lock:
+            self._credentials[tenant_id] = {
+                "app_name": app_name,
+                "client_id": client_id,
+                "client_secret": client_secret,
+                "x_api_key": x_api_key,
+            }
+            self._clients.pop(tenant_id, None)
+
+    def _lookup(self, tenant_id: str) -> Credentials:
+        credentials = self._credentials.get(tenant_id)
+        if credentials is None and self._loader is not None:
+            credentials = self._loader(tenant_id)
+        if not credentials:
+            raise KeyError(f"Unknown tenant {tenant_id!r}")
+        return {name: credentials.get(name) for name in _CREDENTIALS}
+
+    def _build(self, credentials: Credentials) -> Azampay:
+        return Azampay(
+            sandbox=self.sandbox,
+            transport=self.transport,
+            partner_catalog=self.partners,
+            circuit_breakers=self.circuit_breakers,
+            **credentials,
+            **self.client_options,
+        )
+
+    def get(self, tenant_id: str) -> Azampay:
+        """get
+
+        Returns the client of a tenant, building it on first use
+
+        Args:
+            tenant_id (str): The tenant id
+
+        Returns:
+            Azampay: The tenant's client
+
+        Raises:
+            KeyError: When the tenant is neither registered nor known to the credentials loader
+        """
+        with self._lock:
+            client = self._clients.get(tenant_id)
+            if client is not None:
+                self._clients.move_to_end(tenant_id)
+                return client
+        # the loader may hit a database, don't hold the lock meanwhile
+        credentials = self._lookup(tenant_id)
+        with self._lock:
+            client = self._clients.get(tenant_id)
+            if client is None:
+                client = self._build(credentials)
+                self._clients[tenant_id] = client
+                while len(self._clients) > self.max_clients:
+                    evicted, _ = self._clients.popitem(last=False)
+                    self.evictions += 1
+                    logger.debug("Evicted the idle client of %s", evicted)
+            else:
+                self._clients.move_to_end(tenant_id)
+        return client
+
+    def __getitem__(self, tenant_id: str) -> Azampay:
+        return self.get(tenant_id)
+
+    def __contains__(self, tenant_id: str) -> bool:
+        with self._lock:
+            return tenant_id in self._clients
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._clients))
+
+    def evict(self, tenant_id: str) -> None:
+        """evict
+
+        Drops the client of a tenant (and with it its token); it is rebuilt on next use
+
+        Args:
+            tenant_id (str): The tenant id
+        """
+        with self._lock:
+            self._clients.pop(tenant_id, None)
+
+    def close(self) -> None:
+        """close
+
+        Drops every client and releases the shared connections, unless the transport was supplied by the caller
+        """
+        with self._lock:
+            self._clients.clear()
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self) -> "AzampayPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,33 @@
+"""
+Queue handler behind enable_queue_logging, kept apart from azampay.log so that
+importing the package does not pull in logging.handlers
+"""
+
+import queue
+import logging
+from logging.handlers import QueueHandler
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller
+
+    When the queue is full the record is dropped and counted instead of waiting,
+    so a slow log sink can not stall checkouts. Records are queued as they are;
+    the listener runs in this process and its handlers format them there.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped: int = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler.prepare formats and copies the record for other processes,
+        # the listener is in this one so that work is left to its thread
+        return record
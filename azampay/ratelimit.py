@@ -0,0 +1,256 @@
+"""
+Client-side rate limiting
+"""
+
+import os
+import re
+import time
+import struct
+import threading
+from typing import Any, Dict, Optional
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``; callers
+    that find the bucket empty wait for the next token instead of failing, which
+    smooths bursts down to the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """__init__ method
+
+        Args:
+            rate (float): Tokens added per second, i.e. the sustained requests per second
+            capacity (float, optional): Largest burst allowed. Defaults to max(1, rate).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate: float = float(rate)
+        self.capacity: float = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens: float = self.capacity
+        self._updated: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """try_acquire
+
+        Takes ``tokens`` from the bucket if they are available
+
+        Args:
+            tokens (float, optional): Tokens to take. Defaults to 1.
+
+        Returns:
+            float: 0 when the tokens were taken, otherwise the seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """acquire
+
+        Blocks until ``tokens`` could be taken from the bucket
+
+        Args:
+            tokens (float, optional): Tokens to take. Defaults to 1.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        wait = self.try_acquire(tokens)
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            wait = self.try_acquire(tokens)
+        return waited
+
+    def close(self) -> None:
+        pass
+
+
+def _import_fcntl() -> Any:
+    try:
+        import fcntl
+    except ImportError:
+        raise ImportError("FileTokenBucket needs fcntl, which is only available on POSIX systems")
+    return fcntl
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket kept in a file, shared by every process on the host that opens it
+
+    The bucket state lives in ``path`` and is updated under an exclusive ``flock``,
+    so e.g. all gunicorn workers of a box draw from one budget. Every process must
+    be configured with the same rate and capacity. The file is opened on first use
+    in each process, so a bucket created before a fork still excludes the children
+    from each other (a flock is shared by every copy of a descriptor). POSIX only.
+    """
+
+    _STATE = struct.Struct("dd")
+
+    def __init__(self, path: str, rate: float, capacity: Optional[float] = None):
+        """__init__ method
+
+        Args:
+            path (str): The bucket file, created when missing
+            rate (float): Tokens added per second, i.e. the sustained requests per second of the whole host
+            capacity (float, optional): Largest burst allowed. Defaults to max(1, rate).
+        """
+        super().__init__(rate, capacity)
+        self._fcntl = _import_fcntl()
+        self.path: str = path
+        self._fd: int = -1
+        self._pid: Optional[int] = None
+
+    def _descriptor(self) -> int:
+        # called under self._lock
+        pid = os.getpid()
+        if self._pid != pid:
+            if self._fd >= 0:
+                # inherited from the parent: closing this copy leaves the parent's lock alone
+                os.close(self._fd)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = pid
+        return self._fd
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        # flock does not exclude threads sharing the descriptor, hence the thread lock too
+        with self._lock:
+            fd = self._descriptor()
+            self._fcntl.flock(fd, self._fcntl.LOCK_EX)
+            try:
+                state = os.pread(fd, self._STATE.size, 0)
+                # wall clock, the monotonic clock is not comparable between processes everywhere
+                now = time.time()
+                if len(state) == self._STATE.size:
+                    available, updated = self._STATE.unpack(state)
+                    available = min(
+                        self.capacity, available + max(0.0, now - updated) * self.rate
+                    )
+                else:
+                    available = self.capacity
+                wait = 0.0
+                if available >= tokens:
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / self.rate
+                os.pwrite(fd, self._STATE.pack(available, now), 0)
+                return wait
+            finally:
+                self._fcntl.flock(fd, self._fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+                self._pid = None
+
+
+class RateLimiter(object):
+    """
+    One token bucket per AzamPay endpoint, created on first use
+
+    The client takes a token before every attempt, retries included, and waits
+    for one when the bucket is empty, so bursts are smoothed rather than failed.
+    With ``shared_dir`` the buckets are FileTokenBuckets in that directory and the
+    limits hold for all processes on the host using it.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        *,
+        limits: Optional[Dict[str, float]] = None,
+        burst: Optional[float] = None,
+        shared_dir: Optional[str] = None,
+    ):
+        """__init__ method
+
+        Args:
+            rate (float, optional): Default requests per second of every endpoint. Defaults to None (unlimited).
+            limits (Dict[str, float], optional): Requests per second per endpoint path,
+                e.g. {"/azampay/mno/checkout": 50}. Defaults to None.
+            burst (float, optional): Bucket capacity, the burst allowed on top of the rate. Defaults to max(1, rate).
+            shared_dir (str, optional): Directory of the bucket files shared between processes. Defaults to None (per process).
+
+        Example:
+
+        >>> from azampay import Azampay, RateLimiter
+        >>> limiter = RateLimiter(limits={"/azampay/mno/checkout": 50}, shared_dir="/run/azampay")
+        >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', rate_limiter=limiter)
+        """
+        self.rate: Optional[float] = rate
+        self.limits: Dict[str, float] = dict(limits or {})
+        self.burst: Optional[float] = burst
+        self.shared_dir: Optional[str] = shared_dir
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _create(self, endpoint: str) -> Optional[TokenBucket]:
+        rate = self.limits.get(endpoint, self.rate)
+        if not rate:
+            return None
+        if self.shared_dir is None:
+            return TokenBucket(rate, self.burst)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", endpoint).strip("_") or "default"
+        return FileTokenBucket(
+            os.path.join(self.shared_dir, f"{name}.bucket"), rate, self.burst
+        )
+
+    def bucket(self, endpoint: str) -> Optional[TokenBucket]:
+        """bucket
+
+        Args:
+            endpoint (str): The endpoint path, e.g. "/azampay/mno/checkout"
+
+        Returns:
+            Optional[TokenBucket]: The bucket of the endpoint, None when it is not limited
+        """
+        try:
+            return self._buckets[endpoint]
+        except KeyError:
+            pass
+        with self._lock:
+            if endpoint not in self._buckets:
+                self._buckets[endpoint] = self._create(endpoint)
+            return self._buckets[endpoint]
+
+    def try_acquire(self, endpoint: str) -> float:
+        """try_acquire
+
+        Returns:
+            float: 0 when a token was taken, otherwise the seconds to wait before retrying
+        """
+        bucket = self.bucket(endpoint)
+        return 0.0 if bucket is None else bucket.try_acquire()
+
+    def acquire(self, endpoint: str) -> float:
+        """acquire
+
+        Blocks until a request to ``endpoint`` may be sent
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        bucket = self.bucket(endpoint)
+        return 0.0 if bucket is None else bucket.acquire()
+
+    def close(self) -> None:
+        with self._lock:
+            for bucket in self._buckets.values():
+                if bucket is not None:
+                    bucket.close()
+            self._buckets.clear()
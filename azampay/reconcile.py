@@ -0,0 +1,449 @@
+"""
+Reconciliation of checkouts whose callbacks never arrived, by polling their status
+"""
+
+import heapq
+import random
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from azampay.batch import run_batch
+from azampay.log import logger
+from azampay.ratelimit import TokenBucket
+from azampay.transactions import FAILURE, PENDING, SUCCESS, Transaction, TransactionRegistry
+
+SUCCESS_STATUSES = frozenset(
+    ("success", "successful", "succeeded", "completed", "complete", "settled")
+)
+FAILURE_STATUSES = frozenset(
+    ("failure", "failed", "fail", "cancelled", "canceled", "rejected", "declined", "expired", "reversed")
+)
+
+# a bare "status" is left alone: at the top level it describes the API call, not the payment
+_STATUS_KEYS: Tuple[str, ...] = ("transactionstatus", "transactionStatus")
+
+Handler = Callable[[Transaction], Any]
+
+
+def _normalize(status: str) -> str:
+    status = status.strip().lower()
+    if status in SUCCESS_STATUSES:
+        return SUCCESS
+    if status in FAILURE_STATUSES:
+        return FAILURE
+    return PENDING
+
+
+def parse_status(response: Any) -> str:
+    """parse_status
+
+    Maps a transaction status response to PENDING, SUCCESS or FAILURE
+
+    The status is read from ``transactionstatus`` or ``transactionStatus`` of the
+    response's ``data``, then of the response itself, or is ``data`` when that is a
+    string. Anything else, e.g. a reference AzamPay does not know yet or a response
+    with only a generic ``status``, is PENDING and polled again.
+
+    Args:
+        response (Any): The decoded transaction status response
+
+    Returns:
+        str: PENDING, SUCCESS or FAILURE
+
+    Example:
+
+    >>> from azampay.reconcile import parse_status
+    >>> parse_status({"data": {"transactionstatus": "Successful"}, "success": True})
+    'success'
+    """
+    if not isinstance(response, dict):
+        return PENDING
+    data = response.get("data")
+    if isinstance(data, str):
+        return _normalize(data)
+    for candidate in (data, response):
+        if isinstance(candidate, dict):
+            for key in _STATUS_KEYS:
+                value = candidate.get(key)
+                if isinstance(value, str):
+                    return _normalize(value)
+    return PENDING
+
+
+class _Pending(object):
+    __slots__ = ("external_id", "reference", "bank_name", "attempts", "due", "deadline")
+
+    def __init__(
+        self,
+        external_id: str,
+        reference: str,
+        bank_name: Optional[str],
+        due: float,
+        deadline: float,
+    ):
+        self.external_id: str = external_id
+        self.reference: str = reference
+        self.bank_name: Optional[str] = bank_name
+        self.attempts: int = 0
+        self.due: float = due
+        self.deadline: float = deadline
+
+
+class Reconciler(object):
+    """
+    Polls the status of pending checkouts until they reach a final state
+
+    Pending transactions sit in one heap ordered by their next poll, so hundreds
+    of thousands of them cost a heap entry each rather than a timer. Due
+    transactions are polled in batches of ``batch_size``, ``max_concurrency`` at a
+    time, and every poll takes a token from one bucket refilled at ``rate_limit``
+    per second, whatever the batch. A transaction still pending is polled again
+    after ``interval`` seconds, then after exponentially longer delays up to
+    ``max_delay``; failed polls back off the same way. Transactions completed by
+    their callback meanwhile are not polled at all.
+
+    ``handler`` is called once per transaction with its final state. Those given up
+    on after ``max_age`` seconds are handed over still PENDING.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        handler: Optional[Handler] = None,
+        registry: Optional[TransactionRegistry] = None,
+        watch: bool = True,
+        rate_limit: float = 10.0,
+        max_concurrency: int = 8,
+        batch_size: int = 100,
+        initial_delay: float = 60.0,
+        interval: float = 30.0,
+        backoff: float = 2.0,
+        max_delay: float = 1800.0,
+        jitter: bool = True,
+        max_age: float = 86400.0,
+        parser: Callable[[Any], str] = parse_status,
+    ):
+        """__init__ method
+
+        Args:
+            client (Azampay): Client the statuses are queried with
+            handler (Handler, optional): Called with every transaction reaching its final state. Defaults to None.
+            registry (TransactionRegistry, optional): Completed with polled statuses, waking up its waiters.
+                Defaults to the client's ``transactions``.
+            watch (bool, optional): Track every checkout the registry records. Defaults to True.
+            rate_limit (float, optional): Status requests per second, across all batches. Defaults to 10.
+            max_concurrency (int, optional): Status requests in flight at once. Defaults to 8.
+            batch_size (int, optional): Due transactions taken per round. Defaults to 100.
+            initial_delay (float, optional): Seconds between tracking a transaction and its first poll,
+                leaving its callback time to arrive. Defaults to 60.
+            interval (float, optional): Seconds before the second poll. Defaults to 30.
+            backoff (float, optional): Growth factor of the delay between polls. Defaults to 2.
+            max_delay (float, optional): Upper bound of the delay between polls. Defaults to 1800.
+            jitter (bool, optional): Randomize delays between half and all of their value,
+                so transactions tracked together don't stay in lockstep. Defaults to True.
+            max_age (float, optional): Seconds after which a transaction is given up on. Defaults to 86400.
+            parser (Callable[[Any], str], optional): Maps a status response to PENDING, SUCCESS or FAILURE.
+                Defaults to parse_status.
+
+        Example:
+
+        >>> from azampay import Azampay, TransactionRegistry
+        >>> from azampay.reconcile import Reconciler
+        >>> registry = TransactionRegistry()
+        >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', transactions=registry)
+        >>> reconciler = Reconciler(azampay, handler=lambda transaction: print(transaction.status))
+        >>> reconciler.start()
+        >>> azampay.mobile_checkout(mobile='0657649154', amount=1000, external_id='order-1')
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.client = client
+        self.handler: Optional[Handler] = handler
+        self.registry: Optional[TransactionRegistry] = (
+            registry if registry is not None else getattr(client, "transactions", None)
+        )
+        self.max_concurrency: int = max_concurrency
+        self.batch_size: int = batch_size
+        self.initial_delay: float = initial_delay
+        self.interval: float = interval
+        self.backoff: float = backoff
+        self.max_delay: float = max_delay
+        self.jitter: bool = jitter
+        self.max_age: float = max_age
+        self.parser: Callable[[Any], str] = parser
+        self.polls: int = 0
+        self.errors: int = 0
+        self.resolved: int = 0
+        self.expired: int = 0
+        self._bucket = TokenBucket(rate_limit)
+        self._entries: Dict[str, _Pending] = {}
+        # (due, sequence, external_id); entries rescheduled or untracked leave stale items behind
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence: int = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping: bool = False
+        if watch and self.registry is not None:
+            self.registry.on_submission(self.track_transaction)
+
+    def _push(self, entry: _Pending) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (entry.due, self._sequence, entry.external_id))
+
+    def track(
+        self,
+        external_id: str,
+        *,
+        reference: Optional[str] = None,
+        bank_name: Optional[str] = None,
+        delay: Optional[float] = None,
+    ) -> None:
+        """track
+
+        Schedules the status of a checkout to be polled until it is final; tracking it again restarts its schedule
+
+        Args:
+            external_id (str): The external id the checkout was submitted with
+            reference (str, optional): The reference to query, e.g. the transactionId of the checkout
+                response. Defaults to the external id.
+            bank_name (str, optional): The MNO or bank the checkout went through. Defaults to None.
+            delay (float, optional): Seconds before the first poll. Defaults to initial_delay.
+        """
+        now = time.monotonic()
+        entry = _Pending(
+            external_id,
+            reference or external_id,
+            bank_name,
+            now + (self.initial_delay if delay is None else delay),
+            now + self.max_age,
+        )
+        with self._condition:
+            self._entries[external_id] = entry
+            self._push(entry)
+            self._condition.notify_all()
+
+    def track_transaction(self, transaction: Transaction) -> None:
+        """track_transaction
+
+        Tracks a transaction recorded by a TransactionRegistry
+
+        Args:
+            transaction (Transaction): The submitted transaction
+        """
+        self.track(
+            transaction.external_id,
+            reference=transaction.transaction_id,
+            bank_name=transaction.provider,
+        )
+
+    def untrack(self, external_id: str) -> bool:
+        """untrack
+
+        Args:
+            external_id (str): The external id
+
+        Returns:
+            bool: Whether the transaction was tracked
+        """
+        with self._condition:
+            return self._entries.pop(external_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, external_id: str) -> bool:
+        return external_id in self._entries
+
+    def next_poll(self, external_id: str) -> Optional[float]:
+        """next_poll
+
+        Args:
+            external_id (str): The external id
+
+        Returns:
+            Optional[float]: Seconds until the transaction is polled, None when it is not tracked
+        """
+        entry = self._entries.get(external_id)
+        if entry is None:
+            return None
+        return max(0.0, entry.due - time.monotonic())
+
+    def _take_due(self, now: float) -> List[_Pending]:
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                when, _, external_id = heapq.heappop(self._heap)
+                entry = self._entries.get(external_id)
+                if entry is not None and entry.due == when:
+                    # in flight until its poll is handled
+                    entry.due = float("inf")
+                    due.append(entry)
+        return due
+
+    def _delay(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.interval * self.backoff ** (attempts - 1))
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
+    def _reschedule(self, entry: _Pending) -> None:
+        entry.attempts += 1
+        now = time.monotonic()
+        if now >= entry.deadline:
+            self.expired += 1
+            logger.warning(
+                "Gave up reconciling %s after %d polls",
+                entry.external_id,
+                entry.attempts,
+                extra={"external_id": entry.external_id},
+            )
+            transaction = (
+                self.registry.get(entry.external_id) if self.registry is not None else None
+            ) or Transaction(entry.external_id, provider=entry.bank_name)
+            self._finish(entry, transaction)
+            return
+        with self._condition:
+            if self._entries.get(entry.external_id) is entry:
+                entry.due = min(now + self._delay(entry.attempts), entry.deadline)
+                self._push(entry)
+
+    def _complete(self, entry: _Pending, status: str, response: Any) -> Transaction:
+        message = response.get("message") if isinstance(response, dict) else None
+        transaction_id = entry.reference if entry.reference != entry.external_id else None
+        if self.registry is not None:
+            return self.registry.complete(
+                entry.external_id,
+                status,
+                transaction_id=transaction_id,
+                message=message,
+                provider=entry.bank_name,
+            )
+        return Transaction(
+            entry.external_id,
+            transaction_id=transaction_id,
+            status=status,
+            provider=entry.bank_name,
+            message=message,
+        )
+
+    def _finish(self, entry: _Pending, transaction: Transaction) -> None:
+        with self._condition:
+            if self._entries.get(entry.external_id) is not entry:
+                # untracked or tracked again while it was polled
+                return
+            del self._entries[entry.external_id]
+        if transaction.done:
+            self.resolved += 1
+        if self.handler is not None:
+            try:
+                self.handler(transaction)
+            except Exception:
+                logger.exception("Reconciliation handler failed on %s", entry.external_id)
+
+    def run_once(self) -> int:
+        """run_once
+
+        Polls one batch of due transactions and waits for the answers
+
+        Returns:
+            int: Number of status requests made
+        """
+        due = self._take_due(time.monotonic())
+        polled: Dict[str, _Pending] = {}
+        for entry in due:
+            known = self.registry.get(entry.external_id) if self.registry is not None else None
+            if known is not None and known.done:
+                # its callback arrived meanwhile
+                self._finish(entry, known)
+            else:
+                polled[entry.external_id] = entry
+        jobs = (
+            (
+                external_id,
+                partial(self.client.transaction_status, entry.reference, bank_name=entry.bank_name),
+            )
+            for external_id, entry in polled.items()
+        )
+        for result in run_batch(jobs, max_concurrency=self.max_concurrency, rate_limit=self._bucket):
+            entry = polled[result.external_id]
+            self.polls += 1
+            if not result.ok:
+                self.errors += 1
+                logger.warning(
+                    "Polling the status of %s failed: %s",
+                    entry.external_id,
+                    result.error,
+                    extra={"external_id": entry.external_id},
+                )
+                self._reschedule(entry)
+                continue
+            status = self.parser(result.response)
+            if status == PENDING:
+                self._reschedule(entry)
+            else:
+                self._finish(entry, self._complete(entry, status, result.response))
+        return len(polled)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    wait = self._heap[0][0] - time.monotonic() if self._heap else None
+                    if wait is not None and wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                if self._stopping:
+                    return
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Reconciliation round failed")
+
+    def start(self) -> None:
+        """start
+
+        Starts polling on a daemon thread
+        """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="azampay-reconciler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """stop
+
+        Stops the polling thread after its current round; tracked transactions are kept
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread. Defaults to None (no limit).
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "Reconciler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._entries),
+            "polls": self.polls,
+            "errors": self.errors,
+            "resolved": self.resolved,
+            "expired": self.expired,
+        }
@@ -0,0 +1,36 @@
+"""
+Response wrappers carrying call metadata
+"""
+
+from typing import Optional
+
+
+class ResponseMeta(object):
+    """
+    What it took to get a response: endpoint, final status and replays made
+    """
+
+    __slots__ = ("endpoint", "status_code", "retries")
+
+    def __init__(
+        self, endpoint: str, status_code: Optional[int] = None, retries: int = 0
+    ):
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.retries = retries
+
+    def __repr__(self) -> str:
+        return (
+            f"ResponseMeta(endpoint={self.endpoint!r}, "
+            f"status_code={self.status_code!r}, retries={self.retries!r})"
+        )
+
+
+class APIResponse(dict):
+    """
+    The decoded JSON response, a plain dict with the call metadata on ``meta``
+    """
+
+    def __init__(self, data: dict, meta: ResponseMeta):
+        super().__init__(data)
+        self.meta: ResponseMeta = meta
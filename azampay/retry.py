@@ -0,0 +1,118 @@
+"""
+Retry policy with exponential backoff, jitter and Retry-After support
+"""
+
+import time
+import random
+from typing import Dict, Iterable, Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """parse_retry_after
+
+    Parses a Retry-After header, given either in seconds or as an HTTP date
+
+    Args:
+        value (str, optional): The header value
+
+    Returns:
+        Optional[float]: Seconds to wait, None when absent or unparsable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy(object):
+    """
+    Decides which failed calls are replayed and how long to wait in between
+
+    Only calls the client marks as idempotent are ever replayed: reads, token
+    requests and checkouts carrying an external_id/reference_id, which AzamPay
+    deduplicates, so a retry can never charge a customer twice.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        *,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: bool = True,
+        respect_retry_after: bool = True,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+        budgets: Optional[Dict[str, int]] = None,
+    ):
+        """__init__ method
+
+        Args:
+            max_retries (int, optional): Replays allowed per call. Defaults to 3.
+            backoff_factor (float, optional): Base delay, doubled on every attempt. Defaults to 0.5.
+            max_backoff (float, optional): Upper bound of a single delay in seconds. Defaults to 30.
+            jitter (bool, optional): Randomize delays ("full jitter") so clients don't retry in lockstep. Defaults to True.
+            respect_retry_after (bool, optional): Wait as long as the server's Retry-After header asks. Defaults to True.
+            retry_statuses (Iterable[int], optional): Status codes worth replaying. Defaults to 429, 500, 502, 503, 504.
+            budgets (Dict[str, int], optional): Per endpoint path overrides of max_retries,
+                e.g. {"/azampay/mno/checkout": 1}. Defaults to None.
+
+        Example:
+
+        >>> from azampay import Azampay, RetryPolicy
+        >>> policy = RetryPolicy(max_retries=5, budgets={"/azampay/bank/checkout": 1})
+        >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', retry_policy=policy)
+        """
+        self.max_retries: int = max_retries
+        self.backoff_factor: float = backoff_factor
+        self.max_backoff: float = max_backoff
+        self.jitter: bool = jitter
+        self.respect_retry_after: bool = respect_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.budgets: Dict[str, int] = dict(budgets or {})
+
+    def retries_for(self, endpoint: str) -> int:
+        """retries_for
+
+        Args:
+            endpoint (str): The endpoint path, e.g. "/azampay/mno/checkout"
+
+        Returns:
+            int: Replays allowed for a call to that endpoint
+        """
+        return self.budgets.get(endpoint, self.max_retries)
+
+    def is_retryable(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """backoff
+
+        Args:
+            attempt (int): Number of replays already made, starting at 0
+            retry_after (str, optional): Retry-After header of the failed response. Defaults to None.
+
+        Returns:
+            float: Seconds to wait before the next attempt
+        """
+        if self.respect_retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return min(delay, self.max_backoff)
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+NO_RETRY = RetryPolicy(max_retries=0)
@@ -0,0 +1,411 @@
+"""
+Streaming bulk checkout runner with a resumable checkpoint journal
+
+    python -m azampay run-batch payouts.csv --concurrency 16
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+from azampay.batch import BatchResult, Job, run_batch
+from azampay.log import logger
+
+MOBILE_FIELDS: Tuple[str, ...] = (
+    "mobile",
+    "amount",
+    "external_id",
+    "provider",
+    "currency",
+    "additional_properties",
+)
+BANK_FIELDS: Tuple[str, ...] = (
+    "merchant_account_number",
+    "merchant_mobile_number",
+    "amount",
+    "otp",
+    "provider",
+    "reference_id",
+    "currency",
+    "merchant_name",
+    "additional_properties",
+)
+
+SUBMITTED: str = "submitted"
+FAILED: str = "failed"
+REJECTED: str = "rejected"
+# journaled just before a checkout is sent, superseded by one of the above once it returns
+IN_FLIGHT: str = "in_flight"
+
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """read_rows
+
+    Streams the rows of a CSV or JSON Lines (.jsonl/.ndjson) file, one dict at a time
+
+    Empty CSV cells are dropped so the checkout defaults apply, and an
+    ``additional_properties`` cell holding a JSON object is decoded.
+
+    Args:
+        path (str): The batch file
+
+    Returns:
+        Iterator[Dict[str, Any]]: The rows, in file order
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        for row in csv.DictReader(f):
+            row = {key.strip(): value.strip() for key, value in row.items() if key and value}
+            extra = row.get("additional_properties")
+            if extra and extra.startswith("{"):
+                row["additional_properties"] = json.loads(extra)
+            yield row
+
+
+class Journal(object):
+    """
+    Append-only checkpoint of the rows of a batch, one JSON line each
+
+    Every checkout is journaled as in flight before it is sent and again once it
+    finishes. Rows journaled as submitted are skipped when the batch is run again;
+    failed and rejected rows are retried. Rows left in flight by a crash may or
+    may not have reached AzamPay, they are listed in ``in_flight`` for the runner
+    to look up. A line cut short by a crash is ignored, as is any line that is not
+    a JSON object.
+    """
+
+    def __init__(self, path: str, *, fsync: bool = False):
+        """__init__ method
+
+        Args:
+            path (str): The journal file, created when missing
+            fsync (bool, optional): Force every entry to disk, slower but survives power loss. Defaults to False.
+        """
+        self.path: str = path
+        self.fsync: bool = fsync
+        self.submitted: Set[str] = set()
+        self.in_flight: Set[str] = set()
+        line = ""
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(entry, dict) and entry.get("external_id"):
+                        self._apply(str(entry["external_id"]), entry.get("status"))
+        self._file: TextIO = open(path, "a", encoding="utf-8")
+        if line and not line.endswith("\n"):
+            # the last line was cut short, the next entry starts on a line of its own
+            self._file.write("\n")
+
+    def _apply(self, external_id: str, status: Any) -> None:
+        if status == IN_FLIGHT:
+            self.in_flight.add(external_id)
+            return
+        self.in_flight.discard(external_id)
+        if status == SUBMITTED:
+            self.submitted.add(external_id)
+
+    def __contains__(self, external_id: str) -> bool:
+        return external_id in self.submitted
+
+    def record(self, external_id: str, status: str, **fields: Any) -> None:
+        entry = {"external_id": external_id, "status": status, "at": time.time()}
+        entry.update(fields)
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._apply(external_id, status)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class Progress(object):
+    """
+    Running counts of a batch run and its throughput
+    """
+
+    __slots__ = ("submitted", "failed", "rejected", "skipped", "started")
+
+    def __init__(self):
+        self.submitted: int = 0
+        self.failed: int = 0
+        self.rejected: int = 0
+        self.skipped: int = 0
+        self.started: float = time.monotonic()
+
+    @property
+    def processed(self) -> int:
+        return self.submitted + self.failed + self.rejected
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        """rate
+
+        Returns:
+            float: Rows processed per second, skipped rows excluded
+        """
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.processed} rows: {self.submitted} submitted, {self.failed} failed, "
+            f"{self.rejected} rejected, {self.skipped} skipped | {self.rate:,.1f} rows/s"
+        )
+
+
+def run_batch_file(
+    client: Any,
+    path: str,
+    *,
+    kind: str = "mobile",
+    journal_path: Optional[str] = None,
+    results_path: Optional[str] = None,
+    max_concurrency: int = 8,
+    rate_limit: Optional[float] = None,
+    progress_interval: float = 5.0,
+    on_progress: Optional[Callable[[Progress], None]] = None,
+    processes: Optional[int] = None,
+) -> Progress:
+    """run_batch_file
+
+    Streams a CSV/JSONL file of checkouts through the client with bounded concurrency
+
+    Rows are read lazily and validated just before they are queued, so files of any
+    size run in constant memory. Every row is journaled by external id
+    (``reference_id`` for bank rows) as it is sent and once it finishes; running the
+    same file again skips the rows already submitted. Rows an interrupted run left
+    in flight are looked up with ``transaction_status`` and only sent again when
+    AzamPay does not know them. Each outcome is also appended to the results file as JSON.
+
+    Args:
+        client (Azampay): The client to submit through
+        path (str): The batch file
+        kind (str, optional): "mobile" or "bank" checkouts. Defaults to "mobile".
+        journal_path (str, optional): The checkpoint journal. Defaults to ``<path>.journal``.
+        results_path (str, optional): The results file. Defaults to ``<path>.results.jsonl``.
+        max_concurrency (int, optional): Checkouts in flight at once. Defaults to 8.
+        rate_limit (float, optional): Maximum checkouts started per second. Defaults to None.
+        progress_interval (float, optional): Seconds between ``on_progress`` calls. Defaults to 5.
+        on_progress (Callable[[Progress], None], optional): Receives the counts periodically and at the end. Defaults to None.
+        processes (int, optional): Build the requests on that many worker processes, see
+            ``azampay.pipeline.CheckoutPipeline``. Defaults to None (on this thread).
+
+    Returns:
+        Progress: The final counts
+
+    Example:
+
+    >>> from azampay.runner import run_batch_file
+    >>> progress = run_batch_file(azampay, 'payouts.csv', max_concurrency=16, on_progress=print)
+    """
+    if kind == "mobile":
+        fields, id_field, prepare = MOBILE_FIELDS, "external_id", client._prepare_mobile_checkout
+    elif kind == "bank":
+        fields, id_field, prepare = BANK_FIELDS, "reference_id", client._bank_checkout_request
+    else:
+        raise ValueError(f"kind must be 'mobile' or 'bank', got {kind!r}")
+    progress = Progress()
+    seen: Set[str] = set()
+    journal_path = journal_path or f"{path}.journal"
+    results_path = results_path or f"{path}.results.jsonl"
+    reported = [time.monotonic()]
+
+    with Journal(journal_path) as journal, open(
+        results_path, "a", encoding="utf-8"
+    ) as results:
+
+        def finish(entry: Dict[str, Any], journaled: bool = True) -> None:
+            # runs on this thread only: for rejected rows while jobs are pulled, else per result
+            if journaled:
+                journal.record(
+                    entry["external_id"],
+                    entry["status"],
+                    transaction_id=entry.get("transaction_id"),
+                )
+            results.write(json.dumps(entry) + "\n")
+            setattr(progress, entry["status"], getattr(progress, entry["status"]) + 1)
+            if on_progress is not None and time.monotonic() - reported[0] >= progress_interval:
+                reported[0] = time.monotonic()
+                results.flush()
+                on_progress(progress)
+
+        def recovered(external_id: str, row: Dict[str, Any]) -> bool:
+            # sent by an interrupted run: only what AzamPay has never seen is sent again
+            try:
+                response = client.transaction_status(external_id, bank_name=row.get("provider"))
+            except Exception as e:
+                # still unknown, stays in flight for the next run to look up
+                entry = {"external_id": external_id, "status": FAILED}
+                entry["error"] = f"Status lookup failed: {type(e).__name__}: {e}"
+                finish(entry, journaled=False)
+                return True
+            data = response.get("data")
+            if not data:
+                return False
+            finish(
+                {
+                    "external_id": external_id,
+                    "status": SUBMITTED,
+                    "transaction_id": data.get("transactionId") if isinstance(data, dict) else None,
+                    "message": response.get("message"),
+                }
+            )
+            return True
+
+        def candidates() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            for row in read_rows(path):
+                external_id = str(row.get(id_field) or "")
+                if external_id and external_id in journal:
+                    progress.skipped += 1
+                    continue
+                if external_id in journal.in_flight and external_id not in seen:
+                    seen.add(external_id)
+                    if recovered(external_id, row):
+                        continue
+                    yield external_id, {key: row[key] for key in fields if key in row}
+                    continue
+                if not external_id:
+                    error: Optional[Exception] = ValueError(f"Missing {id_field}")
+                elif external_id in seen:
+                    error = ValueError(f"Duplicate {id_field} {external_id}")
+                else:
+                    seen.add(external_id)
+                    yield external_id, {key: row[key] for key in fields if key in row}
+                    continue
+                finish(_result_entry(BatchResult(external_id, error=error), REJECTED))
+
+        def jobs() -> Iterator[Job]:
+            for external_id, row in candidates():
+                try:
+                    request = prepare(**row)
+                except Exception as e:
+                    finish(_result_entry(BatchResult(external_id, error=e), REJECTED))
+                    continue
+                journal.record(external_id, IN_FLIGHT)
+                yield external_id, partial(client._send_request, request)
+
+        if processes:
+            from azampay.pipeline import CheckoutPipeline
+
+            pipeline = CheckoutPipeline(
+                client,
+                kind=kind,
+                processes=processes,
+                max_concurrency=max_concurrency,
+                rate_limit=rate_limit,
+            )
+            outcomes = pipeline.run(
+                (row for _, row in candidates()),
+                on_rejected=lambda result: finish(_result_entry(result, REJECTED)),
+                on_submit=lambda external_id: journal.record(external_id, IN_FLIGHT),
+            )
+        else:
+            outcomes = run_batch(
+                jobs(), max_concurrency=max_concurrency, rate_limit=rate_limit
+            )
+        for result in outcomes:
+            finish(_result_entry(result, SUBMITTED if result.ok else FAILED))
+    if on_progress is not None:
+        on_progress(progress)
+    logger.info("Batch file %s done: %s", path, progress)
+    return progress
+
+
+def _result_entry(result: BatchResult, status: str) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"external_id": result.external_id, "status": status}
+    if result.ok:
+        response = result.response or {}
+        entry["transaction_id"] = response.get("transactionId")
+        entry["message"] = response.get("message")
+    else:
+        entry["error"] = f"{type(result.error).__name__}: {result.error}"
+    return entry
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m azampay",
+        description="AzamPay command line tools. Credentials are read from the "
+        "APP_NAME, CLIENT_ID, CLIENT_SECRET and X_API_KEY environment variables.",
+    )
+    commands = parser.add_subparsers(dest="command")
+    run = commands.add_parser("run-batch", help="submit every checkout of a CSV/JSONL file")
+    run.add_argument("file", help="CSV or JSON Lines (.jsonl/.ndjson) file, one checkout per row")
+    run.add_argument("--kind", choices=("mobile", "bank"), default="mobile")
+    run.add_argument("--journal", help="checkpoint journal (default: <file>.journal)")
+    run.add_argument("--results", help="results file (default: <file>.results.jsonl)")
+    run.add_argument("--concurrency", type=int, default=8, help="checkouts in flight at once")
+    run.add_argument("--rate-limit", type=float, help="maximum checkouts started per second")
+    run.add_argument("--processes", type=int, help="build requests on that many worker processes")
+    run.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress lines")
+    run.add_argument("--production", action="store_true", help="use the production API instead of the sandbox")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, client: Any = None) -> int:
+    """main
+
+    Entry point of ``python -m azampay``
+
+    Returns:
+        int: The exit status, 1 when any row failed or was rejected
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command != "run-batch":
+        parser.print_help()
+        return 2
+    if client is None:
+        missing = [name for name in ("APP_NAME", "CLIENT_ID", "CLIENT_SECRET") if not os.getenv(name)]
+        if missing:
+            parser.error(f"missing environment variables: {', '.join(missing)}")
+        from azampay import Azampay
+
+        client = Azampay(
+            app_name=os.environ["APP_NAME"],
+            client_id=os.environ["CLIENT_ID"],
+            client_secret=os.environ["CLIENT_SECRET"],
+            x_api_key=os.getenv("X_API_KEY"),
+            sandbox=not args.production,
+        )
+
+    def report(progress: Progress) -> None:
+        print(f"[azampay] {progress}", file=sys.stderr, flush=True)
+
+    progress = run_batch_file(
+        client,
+        args.file,
+        kind=args.kind,
+        journal_path=args.journal,
+        results_path=args.results,
+        max_concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        progress_interval=args.progress_interval,
+        on_progress=report,
+        processes=args.processes,
+    )
+    return 1 if progress.failed or progress.rejected else 0
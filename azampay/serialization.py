@@ -0,0 +1,159 @@
+"""
+JSON encoding and decoding, through orjson or ujson when they are installed
+"""
+
+import json
+import threading
+from typing import Any, Callable, Optional, Union
+
+BACKENDS = ("orjson", "ujson", "json")
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+class Serializer(object):
+    """
+    A JSON backend: ``dumps`` gives compact UTF-8 bytes, ``loads`` takes bytes or str
+
+    Objects a fast backend refuses (e.g. Decimal or non-string keys) are encoded
+    with the standard library instead, so switching backends never breaks a body
+    that used to serialize.
+    """
+
+    __slots__ = ("name", "_dumps", "loads")
+
+    def __init__(
+        self,
+        name: str,
+        dumps: Callable[[Any], bytes],
+        loads: Callable[[Union[bytes, str]], Any],
+    ):
+        """__init__ method
+
+        Args:
+            name (str): The backend name, e.g. "orjson"
+            dumps (Callable[[Any], bytes]): Encodes to compact UTF-8 JSON bytes
+            loads (Callable[[Union[bytes, str]], Any]): Decodes JSON, raising ValueError when it is invalid
+        """
+        self.name: str = name
+        self._dumps = dumps
+        self.loads = loads
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return self._dumps(obj)
+        except (TypeError, OverflowError):
+            if self._dumps is _json_dumps:
+                raise
+            return _json_dumps(obj)
+
+    def __repr__(self) -> str:
+        return f"Serializer({self.name!r})"
+
+
+def load_serializer(name: str) -> Serializer:
+    """load_serializer
+
+    Args:
+        name (str): "orjson", "ujson" or "json"
+
+    Returns:
+        Serializer: The backend
+
+    Raises:
+        ImportError: When the backend is not installed
+        ValueError: When the backend is unknown
+    """
+    if name == "orjson":
+        import orjson
+
+        return Serializer("orjson", orjson.dumps, orjson.loads)
+    if name == "ujson":
+        import ujson
+
+        def dumps(obj: Any) -> bytes:
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+
+        return Serializer("ujson", dumps, ujson.loads)
+    if name == "json":
+        return Serializer("json", _json_dumps, json.loads)
+    raise ValueError(f"{name} is not a supported JSON backend, use one of {BACKENDS}")
+
+
+_serializer: Optional[Serializer] = None
+_lock = threading.Lock()
+
+
+def get_serializer() -> Serializer:
+    """get_serializer
+
+    Returns the backend in use, picking the fastest one installed on first use
+
+    Returns:
+        Serializer: orjson, else ujson, else the standard library
+    """
+    global _serializer
+    if _serializer is None:
+        with _lock:
+            if _serializer is None:
+                for name in BACKENDS:
+                    try:
+                        _serializer = load_serializer(name)
+                        break
+                    except ImportError:
+                        continue
+    return _serializer
+
+
+def use(backend: Union[str, Serializer]) -> Serializer:
+    """use
+
+    Switches the JSON backend of the whole package
+
+    Args:
+        backend (Union[str, Serializer]): A backend name, or a custom Serializer
+
+    Returns:
+        Serializer: The backend now in use
+
+    Example:
+
+    >>> from azampay import serialization
+    >>> serialization.use("json")
+    Serializer('json')
+    """
+    global _serializer
+    if not isinstance(backend, Serializer):
+        backend = load_serializer(backend)
+    with _lock:
+        _serializer = backend
+    return backend
+
+
+def dumps(obj: Any) -> bytes:
+    """dumps
+
+    Args:
+        obj (Any): A JSON-serializable object
+
+    Returns:
+        bytes: Compact UTF-8 JSON
+    """
+    return get_serializer().dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """loads
+
+    Args:
+        data (Union[bytes, str]): A JSON document
+
+    Returns:
+        Any: The decoded object
+
+    Raises:
+        ValueError: When the document is not valid JSON
+    """
+    return get_serializer().loads(data)
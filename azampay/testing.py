@@ -0,0 +1,750 @@
+"""
+Offline AzamPay: a local mock of the endpoints the SDK uses, for tests and benchmarks
+"""
+
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+import urllib.request
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from azampay.log import logger
+
+TOKEN_PATH: str = "/AppRegistration/GenerateToken"
+PARTNERS_PATH: str = "/api/v1/Partner/GetPaymentPartners"
+MOBILE_PATH: str = "/azampay/mno/checkout"
+BANK_PATH: str = "/azampay/bank/checkout"
+PAYMENT_LINK_PATH: str = "/api/v1/Partner/PostCheckout"
+STATUS_PATH: str = "/azampay/gettransactionstatus"
+
+PARTNERS: List[Dict[str, str]] = [
+    {
+        "paymentVendorId": f"mock-{name.lower()}",
+        "partnerName": name,
+        "provider": name,
+        "vendorName": name,
+        "currency": "TZS",
+    }
+    for name in ("Airtel", "Tigo", "Halopesa", "Azampesa", "Mpesa")
+]
+
+MOBILE_FIELDS: Tuple[str, ...] = ("accountNumber", "amount", "externalId", "provider")
+BANK_FIELDS: Tuple[str, ...] = (
+    "amount",
+    "merchantAccountNumber",
+    "merchantMobileNumber",
+    "otp",
+    "provider",
+    "referenceId",
+)
+PAYMENT_LINK_FIELDS: Tuple[str, ...] = (
+    "amount",
+    "externalId",
+    "appName",
+    "clientId",
+    "vendorId",
+    "vendorName",
+)
+
+Latency = Union[float, Callable[[str], float]]
+MockResult = Tuple[int, Any, Dict[str, str]]
+
+
+class MockTimeout(Exception):
+    """
+    Raised by MockAzamPay.handle when a timeout was injected for the request
+    """
+
+
+class Fault(object):
+    """
+    One injected failure: an error status or a request that never gets answered
+    """
+
+    __slots__ = ("status", "timeout", "retry_after", "remaining")
+
+    def __init__(
+        self,
+        status: int = 500,
+        *,
+        timeout: bool = False,
+        retry_after: Optional[float] = None,
+        times: int = 1,
+    ):
+        self.status: int = status
+        self.timeout: bool = timeout
+        self.retry_after: Optional[float] = retry_after
+        self.remaining: int = times
+
+
+class MockAzamPay(object):
+    """
+    In-memory AzamPay: issues tokens, lists partners, accepts checkouts and emits callbacks
+
+    The state machine is transport agnostic; ``adapter()``, ``httpx_transport()``
+    and MockServer put it behind requests, httpx or a real socket. Checkouts are
+    idempotent on their externalId/referenceId like the real API, every request
+    is recorded in ``calls``, and ``fail()`` queues errors or timeouts for the
+    next requests to an endpoint.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: Latency = 0.0,
+        partners: Optional[List[Dict[str, Any]]] = None,
+        credentials: Optional[Dict[str, str]] = None,
+        token_lifetime: float = 3600.0,
+        callback: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        callback_url: Optional[str] = None,
+        callback_delay: float = 0.0,
+        callback_status: Union[str, Callable[[Dict[str, Any]], str]] = "success",
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        settle_after: float = 0.0,
+        hang: float = 30.0,
+        seed: Optional[int] = None,
+    ):
+        """__init__ method
+
+        Args:
+            latency (Union[float, Callable[[str], float]], optional): Seconds every request takes,
+                or a function of the endpoint path returning them. Defaults to 0.
+            partners (List[Dict[str, Any]], optional): GetPaymentPartners response. Defaults to the five MNOs.
+            credentials (Dict[str, str], optional): The only {"appName", "clientId", "clientSecret"}
+                accepted by GenerateToken, None to accept any. Defaults to None.
+            token_lifetime (float, optional): Seconds an issued token stays valid. Defaults to 3600.
+            callback (Callable[[Dict[str, Any]], Any], optional): Receives the callback payload of
+                every accepted checkout. Defaults to None.
+            callback_url (str, optional): Webhook the callback payloads are POSTed to. Defaults to None.
+            callback_delay (float, optional): Seconds between a checkout and its callback, 0 delivers
+                it before the checkout response. Defaults to 0.
+            callback_status (Union[str, Callable[[Dict[str, Any]], str]], optional): ``transactionstatus``
+                of the callbacks, or a function of the checkout body returning it. Defaults to "success".
+            error_rate (float, optional): Share of requests failing at random with ``error_status``. Defaults to 0.
+            error_status (int, optional): Status of the random failures. Defaults to 500.
+            settle_after (float, optional): Seconds after a checkout during which its status is
+                reported as pending. Defaults to 0.
+            hang (float, optional): Seconds MockServer keeps a timed out request open. Defaults to 30.
+            seed (int, optional): Seeds the random failures for reproducible runs. Defaults to None.
+
+        Example:
+
+        >>> from azampay.testing import MockAzamPay
+        >>> mock = MockAzamPay(latency=0.02)
+        >>> mock.fail("/azampay/mno/checkout", 500, times=2)
+        >>> azampay = mock.client()
+        """
+        self.latency: Latency = latency
+        self.partners: List[Dict[str, Any]] = list(PARTNERS if partners is None else partners)
+        self.credentials: Optional[Dict[str, str]] = credentials
+        self.token_lifetime: float = token_lifetime
+        self.callback: Optional[Callable[[Dict[str, Any]], Any]] = callback
+        self.callback_url: Optional[str] = callback_url
+        self.callback_delay: float = callback_delay
+        self.callback_status: Union[str, Callable[[Dict[str, Any]], str]] = callback_status
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+        self.settle_after: float = settle_after
+        self.hang: float = hang
+        self.calls: List[Tuple[str, str]] = []
+        self.callbacks: List[Dict[str, Any]] = []
+        self.tokens: Dict[str, float] = {}
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        # transaction id -> (final status, time it is reported from)
+        self.statuses: Dict[str, Tuple[str, float]] = {}
+        self._by_reference: Dict[str, str] = {}
+        self._faults: Dict[str, Deque[Fault]] = {}
+        self._timers: List[threading.Timer] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Callable[[Dict[str, str], Any], MockResult]] = {
+            ("POST", TOKEN_PATH): self._generate_token,
+            ("GET", PARTNERS_PATH): self._payment_partners,
+            ("POST", MOBILE_PATH): self._mobile_checkout,
+            ("POST", BANK_PATH): self._bank_checkout,
+            ("POST", PAYMENT_LINK_PATH): self._post_checkout,
+            ("GET", STATUS_PATH): self._transaction_status,
+        }
+
+    def fail(
+        self,
+        path: str,
+        status: int = 500,
+        *,
+        times: int = 1,
+        timeout: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """fail
+
+        Makes the next ``times`` requests to ``path`` fail
+
+        Args:
+            path (str): The endpoint path, e.g. "/azampay/mno/checkout"
+            status (int, optional): Status to answer with, e.g. 400, 404, 423 or 500. Defaults to 500.
+            times (int, optional): Number of requests affected. Defaults to 1.
+            timeout (bool, optional): Never answer instead, so the client times out. Defaults to False.
+            retry_after (float, optional): Retry-After header sent with the error. Defaults to None.
+        """
+        with self._lock:
+            self._faults.setdefault(path, deque()).append(
+                Fault(status, timeout=timeout, retry_after=retry_after, times=times)
+            )
+
+    def expire_tokens(self) -> None:
+        """expire_tokens
+
+        Revokes every issued token, so the next authenticated call is answered with 401
+        """
+        with self._lock:
+            self.tokens.clear()
+
+    def count(self, path: str) -> int:
+        """count
+
+        Args:
+            path (str): The endpoint path
+
+        Returns:
+            int: Requests received for that endpoint, failed ones included
+        """
+        with self._lock:
+            return sum(1 for _, called in self.calls if called == path)
+
+    def delay(self, path: str) -> float:
+        """delay
+
+        Args:
+            path (str): The endpoint path
+
+        Returns:
+            float: Seconds the transports wait before answering a request to that endpoint
+        """
+        if callable(self.latency):
+            return float(self.latency(path))
+        return float(self.latency)
+
+    def _next_fault(self, path: str) -> Optional[Fault]:
+        faults = self._faults.get(path)
+        if faults:
+            fault = faults[0]
+            fault.remaining -= 1
+            if fault.remaining <= 0:
+                faults.popleft()
+            return fault
+        if self.error_rate and self._random.random() < self.error_rate:
+            return Fault(self.error_status)
+        return None
+
+    def handle(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> MockResult:
+        """handle
+
+        Answers one request, without any latency
+
+        Args:
+            method (str): HTTP method
+            url (str): The requested url, only its path is used
+            headers (Dict[str, str]): Request headers
+            body (bytes, optional): Raw JSON body
+
+        Returns:
+            Tuple[int, Any, Dict[str, str]]: Status, JSON payload and response headers
+
+        Raises:
+            MockTimeout: When a timeout was injected for the endpoint
+        """
+        parts = urlsplit(url)
+        path = parts.path
+        with self._lock:
+            self.calls.append((method, path))
+            fault = self._next_fault(path)
+        if fault is not None:
+            if fault.timeout:
+                raise MockTimeout(f"{method} {path} timed out")
+            extra = {}
+            if fault.retry_after is not None:
+                extra["Retry-After"] = str(fault.retry_after)
+            return fault.status, {"message": "Injected failure", "success": False}, extra
+        route = self._routes.get((method, path))
+        if route is None:
+            return 404, {"message": f"{method} {path} not found", "success": False}, {}
+        headers = {key.lower(): value for key, value in headers.items()}
+        if path != TOKEN_PATH and not self._authorized(headers.get("authorization")):
+            return 401, {"message": "Unauthorized", "success": False}, {}
+        if method == "GET":
+            return route(headers, dict(parse_qsl(parts.query)))
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            return 400, {"message": "Malformed JSON body", "success": False}, {}
+        return route(headers, payload)
+
+    def _authorized(self, authorization: Optional[str]) -> bool:
+        if not authorization or not authorization.startswith("Bearer "):
+            return False
+        with self._lock:
+            expires_at = self.tokens.get(authorization[len("Bearer "):])
+        return expires_at is not None and time.time() < expires_at
+
+    @staticmethod
+    def _missing(payload: Any, fields: Tuple[str, ...]) -> Optional[MockResult]:
+        if not isinstance(payload, dict):
+            return 400, {"message": "The body must be a JSON object", "success": False}, {}
+        for field in fields:
+            if payload.get(field) in (None, ""):
+                return 400, {"message": f"{field} is required", "success": False}, {}
+        return None
+
+    def _generate_token(self, headers: Dict[str, str], payload: Any) -> MockResult:
+        error = self._missing(payload, ("appName", "clientId", "clientSecret"))
+        if error is not None:
+            return error
+        if self.credentials is not None and any(
+            payload.get(key) != value for key, value in self.credentials.items()
+        ):
+            return 423, {"message": "Invalid client credentials", "success": False}, {}
+        token = uuid.uuid4().hex
+        expires_at = time.time() + self.token_lifetime
+        with self._lock:
+            self.tokens[token] = expires_at
+        expire = datetime.fromtimestamp(expires_at, timezone.utc)
+        return 200, {
+            "data": {
+                "accessToken": token,
+                "expire": expire.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            },
+            "message": "Token generated successfully",
+            "success": True,
+            "statusCode": 200,
+        }, {}
+
+    def _payment_partners(self, headers: Dict[str, str], payload: Any) -> MockResult:
+        return 200, self.partners, {}
+
+    def _checkout(
+        self, payload: Dict[str, Any], reference: str, msisdn: str
+    ) -> MockResult:
+        with self._lock:
+            transaction_id = self._by_reference.get(reference)
+            replayed = transaction_id is not None
+            if not replayed:
+                transaction_id = uuid.uuid4().hex
+                self._by_reference[reference] = transaction_id
+                self.transactions[transaction_id] = dict(payload)
+        if not replayed:
+            status = self.callback_status
+            if callable(status):
+                status = status(payload)
+            with self._lock:
+                self.statuses[transaction_id] = (status, time.time() + self.settle_after)
+            self._emit(payload, transaction_id, reference, msisdn, status)
+        return 200, {
+            "success": True,
+            "transactionId": transaction_id,
+            "message": "Your request has been received and is being processed.",
+        }, {}
+
+    def _mobile_checkout(self, headers: Dict[str, str], payload: Any) -> MockResult:
+        error = self._missing(payload, MOBILE_FIELDS)
+        if error is not None:
+            return error
+        return self._checkout(payload, payload["externalId"], payload["accountNumber"])
+
+    def _bank_checkout(self, headers: Dict[str, str], payload: Any) -> MockResult:
+        error = self._missing(payload, BANK_FIELDS)
+        if error is not None:
+            return error
+        return self._checkout(
+            payload, payload["referenceId"], payload["merchantMobileNumber"]
+        )
+
+    def _post_checkout(self, headers: Dict[str, str], payload: Any) -> MockResult:
+        error = self._missing(payload, PAYMENT_LINK_FIELDS)
+        if error is not None:
+            return error
+        return 200, {
+            "status": 200,
+            "data": f"https://checkout.mock.azampay/{payload['vendorId']}/{payload['externalId']}",
+        }, {}
+
+    def _transaction_status(self, headers: Dict[str, str], query: Dict[str, str]) -> MockResult:
+        reference = query.get("reference")
+        if not reference:
+            return 400, {"message": "reference is required", "success": False}, {}
+        with self._lock:
+            transaction_id = (
+                reference if reference in self.statuses else self._by_reference.get(reference)
+            )
+            status, settles_at = self.statuses.get(transaction_id, (None, 0.0))
+        if status is None:
+            return 200, {"data": None, "message": "Transaction not found", "success": False}, {}
+        if time.time() < settles_at:
+            status = "pending"
+        return 200, {
+            "data": {
+                "transactionId": transaction_id,
+                "reference": self.transactions[transaction_id].get("externalId")
+                or self.transactions[transaction_id].get("referenceId"),
+                "transactionstatus": status,
+            },
+            "message": f"Transaction is {status}",
+            "success": True,
+        }, {}
+
+    def _emit(
+        self,
+        payload: Dict[str, Any],
+        transaction_id: str,
+        reference: str,
+        msisdn: str,
+        status: str,
+    ) -> None:
+        event = {
+            "msisdn": msisdn,
+            "amount": str(payload.get("amount")),
+            "message": "Transaction successful" if status == "success" else "Transaction failed",
+            "utilityref": reference,
+            "operator": payload.get("provider"),
+            "reference": transaction_id,
+            "transactionstatus": status,
+            "submerchantAcc": payload.get("merchantAccountNumber"),
+            "fspReferenceId": f"fsp-{transaction_id[:12]}",
+            "additionalProperties": payload.get("additionalProperties"),
+        }
+        with self._lock:
+            self.callbacks.append(event)
+        if self.callback is None and self.callback_url is None:
+            return
+        if self.callback_delay <= 0:
+            self._deliver(event)
+            return
+        timer = threading.Timer(self.callback_delay, self._deliver, (event,))
+        timer.daemon = True
+        with self._lock:
+            self._timers = [pending for pending in self._timers if pending.is_alive()]
+            self._timers.append(timer)
+        timer.start()
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        try:
+            if self.callback is not None:
+                self.callback(event)
+            if self.callback_url is not None:
+                request = urllib.request.Request(
+                    self.callback_url,
+                    data=json.dumps(event).encode(),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    response.read()
+        except Exception as e:
+            logger.warning(
+                "Delivering the mock callback for %s failed: %s",
+                event["utilityref"],
+                e,
+            )
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """join
+
+        Waits until every delayed callback has been delivered
+
+        Args:
+            timeout (float, optional): Seconds to wait per pending callback. Defaults to None.
+        """
+        with self._lock:
+            timers = list(self._timers)
+        for timer in timers:
+            timer.join(timeout)
+
+    def close(self) -> None:
+        """close
+
+        Cancels the delayed callbacks that have not been delivered yet
+        """
+        with self._lock:
+            timers, self._timers = self._timers, []
+        for timer in timers:
+            timer.cancel()
+
+    def adapter(self) -> "MockAdapter":
+        """adapter
+
+        Returns:
+            MockAdapter: A requests adapter answering from this mock, for HTTPTransport(adapter=...)
+        """
+        return MockAdapter(self)
+
+    def httpx_transport(self) -> Any:
+        """httpx_transport
+
+        Returns:
+            httpx.MockTransport: An httpx transport answering from this mock, for AsyncHTTPTransport(transport=...)
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError(
+                "httpx_transport needs httpx, install it with: pip install azampay[async]"
+            )
+
+        async def handler(request: Any) -> Any:
+            path = request.url.path
+            delay = self.delay(path)
+            read_timeout = request.extensions.get("timeout", {}).get("read")
+            if read_timeout is not None and delay > read_timeout:
+                await asyncio.sleep(read_timeout)
+                raise httpx.ReadTimeout(f"{path} took longer than {read_timeout}s", request=request)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                status, payload, headers = self.handle(
+                    request.method, str(request.url), dict(request.headers), request.content
+                )
+            except MockTimeout as e:
+                if read_timeout:
+                    await asyncio.sleep(read_timeout)
+                raise httpx.ReadTimeout(str(e), request=request)
+            return httpx.Response(status, json=payload, headers=headers)
+
+        return httpx.MockTransport(handler)
+
+    def client(self, **kwargs: Any) -> Any:
+        """client
+
+        Builds an Azampay client wired to this mock without any socket
+
+        Args:
+            **kwargs: Azampay arguments; the credentials default to the mock's own
+
+        Returns:
+            Azampay: The client
+        """
+        from azampay import Azampay
+        from azampay.transport import HTTPTransport
+
+        kwargs.setdefault("transport", HTTPTransport(adapter=self.adapter()))
+        return Azampay(**self._client_options(kwargs))
+
+    def async_client(self, **kwargs: Any) -> Any:
+        """async_client
+
+        Builds an AsyncAzampay client wired to this mock without any socket
+
+        Args:
+            **kwargs: AsyncAzampay arguments; the credentials default to the mock's own
+
+        Returns:
+            AsyncAzampay: The client
+        """
+        from azampay.aio import AsyncAzampay, AsyncHTTPTransport
+
+        kwargs.setdefault("transport", AsyncHTTPTransport(transport=self.httpx_transport()))
+        return AsyncAzampay(**self._client_options(kwargs))
+
+    def _client_options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        credentials = self.credentials or {}
+        kwargs.setdefault("app_name", credentials.get("appName", "mock-app"))
+        kwargs.setdefault("client_id", credentials.get("clientId", "mock-client"))
+        kwargs.setdefault("client_secret", credentials.get("clientSecret", "mock-secret"))
+        kwargs.setdefault("x_api_key", "mock-key")
+        return kwargs
+
+
+class MockAdapter(BaseAdapter):
+    """
+    requests adapter answering from a MockAzamPay in-process
+
+    Latency is slept in the calling thread; a latency above the read timeout, or
+    an injected timeout, raises requests.ReadTimeout like a stalled server would.
+    """
+
+    def __init__(self, mock: MockAzamPay):
+        super().__init__()
+        self.mock: MockAzamPay = mock
+
+    @staticmethod
+    def _read_timeout(timeout: Any) -> Optional[float]:
+        if isinstance(timeout, tuple):
+            return timeout[1]
+        return timeout
+
+    def send(self, request: Any, timeout: Any = None, **kwargs: Any) -> requests.Response:
+        path = urlsplit(request.url).path
+        delay = self.mock.delay(path)
+        read_timeout = self._read_timeout(timeout)
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(
+                f"{path} took longer than {read_timeout}s", request=request
+            )
+        if delay > 0:
+            time.sleep(delay)
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode()
+        try:
+            status, payload, headers = self.mock.handle(
+                request.method, request.url, dict(request.headers), body
+            )
+        except MockTimeout as e:
+            if read_timeout:
+                time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(str(e), request=request)
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.headers.update(headers)
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class MockServer(object):
+    """
+    Serves a MockAzamPay over real HTTP on a background ThreadingHTTPServer
+
+    Useful to exercise connection pooling, timeouts and throughput end to end, or
+    to point other processes (e.g. ``python -m azampay run-batch``) at the mock.
+    """
+
+    def __init__(
+        self, mock: Optional[MockAzamPay] = None, *, host: str = "127.0.0.1", port: int = 0
+    ):
+        """__init__ method
+
+        Args:
+            mock (MockAzamPay, optional): The mock to serve. Defaults to a new MockAzamPay().
+            host (str, optional): Interface to bind. Defaults to "127.0.0.1".
+            port (int, optional): Port to bind, 0 picks a free one. Defaults to 0.
+
+        Example:
+
+        >>> from azampay.testing import MockAzamPay, MockServer
+        >>> with MockServer(MockAzamPay(latency=0.01)) as server:
+        ...     azampay = server.client()
+        ...     azampay.mobile_checkout(mobile="0687649154", amount=1000, external_id="order-1")
+        """
+        self.mock: MockAzamPay = mock if mock is not None else MockAzamPay()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """url
+
+        Returns:
+            str: Base url of the server, e.g. "http://127.0.0.1:50123"
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self) -> type:
+        mock = self.mock
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in separate writes, don't stall on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def _answer(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else None
+                delay = mock.delay(urlsplit(self.path).path)
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    status, payload, headers = mock.handle(
+                        self.command, self.path, dict(self.headers), body
+                    )
+                except MockTimeout:
+                    time.sleep(mock.hang)
+                    self.close_connection = True
+                    return
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = _answer
+            do_POST = _answer
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug("mock server: " + format, *args)
+
+        return Handler
+
+    def start(self) -> "MockServer":
+        """start
+
+        Starts serving in a daemon thread
+
+        Returns:
+            MockServer: self
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="azampay-mock", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """stop
+
+        Stops serving and cancels pending callbacks
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.mock.close()
+
+    def client(self, **kwargs: Any) -> Any:
+        """client
+
+        Builds an Azampay client talking to this server over HTTP
+
+        Args:
+            **kwargs: Azampay arguments; the credentials default to the mock's own
+
+        Returns:
+            Azampay: The client
+        """
+        from azampay import Azampay
+
+        client = Azampay(**self.mock._client_options(kwargs))
+        client.AUTH_BASE_URL = self.url
+        client.BASE_URL = self.url
+        return client
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,463 @@
+"""
+Transaction registry correlating submitted checkouts with their callbacks
+"""
+
+import abc
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from azampay.log import logger
+
+PENDING: str = "pending"
+SUCCESS: str = "success"
+FAILURE: str = "failure"
+
+
+class Transaction(object):
+    """
+    What is known about one checkout, keyed by the caller's external id
+
+    ``status`` stays PENDING until the callback arrives, then takes the callback's
+    ``transactionstatus`` (lowercased), e.g. SUCCESS or FAILURE.
+    """
+
+    __slots__ = (
+        "external_id",
+        "transaction_id",
+        "status",
+        "amount",
+        "provider",
+        "account",
+        "message",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(
+        self,
+        external_id: str,
+        *,
+        transaction_id: Optional[str] = None,
+        status: str = PENDING,
+        amount: Optional[str] = None,
+        provider: Optional[str] = None,
+        account: Optional[str] = None,
+        message: Optional[str] = None,
+        created_at: Optional[float] = None,
+        updated_at: Optional[float] = None,
+    ):
+        now = time.time()
+        self.external_id: str = external_id
+        self.transaction_id: Optional[str] = transaction_id
+        self.status: str = status
+        self.amount: Optional[str] = amount
+        self.provider: Optional[str] = provider
+        self.account: Optional[str] = account
+        self.message: Optional[str] = message
+        self.created_at: float = created_at or now
+        self.updated_at: float = updated_at or now
+
+    @property
+    def done(self) -> bool:
+        return self.status != PENDING
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == SUCCESS
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (
+            f"Transaction(external_id={self.external_id!r}, "
+            f"transaction_id={self.transaction_id!r}, status={self.status!r})"
+        )
+
+
+class TransactionStore(abc.ABC):
+    """
+    Storage backend of a TransactionRegistry
+
+    Subclass it to keep transactions elsewhere, e.g. in the application's database.
+    The registry serializes writes, so backends only need to be safe for concurrent reads.
+    """
+
+    @abc.abstractmethod
+    def get(self, external_id: str) -> Optional[Transaction]:
+        """get
+
+        Args:
+            external_id (str): The external id the checkout was submitted with
+
+        Returns:
+            Optional[Transaction]: The transaction or None when it is unknown
+        """
+
+    @abc.abstractmethod
+    def find(self, transaction_id: str) -> Optional[Transaction]:
+        """find
+
+        Args:
+            transaction_id (str): AzamPay's transaction id
+
+        Returns:
+            Optional[Transaction]: The transaction or None when it is unknown
+        """
+
+    @abc.abstractmethod
+    def save(self, transaction: Transaction) -> None:
+        """save
+
+        Inserts the transaction or replaces the one with the same external id
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryTransactionStore(TransactionStore):
+    """
+    Keeps transactions in dicts, lost when the process exits
+    """
+
+    def __init__(self):
+        self._by_external_id: Dict[str, Transaction] = {}
+        self._by_transaction_id: Dict[str, str] = {}
+
+    def get(self, external_id: str) -> Optional[Transaction]:
+        return self._by_external_id.get(external_id)
+
+    def find(self, transaction_id: str) -> Optional[Transaction]:
+        external_id = self._by_transaction_id.get(transaction_id)
+        return None if external_id is None else self._by_external_id.get(external_id)
+
+    def save(self, transaction: Transaction) -> None:
+        self._by_external_id[transaction.external_id] = transaction
+        if transaction.transaction_id:
+            self._by_transaction_id[transaction.transaction_id] = transaction.external_id
+
+    def __len__(self) -> int:
+        return len(self._by_external_id)
+
+
+class SQLiteTransactionStore(TransactionStore):
+    """
+    Keeps transactions in a SQLite database in WAL mode
+
+    ``external_id`` is the primary key and ``transaction_id`` has its own index,
+    so both lookups are indexed. WAL lets readers in other processes (e.g. the
+    callback service) query the file while this process writes it.
+    """
+
+    _COLUMNS: Tuple[str, ...] = Transaction.__slots__
+
+    def __init__(self, path: str = ":memory:"):
+        """__init__ method
+
+        Args:
+            path (str, optional): The database file. Defaults to ":memory:".
+        """
+        self.path: str = path
+        self._lock = threading.Lock()
+        import sqlite3
+
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                external_id TEXT PRIMARY KEY,
+                transaction_id TEXT,
+                status TEXT NOT NULL,
+                amount TEXT,
+                provider TEXT,
+                account TEXT,
+                message TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS transactions_transaction_id "
+            "ON transactions (transaction_id)"
+        )
+        columns = ", ".join(self._COLUMNS)
+        self._select = f"SELECT {columns} FROM transactions WHERE "
+        self._insert = (
+            f"INSERT OR REPLACE INTO transactions ({columns}) "
+            f"VALUES ({', '.join('?' for _ in self._COLUMNS)})"
+        )
+
+    def _one(self, where: str, value: str) -> Optional[Transaction]:
+        with self._lock:
+            row = self._connection.execute(self._select + where, (value,)).fetchone()
+        if row is None:
+            return None
+        fields = dict(zip(self._COLUMNS, row))
+        return Transaction(fields.pop("external_id"), **fields)
+
+    def get(self, external_id: str) -> Optional[Transaction]:
+        return self._one("external_id = ?", external_id)
+
+    def find(self, transaction_id: str) -> Optional[Transaction]:
+        return self._one("transaction_id = ?", transaction_id)
+
+    def save(self, transaction: Transaction) -> None:
+        values = [getattr(transaction, column) for column in self._COLUMNS]
+        with self._lock:
+            self._connection.execute(self._insert, values)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class TransactionRegistry(object):
+    """
+    Records checkouts when they are submitted and completes them from callbacks
+
+    Pass it to the client (``transactions=``) and to ``create_callback_app`` and
+    every checkout with an external id can be awaited until AzamPay reports its
+    outcome, without polling the gateway.
+
+    Example:
+
+    >>> from azampay import Azampay, TransactionRegistry, SQLiteTransactionStore
+    >>> registry = TransactionRegistry(SQLiteTransactionStore("transactions.db"))
+    >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', transactions=registry)
+    >>> azampay.mobile_checkout(mobile='0657649154', amount=1000, external_id='order-1')
+    >>> registry.wait('order-1', timeout=120).status
+    """
+
+    def __init__(self, store: Optional[TransactionStore] = None):
+        """__init__ method
+
+        Args:
+            store (TransactionStore, optional): Where transactions are kept. Defaults to an InMemoryTransactionStore.
+        """
+        self.store: TransactionStore = store or InMemoryTransactionStore()
+        self._condition = threading.Condition()
+        self._futures: Dict[str, List[Tuple[Any, "asyncio.Future"]]] = {}
+        self._listeners: List[Callable[[Transaction], Any]] = []
+
+    def get(self, external_id: str) -> Optional[Transaction]:
+        return self.store.get(external_id)
+
+    def find(self, transaction_id: str) -> Optional[Transaction]:
+        return self.store.find(transaction_id)
+
+    def on_submission(self, listener: Callable[[Transaction], Any]) -> None:
+        """on_submission
+
+        Calls ``listener`` with every transaction recorded while still pending,
+        e.g. Reconciler.track_transaction
+
+        Args:
+            listener (Callable[[Transaction], Any]): Called after the submission is saved
+        """
+        self._listeners.append(listener)
+
+    def record_submission(
+        self,
+        external_id: str,
+        response: Dict[str, Any],
+        *,
+        amount: Optional[str] = None,
+        provider: Optional[str] = None,
+        account: Optional[str] = None,
+    ) -> Transaction:
+        """record_submission
+
+        Records a checkout accepted by AzamPay
+
+        Args:
+            external_id (str): The external id the checkout was submitted with
+            response (Dict[str, Any]): The checkout response, carrying ``transactionId``
+            amount (str, optional): The amount charged. Defaults to None.
+            provider (str, optional): The MNO or bank. Defaults to None.
+            account (str, optional): The account charged. Defaults to None.
+
+        Returns:
+            Transaction: The recorded transaction
+        """
+        with self._condition:
+            # the callback may already have arrived, never downgrade it to pending
+            transaction = self.store.get(external_id) or Transaction(external_id)
+            transaction.transaction_id = (
+                response.get("transactionId") or transaction.transaction_id
+            )
+            transaction.amount = transaction.amount or amount
+            transaction.provider = transaction.provider or provider
+            transaction.account = transaction.account or account
+            if not transaction.done:
+                transaction.message = response.get("message")
+            transaction.updated_at = time.time()
+            self.store.save(transaction)
+        if not transaction.done:
+            for listener in self._listeners:
+                try:
+                    listener(transaction)
+                except Exception:
+                    logger.exception("Submission listener failed on %s", external_id)
+        return transaction
+
+    def update_from_callback(self, event: Any) -> Transaction:
+        """update_from_callback
+
+        Completes the transaction a callback reports on and wakes up its waiters
+
+        Args:
+            event (CallbackEvent): The validated callback
+
+        Returns:
+            Transaction: The updated transaction
+        """
+        return self.complete(
+            event.external_id,
+            event.transactionstatus,
+            transaction_id=event.transaction_id,
+            message=event.message,
+            amount=event.amount,
+            provider=event.operator,
+            account=event.msisdn,
+        )
+
+    def complete(
+        self,
+        external_id: str,
+        status: str,
+        *,
+        transaction_id: Optional[str] = None,
+        message: Optional[str] = None,
+        amount: Optional[str] = None,
+        provider: Optional[str] = None,
+        account: Optional[str] = None,
+    ) -> Transaction:
+        """complete
+
+        Records the final status of a transaction, from a callback or a status poll, and wakes up its waiters
+
+        Args:
+            external_id (str): The external id the checkout was submitted with
+            status (str): The reported status, e.g. "success" or "failure"
+            transaction_id (str, optional): AzamPay's transaction id. Defaults to None.
+            message (str, optional): The reported message. Defaults to None.
+            amount (str, optional): The amount charged. Defaults to None.
+            provider (str, optional): The MNO or bank. Defaults to None.
+            account (str, optional): The account charged. Defaults to None.
+
+        Returns:
+            Transaction: The updated transaction
+        """
+        with self._condition:
+            transaction = (
+                self.store.get(external_id)
+                or (transaction_id and self.store.find(transaction_id))
+                or Transaction(external_id)
+            )
+            transaction.transaction_id = transaction_id or transaction.transaction_id
+            transaction.status = status.lower()
+            transaction.message = message
+            transaction.amount = transaction.amount or amount
+            transaction.provider = transaction.provider or provider
+            transaction.account = transaction.account or account
+            transaction.updated_at = time.time()
+            self.store.save(transaction)
+            futures = self._futures.pop(transaction.external_id, [])
+            self._condition.notify_all()
+        for loop, future in futures:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, transaction)
+            except RuntimeError:
+                # the waiting loop has been closed
+                pass
+        logger.debug(
+            "Transaction completed: %s",
+            transaction.status,
+            extra={
+                "external_id": transaction.external_id,
+                "transaction_id": transaction.transaction_id,
+            },
+        )
+        return transaction
+
+    def update_from_callbacks(self, events: List[Any]) -> None:
+        """update_from_callbacks
+
+        Batch handler for CallbackDispatcher, applying every event in order
+        """
+        for event in events:
+            self.update_from_callback(event)
+
+    def wait(self, external_id: str, timeout: float) -> Transaction:
+        """wait
+
+        Blocks until the transaction is completed by its callback
+
+        Args:
+            external_id (str): The external id the checkout was submitted with
+            timeout (float): Seconds to wait at most
+
+        Raises:
+            TimeoutError: When no callback arrived in time
+
+        Returns:
+            Transaction: The completed transaction
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                transaction = self.store.get(external_id)
+                if transaction is not None and transaction.done:
+                    return transaction
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No callback for {external_id} in {timeout}s")
+                self._condition.wait(remaining)
+
+    async def await_completion(self, external_id: str, timeout: float) -> Transaction:
+        """await_completion
+
+        Waits, without blocking the event loop, until the transaction is completed by its callback
+
+        Args:
+            external_id (str): The external id the checkout was submitted with
+            timeout (float): Seconds to wait at most
+
+        Raises:
+            TimeoutError: When no callback arrived in time
+
+        Returns:
+            Transaction: The completed transaction
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = (loop, future)
+        with self._condition:
+            transaction = self.store.get(external_id)
+            if transaction is not None and transaction.done:
+                return transaction
+            self._futures.setdefault(external_id, []).append(entry)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No callback for {external_id} in {timeout}s")
+        finally:
+            with self._condition:
+                waiters = self._futures.get(external_id)
+                if waiters and entry in waiters:
+                    waiters.remove(entry)
+                    if not waiters:
+                        del self._futures[external_id]
+
+
+def _resolve(future: "asyncio.Future", transaction: Transaction) -> None:
+    if not future.done():
+        future.set_result(transaction)
@@ -0,0 +1,152 @@
+"""
+Pooled HTTP transport shared by all Azampay calls
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Type, Union
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import requests
+    from requests.adapters import BaseAdapter
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def transient_errors() -> Tuple[Type[Exception], ...]:
+    """transient_errors
+
+    requests is only imported once the first session is built, as it makes up
+    most of the import time of azampay. Evaluate this in ``except`` clauses, where
+    it only runs once an exception is in flight.
+
+    Returns:
+        Tuple[Type[Exception], ...]: Connection errors and timeouts, worth retrying
+    """
+    import requests
+
+    return (requests.ConnectionError, requests.Timeout)
+
+
+class HTTPTransport(object):
+    """
+    Keep-alive HTTP transport
+
+    Holds one persistent ``requests.Session`` per base URL (scheme + host) so
+    that sustained checkout traffic reuses warm TCP/TLS connections instead of
+    paying for a fresh handshake on every call.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        pool_block: bool = False,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        adapter: Optional["BaseAdapter"] = None,
+    ):
+        """__init__ method
+
+        Args:
+            pool_connections (int, optional): Number of connection pools to cache per session. Defaults to 10.
+            pool_maxsize (int, optional): Maximum number of connections kept alive per host. Defaults to 20.
+            pool_block (bool, optional): Block when the pool is exhausted instead of opening extra connections. Defaults to False.
+            connect_timeout (float, optional): Seconds to wait for a connection to be established. Defaults to 5.0.
+            read_timeout (float, optional): Seconds to wait for the server to send a response. Defaults to 30.0.
+            adapter (BaseAdapter, optional): Custom adapter mounted on every session instead of the pooled default. Defaults to None.
+
+        Example:
+
+        >>> from azampay import Azampay, HTTPTransport
+        >>> transport = HTTPTransport(pool_maxsize=50, read_timeout=10)
+        >>> azampay = Azampay(app_name='abc', client_id='xxx', client_secret='xyz', transport=transport)
+        """
+        self.pool_connections: int = pool_connections
+        self.pool_maxsize: int = pool_maxsize
+        self.pool_block: bool = pool_block
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.adapter: Optional["BaseAdapter"] = adapter
+        self._sessions: Dict[str, "requests.Session"] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _make_adapter(self) -> "BaseAdapter":
+        if self.adapter is not None:
+            return self.adapter
+        from requests.adapters import HTTPAdapter
+
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+
+    def session_for(self, url: str) -> "requests.Session":
+        """session_for
+
+        Returns the persistent session serving the base URL of ``url``
+
+        Args:
+            url (str): Any URL on the host
+
+        Returns:
+            requests.Session: The session bound to that host
+        """
+        origin = self._origin(url)
+        session = self._sessions.get(origin)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                import requests
+
+                session = requests.Session()
+                adapter = self._make_adapter()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[origin] = session
+        return session
+
+    def request(
+        self, method: str, url: str, timeout: Optional[Timeout] = None, **kwargs: Any
+    ) -> "requests.Response":
+        """request
+
+        Sends a request over the pooled session of the target host
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute URL
+            timeout (Timeout, optional): Overrides the transport (connect, read) timeout. Defaults to None.
+
+        Returns:
+            requests.Response: The raw response
+        """
+        session = self.session_for(url)
+        return session.request(
+            method, url, timeout=timeout or self.timeout, **kwargs
+        )
+
+    def close(self) -> None:
+        """close
+
+        Closes every pooled session and its connections
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def __enter__(self) -> "HTTPTransport":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
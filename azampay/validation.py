@@ -0,0 +1,263 @@
+"""
+Validation of whole batch columns before anything is sent
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+from azampay.amount import Amount, currency_spec
+from azampay.msisdn import normalize_msisdn
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+# separators a plain number may contain, see azampay.msisdn
+_PUNCTUATION = ("+", " ", "-", "(", ")", ".")
+# longest digit string converted to int64 minor units without overflow
+_MAX_DIGITS = 18
+
+
+class ValidationReport(object):
+    """
+    Outcome of validating a batch, row by row
+
+    ``amounts`` and ``msisdns`` hold the values as they would be sent (None for
+    invalid rows) and ``errors`` maps the index of every invalid row to the reason.
+    """
+
+    __slots__ = ("amounts", "msisdns", "errors")
+
+    def __init__(
+        self,
+        amounts: List[Optional[str]],
+        msisdns: Optional[List[Optional[str]]],
+        errors: Dict[int, str],
+    ):
+        self.amounts = amounts
+        self.msisdns = msisdns
+        self.errors = errors
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __repr__(self) -> str:
+        return f"ValidationReport(rows={len(self)}, invalid={len(self.errors)})"
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _amount_error(value: Any, currency: str) -> str:
+    try:
+        Amount(value, currency)
+    except ValueError as e:
+        return str(e)
+    return f"{value!r} is not a valid amount"
+
+
+def _validate_amounts_python(
+    amounts: Sequence[Any], currency: str, errors: Dict[int, str]
+) -> List[Optional[str]]:
+    cleaned: List[Optional[str]] = []
+    for index, value in enumerate(amounts):
+        try:
+            cleaned.append(str(Amount(value, currency)))
+        except ValueError as e:
+            cleaned.append(None)
+            errors[index] = str(e)
+    return cleaned
+
+
+def _validate_msisdns_python(
+    mobiles: Sequence[Any], errors: Dict[int, str]
+) -> List[Optional[str]]:
+    cleaned: List[Optional[str]] = []
+    for index, mobile in enumerate(mobiles):
+        msisdn = normalize_msisdn(_NON_DIGITS.sub("", str(mobile)))
+        cleaned.append(msisdn)
+        if msisdn is None:
+            errors.setdefault(index, "Invalid mobile number")
+    return cleaned
+
+
+def _drop(np: Any, column: Any, char: str) -> Any:
+    # replacing copies the whole column, skip it for characters that never occur
+    if (np.char.find(column, char) >= 0).any():
+        return np.char.replace(column, char, "")
+    return column
+
+
+def _chars(np: Any, column: Any) -> Any:
+    # one row per value, one column per character, "" past the end of shorter values
+    width = max(int(column.dtype.itemsize // 4), 1)
+    return column.astype(f"U{width}").view("U1").reshape(len(column), width)
+
+
+def _ascii_digits(np: Any, column: Any) -> Any:
+    """
+    True for non-empty rows made of 0-9 only; np.char.isdigit also accepts
+    characters such as "²" or Arabic-Indic digits, which the scalar checks reject
+    """
+    chars = _chars(np, column)
+    digit = ((chars >= "0") & (chars <= "9")) | (chars == "")
+    return digit.all(axis=1) & (np.char.str_len(column) > 0)
+
+
+def _grouped(np: Any, text: Any, integer_end: Any) -> Any:
+    """
+    True for rows whose thousands separators sit every three digits from the
+    right of the integer part (or that have none), like AMOUNT_PATTERN requires;
+    a separator after the decimal point rejects the row
+    """
+    chars = _chars(np, text)
+    commas = chars == ","
+    offset = integer_end[:, None] - np.arange(chars.shape[1])[None, :]
+    in_integer = offset > 0
+    expected = in_integer & (offset % 4 == 0)
+    has_commas = commas.any(axis=1)
+    placed = ~((commas != expected) & (in_integer | commas)).any(axis=1)
+    return ~has_commas | (placed & (integer_end % 4 != 0))
+
+
+def _validate_amounts_numpy(
+    np: Any, amounts: Any, currency: str, errors: Dict[int, str]
+) -> List[Optional[str]]:
+    spec = currency_spec(currency)
+    values = amounts
+    text = _drop(np, np.char.strip(amounts.astype(str)), " ")
+    plain = _drop(np, text, ",")
+    dot = np.char.find(plain, ".")
+    has_dot = dot >= 0
+    digits = np.char.replace(plain, ".", "", count=1)
+    length = np.char.str_len(plain)
+    valid = _ascii_digits(np, digits) & (dot != 0) & ~(has_dot & (dot == length - 1))
+    if plain is not text:
+        text_dot = np.char.find(text, ".")
+        valid &= _grouped(
+            np, text, np.where(text_dot >= 0, text_dot, np.char.str_len(text))
+        )
+    # trailing zeros of the fraction do not count against the precision
+    trimmed = np.where(has_dot, np.char.rstrip(plain, "0"), plain)
+    fraction = np.where(has_dot, np.char.str_len(trimmed) - dot - 1, 0)
+    valid &= fraction <= spec.precision
+    significant = np.char.lstrip(np.char.replace(trimmed, ".", "", count=1), "0")
+    valid &= np.char.str_len(significant) <= _MAX_DIGITS
+    significant = np.where(valid & (np.char.str_len(significant) > 0), significant, "0")
+    minor = significant.astype(np.int64) * (
+        10 ** (spec.precision - np.where(valid, fraction, 0))
+    ).astype(np.int64)
+    valid &= (minor >= int(spec.minimum.scaleb(spec.precision))) & (
+        minor <= int(spec.maximum.scaleb(spec.precision))
+    )
+    whole, cents = np.divmod(minor, 10 ** spec.precision)
+    cleaned = whole.astype(str)
+    fractional = valid & (cents != 0)
+    if fractional.any():
+        cleaned = np.where(
+            fractional,
+            np.char.add(
+                np.char.add(cleaned, "."),
+                np.char.zfill(cents.astype(str), spec.precision),
+            ),
+            cleaned,
+        )
+    cleaned = cleaned.astype(object)
+    for index in np.nonzero(~valid)[0]:
+        cleaned[index] = None
+        errors[int(index)] = _amount_error(values[index].item(), currency)
+    return cleaned.tolist()
+
+
+def _validate_msisdns_numpy(
+    np: Any, mobiles: Any, errors: Dict[int, str]
+) -> List[Optional[str]]:
+    digits = mobiles.astype(str)
+    for char in _PUNCTUATION:
+        digits = _drop(np, digits, char)
+    length = np.char.str_len(digits)
+    plain = _ascii_digits(np, digits)
+    # same rules as normalize_msisdn, including its handling of 10 digit numbers
+    cleaned = np.where(
+        length == 9,
+        np.char.add("255", digits),
+        np.where(length == 10, np.char.replace(digits, "0", "255", count=1), digits),
+    ).astype(object)
+    valid = plain & (length >= 9) & (length <= 12)
+    cleaned[~valid] = None
+    # anything beyond punctuation and digits is normalized like clean_mobile_number does
+    for index in np.nonzero(~plain)[0]:
+        cleaned[index] = normalize_msisdn(_NON_DIGITS.sub("", str(digits[index])))
+    for index in np.nonzero(cleaned == None)[0]:  # noqa: E711
+        errors.setdefault(int(index), "Invalid mobile number")
+    return cleaned.tolist()
+
+
+def validate_rows(
+    amounts: Sequence[Any],
+    mobiles: Optional[Sequence[Any]] = None,
+    *,
+    currency: str = "TZS",
+    use_numpy: Optional[bool] = None,
+) -> ValidationReport:
+    """validate_rows
+
+    Checks a column of amounts, and optionally of mobile numbers, in one pass
+
+    The checks are those of ``Amount`` and ``clean_mobile_number``, so a batch can
+    be rejected or filtered before the first request is made. With NumPy installed
+    (pip install azampay[numpy]) string and integer columns are checked with array
+    operations; otherwise, and for mixed or float columns, row by row.
+
+    Args:
+        amounts (Sequence[Any]): The amount of every row
+        mobiles (Sequence[Any], optional): The mobile number of every row. Defaults to None.
+        currency (str, optional): The currency of every row. Defaults to "TZS".
+        use_numpy (bool, optional): Force or disable the NumPy path. Defaults to using it when installed.
+
+    Raises:
+        ValueError: When the currency is not supported or the columns differ in length
+
+    Returns:
+        ValidationReport: Cleaned values and the reason every invalid row was rejected
+
+    Example:
+
+    >>> from azampay.validation import validate_rows
+    >>> report = validate_rows(["1,000", "abc", "250.50"], ["0687649154", "0687649154", "12"])
+    >>> report.amounts, report.errors
+    (['1000', None, '250.50'], {1: "'abc' is not a valid amount", 2: 'Invalid mobile number'})
+    """
+    currency_spec(currency)
+    if mobiles is not None and len(mobiles) != len(amounts):
+        raise ValueError("amounts and mobiles must have the same length")
+    np = _import_numpy() if use_numpy is not False else None
+    if use_numpy and np is None:
+        raise ImportError(
+            "validate_rows needs numpy, install it with: pip install azampay[numpy]"
+        )
+    errors: Dict[int, str] = {}
+    cleaned_amounts: List[Optional[str]]
+    cleaned_mobiles: Optional[List[Optional[str]]] = None
+    if np is not None:
+        column = np.asarray(amounts)
+        if column.ndim == 1 and column.dtype.kind in "USiu":
+            cleaned_amounts = _validate_amounts_numpy(np, column, currency, errors)
+        else:
+            cleaned_amounts = _validate_amounts_python(amounts, currency, errors)
+        if mobiles is not None:
+            column = np.asarray(mobiles)
+            if column.ndim == 1 and column.dtype.kind in "USiu":
+                cleaned_mobiles = _validate_msisdns_numpy(np, column, errors)
+            else:
+                cleaned_mobiles = _validate_msisdns_python(mobiles, errors)
+    else:
+        cleaned_amounts = _validate_amounts_python(amounts, currency, errors)
+        if mobiles is not None:
+            cleaned_mobiles = _validate_msisdns_python(mobiles, errors)
+    return ValidationReport(cleaned_amounts, cleaned_mobiles, dict(sorted(errors.items())))
@@ -0,0 +1,61 @@
+"""
+Load test of the callback ingestion endpoint, in process through httpx's ASGI transport
+
+    python -m benchmarks.bench_callbacks
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from azampay.callbacks import CALLBACK_PATH, create_callback_app
+
+
+def payload(i):
+    return {
+        "msisdn": "255687649154",
+        "amount": "2000",
+        "message": "any message",
+        "utilityref": f"order-{i}",
+        "operator": "Airtel",
+        "reference": f"tx-{i}",
+        "transactionstatus": "success",
+        "submerchantAcc": "01723113",
+    }
+
+
+async def run(count, concurrency, batch_size):
+    delivered = []
+
+    async def handle(events):
+        delivered.append(len(events))
+
+    app = create_callback_app(handle, batch_size=batch_size, max_queue=count)
+    bodies = [payload(i) for i in range(count)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker(offset):
+            for body in bodies[offset::concurrency]:
+                await client.post(CALLBACK_PATH, json=body)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        acked = time.perf_counter() - started
+        await app.state.dispatcher.stop()
+        drained = time.perf_counter() - started
+    return acked, drained, len(delivered)
+
+
+def main(count=5000, concurrency=50):
+    for batch_size in (1, 100):
+        acked, drained, batches = asyncio.run(run(count, concurrency, batch_size))
+        print(
+            f"batch_size={batch_size:<4d} {count / acked:10,.0f} acks/s "
+            f"{count / drained:10,.0f} delivered/s in {batches} handler calls"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compares the prefix-table MSISDN resolver against phonenumbers
+
+    python -m benchmarks.bench_msisdn
+"""
+
+import random
+import timeit
+
+import phonenumbers
+from phonenumbers import carrier
+
+from azampay.msisdn import CARRIER_PREFIXES, MsisdnResolver
+
+
+def sample_numbers(count, seed=0):
+    rng = random.Random(seed)
+    prefixes = sorted(CARRIER_PREFIXES)
+    return [
+        "0{}{:07d}".format(rng.choice(prefixes), rng.randrange(10 ** 7))
+        for _ in range(count)
+    ]
+
+
+def with_phonenumbers(numbers):
+    for mobile in numbers:
+        carrier.name_for_number(phonenumbers.parse(mobile, "TZ"), "en")
+
+
+def main(count=20000, repeat=5):
+    numbers = sample_numbers(count)
+    # warm the lazily loaded phonenumbers metadata so only steady state is compared
+    with_phonenumbers(numbers[:10])
+    runs = {
+        "phonenumbers": lambda: with_phonenumbers(numbers),
+        "resolver (cold cache)": lambda: MsisdnResolver(cache_size=0).resolve_many(numbers),
+        "resolver (warm cache)": lambda resolver=MsisdnResolver(count): resolver.resolve_many(numbers),
+    }
+    for name, run in runs.items():
+        best = min(timeit.repeat(run, number=1, repeat=repeat))
+        print(f"{name:24s} {count / best:12,.0f} numbers/s")
+
+
+if __name__ == "__main__":
+    main()
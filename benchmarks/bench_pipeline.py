@@ -0,0 +1,56 @@
+"""
+Builds and submits a batch against the offline mock, on one thread and through the process pipeline
+
+    python -m benchmarks.bench_pipeline
+"""
+
+import os
+import time
+
+from azampay.batch import run_batch
+from azampay.pipeline import CheckoutPipeline
+from azampay.testing import MockAzamPay
+from benchmarks.bench_validation import sample_rows
+
+
+def batch(count):
+    amounts, mobiles = sample_rows(count)
+    return [
+        {"external_id": str(index), "mobile": mobile, "amount": amount}
+        for index, (amount, mobile) in enumerate(zip(amounts, mobiles))
+    ]
+
+
+def in_thread(client, rows, max_concurrency):
+    def jobs():
+        for row in rows:
+            try:
+                request = client._prepare_mobile_checkout(**row)
+            except ValueError:
+                continue
+            yield row["external_id"], lambda request=request: client._send_request(request)
+
+    return sum(1 for _ in run_batch(jobs(), max_concurrency=max_concurrency))
+
+
+def main(count=50000, max_concurrency=16):
+    rows = batch(count)
+    client = MockAzamPay().client()
+    started = time.perf_counter()
+    in_thread(client, rows, max_concurrency)
+    elapsed = time.perf_counter() - started
+    print(f"{'thread':10s} {count / elapsed:10,.0f} rows/s")
+    for processes in sorted({1, 2, os.cpu_count() or 1}):
+        client = MockAzamPay().client()
+        pipeline = CheckoutPipeline(client, processes=processes, max_concurrency=max_concurrency)
+        started = time.perf_counter()
+        for _ in pipeline.run(rows):
+            pass
+        elapsed = time.perf_counter() - started
+        print(f"{processes:2d} procs   {count / elapsed:10,.0f} rows/s")
+        for stage in pipeline.stages.values():
+            print(f"           {stage}")
+
+
+if __name__ == "__main__":
+    main()
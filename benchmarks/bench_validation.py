@@ -0,0 +1,46 @@
+"""
+Validates a million-row batch column with and without NumPy
+
+    python -m benchmarks.bench_validation
+"""
+
+import random
+import time
+
+from azampay.msisdn import CARRIER_PREFIXES
+from azampay.validation import validate_rows
+
+
+def sample_rows(count, seed=0):
+    rng = random.Random(seed)
+    prefixes = sorted(CARRIER_PREFIXES)
+    amounts = [
+        rng.choice(["{:,}", "{}", "{}.50"]).format(rng.randrange(100, 10 ** 6))
+        for _ in range(count)
+    ]
+    mobiles = [
+        "0{}{:07d}".format(rng.choice(prefixes), rng.randrange(10 ** 7))
+        for _ in range(count)
+    ]
+    # a sprinkle of bad rows
+    for index in range(0, count, 997):
+        amounts[index] = "12,34"
+        mobiles[index + 1 if index + 1 < count else index] = "12345"
+    return amounts, mobiles
+
+
+def main(count=1000000):
+    amounts, mobiles = sample_rows(count)
+    for use_numpy in (False, True):
+        started = time.perf_counter()
+        report = validate_rows(amounts, mobiles, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - started
+        label = "numpy" if use_numpy else "python"
+        print(
+            f"{label:8s} {count / elapsed:12,.0f} rows/s "
+            f"({elapsed:.2f}s, {len(report.errors)} invalid)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Performance baseline of the SDK's hot paths (pip install pytest-benchmark)
+
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Runs are saved under .benchmarks/ keyed by commit, so a release can be compared
+against the previous one. Checkouts go to the offline mock, never to AzamPay.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from azampay import Azampay, HTTPTransport
+from azampay.base import BaseAzampay
+from azampay.msisdn import MsisdnResolver
+from azampay.testing import MockAzamPay, MockServer
+from benchmarks.bench_msisdn import sample_numbers
+
+CHECKOUTS = 200
+AMOUNTS = ["1,000", " 25000 ", "1,234,567.50", "100"] * 250
+
+
+@pytest.fixture(scope="module")
+def numbers():
+    return sample_numbers(1000)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockServer(MockAzamPay()) as server:
+        yield server
+
+
+def rows(prefix, count=CHECKOUTS):
+    return [
+        {"mobile": "0687649154", "amount": "1000", "external_id": f"{prefix}-{i}"}
+        for i in range(count)
+    ]
+
+
+def test_import_time(benchmark):
+    command = [sys.executable, "-c", "import azampay"]
+    benchmark.pedantic(subprocess.check_call, args=(command,), rounds=10, warmup_rounds=1)
+
+
+def test_client_construction(benchmark):
+    benchmark(Azampay, app_name="app", client_id="client", client_secret="secret")
+
+
+def test_client_cold_first_checkout(benchmark):
+    # construction plus the token and partner fetches the first checkout pays for
+    mock = MockAzamPay()
+    counter = iter(range(10 ** 9))
+
+    def cold():
+        client = mock.client()
+        client.mobile_checkout(mobile="0687649154", amount="1000", external_id=str(next(counter)))
+
+    benchmark(cold)
+
+
+def test_client_warm_checkout(benchmark):
+    client = MockAzamPay().client()
+    counter = iter(range(10 ** 9))
+    benchmark(
+        lambda: client.mobile_checkout(
+            mobile="0687649154", amount="1000", external_id=str(next(counter))
+        )
+    )
+
+
+def test_clean_mobile_number(benchmark, numbers):
+    clean = BaseAzampay.clean_mobile_number
+    benchmark(lambda: [clean(number) for number in numbers])
+
+
+@pytest.mark.parametrize("cache_size", [0, 4096], ids=["cold", "warm"])
+def test_get_carrier(benchmark, numbers, cache_size):
+    resolver = MsisdnResolver(cache_size=cache_size)
+    benchmark(lambda: [resolver.carrier(number) for number in numbers])
+
+
+def test_clean_amount(benchmark):
+    clean = BaseAzampay.clean_amount
+    benchmark(lambda: [clean(amount) for amount in AMOUNTS])
+
+
+def test_checkouts_serial(benchmark, server):
+    client = server.client()
+    counter = iter(range(10 ** 9))
+
+    def run():
+        batch = next(counter)
+        for row in rows(f"serial-{batch}"):
+            client.mobile_checkout(**row)
+
+    benchmark.pedantic(run, rounds=5, warmup_rounds=1)
+    benchmark.extra_info["checkouts_per_second"] = CHECKOUTS / benchmark.stats.stats.mean
+    client.close()
+
+
+@pytest.mark.parametrize("concurrency", [8, 32])
+def test_checkouts_concurrent(benchmark, server, concurrency):
+    client = server.client(transport=HTTPTransport(pool_maxsize=concurrency))
+    counter = iter(range(10 ** 9))
+
+    def run():
+        batch = next(counter)
+        results = list(
+            client.batch_mobile_checkout(
+                rows(f"concurrent-{concurrency}-{batch}"), max_concurrency=concurrency
+            )
+        )
+        assert all(result.ok for result in results)
+
+    benchmark.pedantic(run, rounds=5, warmup_rounds=1)
+    benchmark.extra_info["checkouts_per_second"] = CHECKOUTS / benchmark.stats.stats.mean
+    client.close()
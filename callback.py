@@ -3,24 +3,26 @@ Azampay Callback Example
 """
 
 import logging
-from fastapi import FastAPI, Request
+from typing import List
+from azampay.callbacks import CallbackEvent, create_callback_app
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-app = FastAPI()
+# Azampay calls /api/v1/Checkout/Callback when a transaction is completed or failed.
+# The endpoint validates the payload, drops repeated deliveries and acknowledges
+# right away; the events then reach handle_callbacks in batches.
 
-# Define the callback endpoint
-# This endpoint will be called by Azampay
-# when a transaction is completed or failed
 
+async def handle_callbacks(events: List[CallbackEvent]):
+    for event in events:
+        logging.info(
+            f"Callback: {event.external_id} {event.transaction_id} {event.transactionstatus}"
+        )
 
-@app.post("/api/v1/Checkout/Callback")
-async def callback(request: Request):
-    _callback_data = await request.json()
-    logging.info(f"Callback: {_callback_data}")
-    return {"status": "success"}
+
+app = create_callback_app(handle_callbacks)
 
 
 # Run the application
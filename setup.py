@@ -20,6 +20,7 @@ setup(
     license="MIT",
     packages=["azampay"],
     install_requires=["requests", "phonenumbers"],
+    extras_require={"async": ["httpx"], "callbacks": ["fastapi"], "numpy": ["numpy"], "fastjson": ["orjson"]},
     keywords=[
         "azampay",
         "azampay SDK",
@@ -31,13 +32,12 @@ setup(
         "airtel money",
         "halopesa",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
         "Topic :: Software Development :: Build Tools",
         "License :: OSI Approved :: MIT License",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
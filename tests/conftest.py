@@ -0,0 +1,86 @@
+import json
+import pytest
+from urllib.parse import urlsplit
+from requests import Response
+from requests.adapters import BaseAdapter
+from azampay import Azampay, HTTPTransport
+
+PARTNERS = [
+    {"paymentVendorId": "v-airtel", "partnerName": "Airtel"},
+    {"paymentVendorId": "v-tigo", "partnerName": "Tigo"},
+    {"paymentVendorId": "v-halopesa", "partnerName": "Halopesa"},
+]
+
+# a batch file with a valid row, a row without provider, a bad amount, a duplicate and another valid row
+PAYOUTS_CSV = """external_id,mobile,amount,provider,note
+1,0687649154,"1,000",Airtel,first
+2,0687649154,500,,second
+3,0687649154,abc,Airtel,bad amount
+2,0687649154,500,Airtel,duplicate
+4,0687649154,700,Airtel,
+"""
+
+
+class FakeAdapter(BaseAdapter):
+    """Answers the AzamPay endpoints in-process and records every request"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.routes = {
+            "/AppRegistration/GenerateToken": lambda request: (
+                200,
+                {"data": {"accessToken": "token-1"}, "message": "Token generated"},
+            ),
+            "/api/v1/Partner/GetPaymentPartners": lambda request: (200, PARTNERS),
+            "/azampay/mno/checkout": lambda request: (
+                200,
+                {"success": True, "transactionId": "tx-1", "message": "ok"},
+            ),
+            "/azampay/bank/checkout": lambda request: (
+                200,
+                {"success": True, "transactionId": "tx-2", "message": "ok"},
+            ),
+            "/api/v1/Partner/PostCheckout": lambda request: (
+                200,
+                {"status": 200, "data": "https://pay.example/link"},
+            ),
+        }
+
+    def paths(self):
+        return [urlsplit(request.url).path for request in self.calls]
+
+    def send(self, request, **kwargs):
+        self.calls.append(request)
+        status, payload = self.routes[urlsplit(request.url).path](request)
+        response = Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def adapter():
+    return FakeAdapter()
+
+
+@pytest.fixture
+def make_client(adapter):
+    """Builds clients that talk to the ``adapter`` fixture, keyword arguments go to Azampay"""
+
+    def make(transport_options=None, **kwargs):
+        return Azampay(
+            app_name="app",
+            client_id="client",
+            client_secret="secret",
+            transport=HTTPTransport(adapter=adapter, **(transport_options or {})),
+            **kwargs,
+        )
+
+    return make
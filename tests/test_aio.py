@@ -0,0 +1,183 @@
+import asyncio
+import json
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from azampay import AsyncAzampay, AsyncHTTPTransport
+from tests.conftest import PARTNERS
+
+
+def make_client(paths, checkout_status=200):
+    tokens = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == "/AppRegistration/GenerateToken":
+            tokens.append(1)
+            return httpx.Response(200, json={"data": {"accessToken": f"t{len(tokens)}"}})
+        if request.url.path == "/api/v1/Partner/GetPaymentPartners":
+            return httpx.Response(200, json=PARTNERS)
+        if request.url.path == "/api/v1/Partner/PostCheckout":
+            body = json.loads(request.content)
+            return httpx.Response(200, json={"status": 200, "data": body["vendorId"]})
+        if request.headers["Authorization"] == "Bearer t1" and checkout_status != 200:
+            return httpx.Response(checkout_status, json={})
+        return httpx.Response(200, json={"success": True, "transactionId": "tx"})
+
+    return AsyncAzampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=AsyncHTTPTransport(transport=httpx.MockTransport(handler)),
+    )
+
+
+def test_concurrent_checkouts_share_token_and_partners():
+    paths = []
+
+    async def main():
+        async with make_client(paths) as gateway:
+            return await asyncio.gather(
+                *[
+                    gateway.mobile_checkout(
+                        mobile="0657649154",
+                        amount="1000",
+                        external_id=str(i),
+                        provider="tigo",
+                    )
+                    for i in range(20)
+                ]
+            )
+
+    responses = asyncio.run(main())
+    assert all(response["success"] for response in responses)
+    assert paths.count("/AppRegistration/GenerateToken") == 1
+    assert paths.count("/api/v1/Partner/GetPaymentPartners") == 1
+    assert paths.count("/azampay/mno/checkout") == 20
+
+
+def test_payment_link_and_bank_checkout():
+    paths = []
+
+    async def main():
+        async with make_client(paths, checkout_status=401) as gateway:
+            link = await gateway.generate_payment_link(
+                amount="5000", external_id="1", provider="Airtel"
+            )
+            bank = await gateway.bank_checkout(
+                merchant_account_number="123",
+                merchant_mobile_number="0657649154",
+                amount="100",
+                otp="1",
+                provider="nmb",
+                reference_id="2",
+            )
+            return link, bank
+
+    link, bank = asyncio.run(main())
+    assert link["data"] == "v-airtel"
+    assert bank["success"] is True
+    assert paths.count("/AppRegistration/GenerateToken") == 2
+
+
+def test_batch_checkouts_stream_results_with_bounded_concurrency():
+    from azampay.batch import arun_batch
+
+    paths = []
+    active = []
+    peak = []
+
+    async def job():
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.pop()
+        return {}
+
+    rows = [
+        {"mobile": "0657649154", "amount": "1000", "external_id": str(i), "provider": "Tigo"}
+        for i in range(10)
+    ]
+    rows.append({"mobile": "0657649154", "amount": "1", "external_id": "bad", "provider": "Nope"})
+    bank_rows = [
+        {
+            "merchant_account_number": "1",
+            "merchant_mobile_number": "0657649154",
+            "amount": "100",
+            "otp": "1",
+            "provider": "crdb",
+            "reference_id": str(i),
+        }
+        for i in range(3)
+    ]
+
+    async def main():
+        async with make_client(paths) as gateway:
+            mobile = [r async for r in gateway.batch_mobile_checkout(rows, max_concurrency=4)]
+            bank = [r async for r in gateway.batch_bank_checkout(bank_rows)]
+        jobs = [r async for r in arun_batch(((i, job) for i in range(30)), max_concurrency=3)]
+        return mobile, bank, jobs
+
+    mobile, bank, jobs = asyncio.run(main())
+    results = {r.external_id: r for r in mobile}
+    assert len(results) == 11 and isinstance(results["bad"].error, ValueError)
+    assert all(results[str(i)].ok for i in range(10))
+    assert sorted(r.external_id for r in bank) == ["0", "1", "2"] and all(r.ok for r in bank)
+    assert paths.count("/azampay/mno/checkout") == 10
+    assert paths.count("/api/v1/Partner/GetPaymentPartners") == 1
+    assert len(jobs) == 30 and max(peak) <= 3
+
+
+def test_generate_payment_links_fill_a_template_and_reuse_minted_links():
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == "/AppRegistration/GenerateToken":
+            return httpx.Response(200, json={"data": {"accessToken": "t"}})
+        if request.url.path == "/api/v1/Partner/GetPaymentPartners":
+            return httpx.Response(200, json=PARTNERS)
+        body = json.loads(request.content)
+        assert body["vendorId"] == "v-airtel"
+        assert body["redirectSuccessURL"] == "https://shop/paid"
+        link = f"https://pay/{body['externalId']}/{body['amount']}"
+        return httpx.Response(200, json={"status": 200, "data": link})
+
+    invoices = [{"amount": 1000 + i, "external_id": f"invoice-{i}"} for i in range(5)]
+    invoices.append({"amount": "abc", "external_id": "bad"})
+
+    async def collect(gateway, invoices, **kwargs):
+        return {
+            r.external_id: r
+            async for r in gateway.generate_payment_links(
+                invoices, redirect_success_url="https://shop/paid", **kwargs
+            )
+        }
+
+    async def main():
+        async with AsyncAzampay(
+            app_name="app",
+            client_id="client",
+            client_secret="secret",
+            transport=AsyncHTTPTransport(transport=httpx.MockTransport(handler)),
+        ) as gateway:
+            first = await collect(gateway, invoices, provider="airtel", max_concurrency=3)
+            minted = paths.count("/api/v1/Partner/PostCheckout")
+            # re-sent invoices come from the cache, a changed amount mints a new link
+            invoices[0] = {"amount": 999, "external_id": "invoice-0"}
+            second = await collect(gateway, invoices[:5], provider="Airtel")
+            single = await gateway.generate_payment_link(
+                amount=1004, external_id="invoice-4", provider="Airtel",
+                redirect_success_url="https://shop/paid",
+            )
+            return first, minted, second, single
+
+    first, minted, second, single = asyncio.run(main())
+    assert first["invoice-2"].response["data"] == "https://pay/invoice-2/1002"
+    assert isinstance(first["bad"].error, ValueError)
+    assert minted == 5 and paths.count("/api/v1/Partner/GetPaymentPartners") == 1
+    assert second["invoice-0"].response["data"] == "https://pay/invoice-0/999"
+    assert second["invoice-4"].response is first["invoice-4"].response
+    assert single is first["invoice-4"].response
+    assert paths.count("/api/v1/Partner/PostCheckout") == 6
@@ -0,0 +1,109 @@
+import pickle
+import random
+from decimal import Decimal
+import pytest
+
+from azampay.amount import Amount, parse_amount
+from azampay.checkout import MobileCheckoutRequest
+from azampay.validation import validate_rows
+
+
+@pytest.mark.parametrize(
+    "value, expected, minor_units",
+    [
+        ("1,000", "1000", 100000),
+        ("1,000.50", "1000.50", 100050),
+        (" 2 500 ", "2500", 250000),
+        (100, "100", 10000),
+        (Decimal("7.10"), "7.10", 710),
+        ("1.500", "1.50", 150),
+    ],
+)
+def test_amount_parses_exactly(value, expected, minor_units):
+    amount = Amount(value)
+    assert str(amount) == expected and amount.minor_units == minor_units
+
+
+@pytest.mark.parametrize(
+    "value", ["abc", "", "1.", ".5", "10,00", "1.005", "0", "-5", 1.5, True, "1e3"]
+)
+def test_amount_rejects(value):
+    with pytest.raises(ValueError):
+        Amount(value)
+
+
+def test_amount_is_immutable_and_checked_against_currency():
+    amount = Amount("10")
+    with pytest.raises(AttributeError):
+        amount.value = Decimal(1)
+    assert pickle.loads(pickle.dumps(amount)) == amount
+    with pytest.raises(ValueError):
+        Amount("10", "USD")
+    assert parse_amount(5000) == "5000"
+
+
+def test_requests_reject_bad_amounts_before_sending():
+    with pytest.raises(ValueError, match="not a valid amount"):
+        MobileCheckoutRequest(mobile="0687649154", amount="abc", external_id="1")
+
+
+ROWS = [
+    ("1,000", "0687649154"),
+    ("abc", "0687649154"),
+    ("250.50", "12"),
+    ("0.001", "+255 687 649 154"),
+    ("0", "687649154"),
+    ("99999999999999999999999", "(068) 764-9154"),
+    ("7", "abc0687649154"),
+]
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def use_numpy(request):
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+def test_validate_rows(use_numpy):
+    amounts, mobiles = zip(*ROWS)
+    report = validate_rows(list(amounts), list(mobiles), use_numpy=use_numpy)
+    assert report.amounts == ["1000", None, "250.50", None, None, None, "7"]
+    assert report.msisdns == ["255687649154"] * 2 + [None] + ["255687649154"] * 4
+    assert sorted(report.errors) == [1, 2, 3, 4, 5]
+    assert report.errors[1] == "'abc' is not a valid amount"
+    assert report.errors[2] == "Invalid mobile number"
+    assert not report.ok and len(report) == len(ROWS)
+
+
+def test_validate_rows_paths_agree_on_integer_columns(use_numpy):
+    report = validate_rows([0, 5, 10 ** 13], use_numpy=use_numpy)
+    assert report.amounts == [None, "5", None] and sorted(report.errors) == [0, 2]
+
+
+def test_numpy_path_matches_the_scalar_validators():
+    pytest.importorskip("numpy")
+    generator = random.Random(2024)
+    alphabet = "0123456789" * 3 + ",. +-()" + "²٣０"
+
+    def value():
+        return "".join(generator.choice(alphabet) for _ in range(generator.randint(0, 14)))
+
+    def grouped():
+        # a well formed amount with one character inserted, to exercise the separator checks
+        text = f"{generator.randint(0, 10 ** 9):,}.{generator.randint(0, 99)}"
+        at = generator.randint(0, len(text))
+        return text[:at] + generator.choice(",.0²") + text[at:]
+
+    amounts = [value() for _ in range(5000)] + [grouped() for _ in range(2000)]
+    mobiles = [value() for _ in range(len(amounts))]
+    expected = validate_rows(amounts, mobiles, use_numpy=False)
+    report = validate_rows(amounts, mobiles, use_numpy=True)
+    assert report.amounts == expected.amounts
+    assert report.msisdns == expected.msisdns
+    assert report.errors == expected.errors
+
+
+def test_validate_rows_checks_lengths():
+    with pytest.raises(ValueError):
+        validate_rows(["1"], ["0687649154", "0687649154"])
@@ -0,0 +1,79 @@
+import time
+import threading
+from azampay.auth import TokenManager, parse_expiry
+
+
+def test_parse_expiry():
+    assert parse_expiry("1970-01-01T00:01:40Z") == 100.0
+    assert parse_expiry("1970-01-01T00:01:40.1234567Z") == 100.0
+    assert parse_expiry("soon") is None
+    assert parse_expiry(None) is None
+
+
+def test_construction_is_offline(adapter, make_client):
+    gateway = make_client()
+    assert adapter.calls == []
+    gateway.supported_mnos_data()
+    gateway.supported_mnos_data()
+    assert adapter.paths().count("/AppRegistration/GenerateToken") == 1
+
+
+def test_token_is_refreshed_inside_margin():
+    issued = []
+
+    def fetch():
+        issued.append(1)
+        expire = time.strftime(
+            "%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 30)
+        )
+        return {"data": {"accessToken": f"t{len(issued)}", "expire": expire}}
+
+    tokens = TokenManager(fetch, refresh_margin=60)
+    assert tokens.get() == "t1"
+    assert tokens.get() == "t2"
+    assert 0 < tokens.expires_in <= 30
+
+
+def test_only_one_thread_refreshes_an_expired_token():
+    issued = []
+
+    def fetch():
+        issued.append(1)
+        time.sleep(0.05)
+        return {"data": {"accessToken": "t"}}
+
+    tokens = TokenManager(fetch)
+    threads = [threading.Thread(target=tokens.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(issued) == 1
+
+
+def test_rejected_token_is_retried_once(adapter, make_client):
+    issued = []
+    seen = []
+
+    def token(request):
+        issued.append(1)
+        return 200, {"data": {"accessToken": f"token-{len(issued)}"}}
+
+    def checkout(request):
+        seen.append(request.headers["Authorization"])
+        if request.headers["Authorization"] == "Bearer token-1":
+            return 401, {"message": "expired"}
+        return 200, {"success": True, "transactionId": "tx"}
+
+    adapter.routes["/AppRegistration/GenerateToken"] = token
+    adapter.routes["/azampay/mno/checkout"] = checkout
+    gateway = make_client()
+    gateway.mobile_checkout(
+        mobile="0657649154", amount="1000", external_id="1", provider="Tigo"
+    )
+    response = gateway.mobile_checkout(
+        mobile="0657649154", amount="1000", external_id="2", provider="Tigo"
+    )
+    assert response["success"] is True
+    assert seen == ["Bearer token-1", "Bearer token-2", "Bearer token-2"]
+    assert len(issued) == 2
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from azampay.batch import run_batch
+from azampay.ratelimit import TokenBucket
+
+
+def test_batch_mobile_checkout_streams_results_per_item(adapter, make_client):
+    def checkout(request):
+        body = json.loads(request.body)
+        if body["externalId"] == "boom":
+            return 400, {"message": "rejected"}
+        return 200, {"success": True, "transactionId": body["externalId"]}
+
+    adapter.routes["/azampay/mno/checkout"] = checkout
+    rows = [
+        {"mobile": "0657649154", "amount": "1000", "external_id": str(i), "provider": "Tigo"}
+        for i in range(10)
+    ]
+    rows.append({"mobile": "0657649154", "amount": "1", "external_id": "bad", "provider": "Nope"})
+    rows.append({"mobile": "0657649154", "amount": "1", "external_id": "boom", "provider": "Tigo"})
+
+    results = {r.external_id: r for r in make_client().batch_mobile_checkout(rows, max_concurrency=4)}
+
+    assert len(results) == 12
+    assert all(results[str(i)].response["transactionId"] == str(i) for i in range(10))
+    assert isinstance(results["bad"].error, ValueError)
+    assert not results["boom"].ok
+    assert adapter.paths().count("/api/v1/Partner/GetPaymentPartners") == 1
+    assert adapter.paths().count("/azampay/mno/checkout") == 11
+
+
+def test_batch_bank_checkout(adapter, make_client):
+    rows = [
+        {
+            "merchant_account_number": "1",
+            "merchant_mobile_number": "0657649154",
+            "amount": "100",
+            "otp": "1",
+            "provider": "crdb",
+            "reference_id": str(i),
+        }
+        for i in range(3)
+    ]
+    results = list(make_client().batch_bank_checkout(rows))
+    assert sorted(r.external_id for r in results) == ["0", "1", "2"]
+    assert all(r.ok for r in results)
+
+
+def test_run_batch_bounds_concurrency():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def job():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.pop()
+        return {}
+
+    results = list(run_batch(((i, job) for i in range(30)), max_concurrency=3))
+    assert len(results) == 30
+    assert max(peak) <= 3
+
+
+def test_token_bucket_smooths_bursts():
+    bucket = TokenBucket(rate=100, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_generate_payment_links_fill_a_template_and_reuse_minted_links(adapter, make_client):
+    def post_checkout(request):
+        body = json.loads(request.body)
+        assert body["vendorId"] == "v-airtel"
+        assert body["redirectSuccessURL"] == "https://shop/paid"
+        return 200, {"status": 200, "data": f"https://pay/{body['externalId']}/{body['amount']}"}
+
+    adapter.routes["/api/v1/Partner/PostCheckout"] = post_checkout
+    client = make_client()
+    invoices = [{"amount": 1000 + i, "external_id": f"invoice-{i}"} for i in range(5)]
+    invoices.append({"amount": "abc", "external_id": "bad"})
+
+    first = {
+        r.external_id: r
+        for r in client.generate_payment_links(
+            invoices, provider="airtel", redirect_success_url="https://shop/paid", max_concurrency=3
+        )
+    }
+    assert first["invoice-2"].response["data"] == "https://pay/invoice-2/1002"
+    assert isinstance(first["bad"].error, ValueError)
+    assert adapter.paths().count("/api/v1/Partner/PostCheckout") == 5
+    assert adapter.paths().count("/api/v1/Partner/GetPaymentPartners") == 1
+
+    # re-sent invoices come from the cache, a changed amount mints a new link
+    invoices[0] = {"amount": 999, "external_id": "invoice-0"}
+    second = {
+        r.external_id: r
+        for r in client.generate_payment_links(
+            invoices[:5], provider="Airtel", redirect_success_url="https://shop/paid"
+        )
+    }
+    assert second["invoice-0"].response["data"] == "https://pay/invoice-0/999"
+    assert second["invoice-4"].response is first["invoice-4"].response
+    assert adapter.paths().count("/api/v1/Partner/PostCheckout") == 6
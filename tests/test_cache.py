@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from azampay import Azampay, HTTPTransport
+from azampay.cache import AsyncPartnerCatalog, PartnerCatalog, PaymentLinkCache
+from azampay.checkout import PaymentLinkTemplate
+
+PARTNERS = [
+    {"paymentVendorId": "v-1", "partnerName": "Airtel"},
+    {"paymentVendorId": "v-2", "partnerName": "TIGO"},
+]
+
+
+def test_catalog_index_and_ttl():
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return PARTNERS
+
+    catalog = PartnerCatalog(ttl=0.05)
+    assert catalog.lookup(" tigo ", fetch) == ("v-2", "TIGO")
+    assert catalog.names(fetch) == ["Airtel", "Tigo"]
+    assert len(fetches) == 1
+    time.sleep(0.06)
+    catalog.get(fetch)
+    assert len(fetches) == 2
+    catalog.invalidate()
+    catalog.get(fetch)
+    assert len(fetches) == 3
+
+
+def test_failed_fetch_is_not_cached():
+    catalog = PartnerCatalog()
+    assert catalog.get(lambda: []) == []
+    assert catalog.get(lambda: PARTNERS) == PARTNERS
+
+
+
+def test_stale_catalog_is_served_without_refetching_after_a_failed_refresh():
+    fetches = []
+
+    def failing_fetch():
+        fetches.append(1)
+        time.sleep(0.01)
+        return []
+
+    catalog = PartnerCatalog(ttl=0.05)
+    catalog.get(lambda: PARTNERS)
+    time.sleep(0.06)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(catalog.get(failing_fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(fetches) == 1 and results == [PARTNERS] * 8
+    time.sleep(0.06)
+    assert catalog.get(lambda: PARTNERS[:1]) == PARTNERS[:1]
+
+    async def failing_async_fetch():
+        fetches.append(1)
+        return []
+
+    async def partners():
+        return PARTNERS
+
+    async def main():
+        catalog = AsyncPartnerCatalog(ttl=0.05)
+        await catalog.get(partners)
+        await asyncio.sleep(0.06)
+        return await asyncio.gather(*(catalog.get(failing_async_fetch) for _ in range(8)))
+
+    assert asyncio.run(main()) == [PARTNERS] * 8 and len(fetches) == 2
+
+
+def test_single_flight_refresh():
+    fetches = []
+
+    def slow_fetch():
+        fetches.append(1)
+        time.sleep(0.05)
+        return PARTNERS
+
+    catalog = PartnerCatalog()
+    threads = [
+        threading.Thread(target=catalog.get, args=(slow_fetch,)) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(fetches) == 1
+
+
+def test_checkout_costs_one_round_trip_on_cache_hit(adapter):
+    gateway = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+    )
+    gateway.generate_payment_link(amount="5000", external_id="1", provider="Airtel")
+    del adapter.calls[:]
+    gateway.mobile_checkout(
+        mobile="0657649154", amount="1000", external_id="2", provider="Tigo"
+    )
+    gateway.generate_payment_link(amount="5000", external_id="3", provider="airtel")
+    assert adapter.paths() == [
+        "/azampay/mno/checkout",
+        "/api/v1/Partner/PostCheckout",
+    ]
+    assert adapter.calls[-1].body.count(b"v-airtel") == 1
+
+
+def test_payment_link_cache_is_a_bounded_lru_of_exact_requests():
+    template = PaymentLinkTemplate(app_name="app", client_id="client", vendor_id="v-1", vendor_name="Airtel")
+    cache = PaymentLinkCache(max_size=2)
+    first, second, third = (template.fill(amount=100, external_id=str(i)) for i in range(3))
+    cache.put(first, {"status": 200, "data": "link-0"})
+    cache.put(second, {"status": 200, "data": "link-1"})
+    assert cache.get(first)["data"] == "link-0"
+    cache.put(third, {"status": 200, "data": "link-2"})
+    assert cache.get(second) is None
+    assert len(cache) == 2
+    assert cache.get(template.fill(amount=200, external_id="0")) is None
+    cache.put(template.fill(amount=100, external_id="3"), {"message": "failed"})
+    assert len(cache) == 2
+    assert PaymentLinkCache(max_size=0).get(first) is None
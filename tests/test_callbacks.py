@@ -0,0 +1,130 @@
+import asyncio
+import pytest
+
+from azampay.azampay_exceptions import InvalidCallback
+from azampay.callbacks import CallbackDispatcher, CallbackEvent, DedupeIndex
+
+
+def payload(reference="123-123", utilityref="1292-123", status="success"):
+    return {
+        "msisdn": "0178823",
+        "amount": "2000",
+        "message": "any message",
+        "utilityref": utilityref,
+        "operator": "Tigo",
+        "reference": reference,
+        "transactionstatus": status,
+        "submerchantAcc": "01723113",
+    }
+
+
+def test_event_parses_webhook_payload():
+    event = CallbackEvent.from_payload(payload())
+    assert event.transaction_id == "123-123"
+    assert event.external_id == "1292-123"
+    assert event.submerchant_acc == "01723113"
+    assert event.succeeded
+    assert not CallbackEvent.from_payload(payload(status="failure")).succeeded
+
+
+@pytest.mark.parametrize(
+    "body",
+    [[], {"utilityref": "x", "transactionstatus": "success"}, dict(payload(), amount={})],
+)
+def test_event_rejects_invalid_payload(body):
+    with pytest.raises(InvalidCallback):
+        CallbackEvent.from_payload(body)
+
+
+def test_dedupe_index_is_bounded():
+    index = DedupeIndex(max_size=2)
+    assert index.add("a") and index.add("b")
+    assert not index.add("a")
+    assert index.add("c")
+    assert "b" not in index and "a" in index and len(index) == 2
+
+
+def test_dispatcher_batches_and_drops_duplicates():
+    batches = []
+
+    async def main():
+        dispatcher = CallbackDispatcher(batches.append, batch_size=3, flush_interval=0.01)
+        for i in range(5):
+            assert dispatcher.submit(CallbackEvent.from_payload(payload(reference=str(i))))
+        assert dispatcher.submit(CallbackEvent.from_payload(payload(reference="0")))
+        await dispatcher.stop()
+        return dispatcher.stats()
+
+    stats = asyncio.run(main())
+    assert [len(batch) for batch in batches] == [3, 2]
+    assert stats["delivered"] == 5 and stats["duplicates"] == 1
+
+
+def test_dispatcher_applies_backpressure_and_survives_handler_errors():
+    async def failing(batch):
+        raise RuntimeError("boom")
+
+    async def main():
+        dispatcher = CallbackDispatcher(failing, max_queue=2)
+        accepted = [
+            dispatcher.submit(CallbackEvent.from_payload(payload(reference=str(i))))
+            for i in range(3)
+        ]
+        await dispatcher.stop()
+        # a rejected callback is not remembered, so AzamPay's retry gets through
+        assert dispatcher.submit(CallbackEvent.from_payload(payload(reference="2")))
+        await dispatcher.stop()
+        # neither is one the handler failed on
+        assert dispatcher.submit(CallbackEvent.from_payload(payload(reference="0")))
+        await dispatcher.stop()
+        return accepted, dispatcher.stats()
+
+    accepted, stats = asyncio.run(main())
+    assert accepted == [True, True, False]
+    assert stats["rejected"] == 1 and stats["delivered"] == 0 and stats["backlog"] == 0
+    assert stats["duplicates"] == 0 and stats["failed"] == 4
+
+
+def test_callback_app_acks_validates_and_delivers():
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("fastapi")
+    from azampay.callbacks import CALLBACK_PATH, create_callback_app
+
+    events = []
+    app = create_callback_app(events.extend, flush_interval=0.001)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            ok = await client.post(CALLBACK_PATH, json=payload())
+            again = await client.post(CALLBACK_PATH, json=payload())
+            bad = await client.post(CALLBACK_PATH, json={"amount": "1"})
+        await app.state.dispatcher.stop()
+        return ok, again, bad
+
+    ok, again, bad = asyncio.run(main())
+    assert ok.status_code == 200 and ok.json() == {"status": "success"}
+    assert again.status_code == 200
+    assert bad.status_code == 422
+    assert [event.transaction_id for event in events] == ["123-123"]
+
+
+def test_callback_app_completes_registered_transactions():
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("fastapi")
+    from azampay.callbacks import CALLBACK_PATH, create_callback_app
+    from azampay.transactions import TransactionRegistry
+
+    registry = TransactionRegistry()
+    registry.record_submission("1292-123", {"transactionId": "123-123"})
+    app = create_callback_app(transactions=registry, flush_interval=0.001)
+
+    async def main():
+        waiter = asyncio.ensure_future(registry.await_completion("1292-123", timeout=5))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post(CALLBACK_PATH, json=payload())
+        return await waiter
+
+    transaction = asyncio.run(main())
+    assert transaction.succeeded and transaction.transaction_id == "123-123"
@@ -0,0 +1,107 @@
+import json
+import pickle
+import pytest
+
+from azampay import Azampay, HTTPTransport
+from azampay.checkout import (
+    BankCheckoutRequest,
+    CheckoutRequest,
+    MobileCheckoutRequest,
+    PaymentLinkRequest,
+)
+
+
+def mobile_request(**overrides):
+    fields = dict(mobile="0687 649 154", amount="1,000", external_id="order-1")
+    fields.update(overrides)
+    return MobileCheckoutRequest(**fields)
+
+
+def test_mobile_request_is_validated_and_serialized_once():
+    request = mobile_request()
+    assert request.provider == "Airtel"
+    assert json.loads(request.body) == {
+        "accountNumber": "255687649154",
+        "amount": "1000",
+        "currency": "TZS",
+        "externalId": "order-1",
+        "provider": "Airtel",
+        "additionalProperties": None,
+    }
+    assert mobile_request(provider=" tigo").provider == "Tigo"
+
+
+@pytest.mark.parametrize(
+    "overrides", [{"mobile": "123"}, {"currency": "USD"}]
+)
+def test_mobile_request_rejects_invalid_fields(overrides):
+    with pytest.raises(ValueError):
+        mobile_request(**overrides)
+
+
+def test_bank_request_validation():
+    fields = dict(
+        merchant_account_number="123",
+        merchant_mobile_number="0687649154",
+        amount=500,
+        otp="1234",
+        provider="crdb",
+        reference_id=7,
+    )
+    request = BankCheckoutRequest(**fields)
+    assert request.provider == "CRDB" and request.external_id == "7"
+    assert request.as_dict()["merchantMobileNumber"] == "255687649154"
+    with pytest.raises(ValueError):
+        BankCheckoutRequest(**dict(fields, provider="XYZ"))
+
+
+def test_requests_are_immutable_and_pickle_without_revalidation():
+    request = mobile_request()
+    with pytest.raises(AttributeError):
+        request.amount = "1"
+    with pytest.raises(AttributeError):
+        request.extra = "1"
+    copy = pickle.loads(pickle.dumps(request))
+    assert copy == request and copy.body is not request.body
+    assert copy.provider == "Airtel" and hash(copy) == hash(request)
+
+
+def test_request_types_must_define_their_external_id():
+    class Incomplete(CheckoutRequest):
+        __slots__ = ()
+
+    with pytest.raises(TypeError):
+        CheckoutRequest()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_payment_link_request_needs_vendor():
+    with pytest.raises(ValueError):
+        PaymentLinkRequest(
+            amount=1, external_id="x", app_name="a", client_id="c", vendor_id=None, vendor_name=None
+        )
+
+
+def test_client_sends_prepared_bytes(adapter):
+    seen = []
+
+    def checkout(request):
+        seen.append(request.body)
+        return 200, {"success": True, "transactionId": "tx"}
+
+    adapter.routes["/azampay/mno/checkout"] = checkout
+    azampay = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+    )
+    request = mobile_request()
+    assert azampay.submit(request)["transactionId"] == "tx"
+    results = list(azampay.batch_mobile_checkout([request, mobile_request(provider="Mpesa")]))
+    assert seen == [request.body, request.body]
+    assert [result.ok for result in results] == [False, True]
+    assert "Mpesa is not a supported mno" in str(results[0].error)
+    with pytest.raises(ValueError):
+        azampay.submit(mobile_request(provider="Mpesa"))
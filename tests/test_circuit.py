@@ -0,0 +1,170 @@
+import threading
+import time
+import pytest
+from azampay import Azampay, CircuitBreakerRegistry, HTTPTransport, RetryPolicy
+from azampay.azampay_exceptions import CircuitOpen, EndpointOverloaded, InternalServerError
+from azampay.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.release(False)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    breaker.acquire()
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+    breaker.release(True)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    breaker.acquire()
+    breaker.release(False)
+    time.sleep(0.02)
+    breaker.acquire()
+    breaker.release(False)
+    assert breaker.state == OPEN
+
+
+def test_requests_without_a_response_record_no_outcome():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.01)
+    breaker.acquire()
+    breaker.release(False)
+    breaker.acquire()
+    breaker.release(None)
+    assert breaker.snapshot() == {"state": CLOSED, "failures": 1, "in_flight": 0}
+    breaker.acquire()
+    breaker.release(False)
+    time.sleep(0.02)
+    breaker.acquire()
+    breaker.release(None)
+    assert breaker.state == HALF_OPEN
+    # the probe was handed back
+    breaker.acquire()
+    breaker.release(True)
+    assert breaker.state == CLOSED
+
+
+def test_interrupted_requests_do_not_close_the_breaker(adapter):
+    adapter.routes["/azampay/mno/checkout"] = lambda request: (500, {})
+    gateway = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        retry_policy=RetryPolicy(max_retries=0),
+        circuit_breakers=CircuitBreakerRegistry(failure_threshold=2),
+    )
+    kwargs = dict(mobile="0657649154", amount="1000", external_id="1", provider="Tigo")
+    with pytest.raises(InternalServerError):
+        gateway.mobile_checkout(**kwargs)
+
+    def interrupted(request):
+        raise KeyboardInterrupt
+
+    adapter.routes["/azampay/mno/checkout"] = interrupted
+    with pytest.raises(KeyboardInterrupt):
+        gateway.mobile_checkout(**kwargs)
+    states = gateway.circuit_states()
+    assert states["sandbox.azampay.co.tz/azampay/mno/checkout"]["failures"] == 1
+
+
+def test_token_is_fetched_outside_the_endpoint_breakers(adapter):
+    gateway = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        retry_policy=RetryPolicy(max_retries=0),
+        circuit_breakers=CircuitBreakerRegistry(failure_threshold=1),
+    )
+    held = []
+
+    def token(request):
+        held.extend(
+            key for key, state in gateway.circuit_states().items()
+            if state["in_flight"] and "GenerateToken" not in key
+        )
+        return 500, {}
+
+    adapter.routes["/AppRegistration/GenerateToken"] = token
+    with pytest.raises(InternalServerError):
+        gateway.mobile_checkout(
+            mobile="0657649154", amount="1000", external_id="1", provider="Tigo"
+        )
+    assert held == []
+    states = gateway.circuit_states()
+    assert states["authenticator-sandbox.azampay.co.tz/AppRegistration/GenerateToken"]["state"] == OPEN
+    assert states["sandbox.azampay.co.tz/api/v1/Partner/GetPaymentPartners"]["failures"] == 0
+
+
+def test_in_flight_budget_sheds_load():
+    breaker = CircuitBreaker(max_in_flight=1)
+    breaker.acquire()
+    with pytest.raises(EndpointOverloaded):
+        breaker.acquire()
+    breaker.release(True)
+    breaker.acquire()
+    assert breaker.snapshot() == {"state": CLOSED, "failures": 0, "in_flight": 1}
+
+
+def test_client_fails_fast_per_endpoint(adapter):
+    adapter.routes["/azampay/mno/checkout"] = lambda request: (500, {})
+    gateway = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        retry_policy=RetryPolicy(max_retries=0),
+        circuit_breakers=CircuitBreakerRegistry(failure_threshold=2),
+    )
+
+    def checkout():
+        gateway.mobile_checkout(
+            mobile="0657649154", amount="1000", external_id="1", provider="Tigo"
+        )
+
+    for _ in range(2):
+        with pytest.raises(InternalServerError):
+            checkout()
+    with pytest.raises(CircuitOpen):
+        checkout()
+    assert adapter.paths().count("/azampay/mno/checkout") == 2
+    states = gateway.circuit_states()
+    assert states["sandbox.azampay.co.tz/azampay/mno/checkout"]["state"] == OPEN
+    assert states["sandbox.azampay.co.tz/api/v1/Partner/GetPaymentPartners"]["state"] == CLOSED
+
+
+def test_client_rejects_over_budget(adapter):
+    release = threading.Event()
+
+    def slow_checkout(request):
+        release.wait(1)
+        return 200, {"success": True}
+
+    adapter.routes["/azampay/mno/checkout"] = slow_checkout
+    gateway = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        circuit_breakers=CircuitBreakerRegistry(
+            in_flight_limits={"/azampay/mno/checkout": 1}
+        ),
+    )
+    kwargs = dict(mobile="0657649154", amount="1000", external_id="1", provider="Tigo")
+    gateway.supported_mnos_data()
+    worker = threading.Thread(target=gateway.mobile_checkout, kwargs=kwargs)
+    worker.start()
+    time.sleep(0.05)
+    with pytest.raises(EndpointOverloaded):
+        gateway.mobile_checkout(**kwargs)
+    release.set()
+    worker.join()
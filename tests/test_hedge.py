@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+import pytest
+from azampay import HedgePolicy, LatencyTracker
+from tests.conftest import PARTNERS
+
+PRIMARY_AUTH = "authenticator-sandbox.azampay.co.tz"
+ALTERNATE_AUTH = "https://auth-b.example.com"
+ALTERNATE_BASE = "https://checkout-b.example.com"
+
+
+def hedging(**policy):
+    policy.setdefault("default_delay", 0.05)
+    return HedgePolicy(min_delay=0.01, **policy)
+
+
+def checkout(client):
+    return client.mobile_checkout(mobile="0687649154", amount="1000", external_id="1")
+
+
+def test_tracker_and_delay_follow_the_host_percentile():
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile("a", 95) is None
+    for ms in range(1, 101):
+        tracker.observe("a", ms / 1000)
+    assert tracker.percentile("a", 95) == pytest.approx(0.095, abs=0.001)
+    assert tracker.count("a") == 100
+
+    policy = HedgePolicy(min_samples=20, default_delay=0.5, max_delay=2)
+    assert policy.delay("a") == 0.5
+    for _ in range(20):
+        policy.tracker.observe("a", 0.2)
+    assert policy.delay("a") == pytest.approx(0.2)
+    policy.tracker.observe("b", 10.0)
+    assert policy.delay("b") == 0.5
+    policy = HedgePolicy(max_attempts=3, base_urls=[ALTERNATE_BASE + "/"])
+    assert policy.urls("https://a.tz/x?y=1", "https://a.tz", policy.base_urls) == [
+        "https://a.tz/x?y=1",
+        ALTERNATE_BASE + "/x?y=1",
+        "https://a.tz/x?y=1",
+    ]
+
+
+def test_slow_token_call_is_hedged_on_the_alternate_host(adapter, make_client):
+    def token(request):
+        if urlsplit(request.url).netloc == PRIMARY_AUTH:
+            time.sleep(0.5)
+            return 200, {"data": {"accessToken": "slow"}}
+        return 200, {"data": {"accessToken": "fast"}}
+
+    adapter.routes["/AppRegistration/GenerateToken"] = token
+    client = make_client(hedging=hedging(auth_base_urls=[ALTERNATE_AUTH]))
+    started = time.perf_counter()
+    checkout(client)
+    assert time.perf_counter() - started < 0.4
+    assert client.hedging.stats() == {"hedged": 1, "won": 1}
+    assert adapter.calls[-1].headers["Authorization"] == "Bearer fast"
+
+
+def test_server_errors_fail_over_without_waiting(adapter, make_client):
+    def partners(request):
+        if urlsplit(request.url).netloc == "sandbox.azampay.co.tz":
+            return 503, {"message": "unavailable"}
+        return 200, PARTNERS
+
+    adapter.routes["/api/v1/Partner/GetPaymentPartners"] = partners
+    client = make_client(hedging=hedging(base_urls=[ALTERNATE_BASE], default_delay=5))
+    started = time.perf_counter()
+    assert [partner.name for partner in client.payment_partners()][0] == "Airtel"
+    assert time.perf_counter() - started < 1
+    assert client.hedging.stats()["hedged"] == 0
+
+
+def test_fast_calls_are_not_hedged_and_checkouts_never_are(adapter, make_client):
+    client = make_client(hedging=hedging())
+    checkout(client)
+    checkout(client)
+    assert client.hedging.stats() == {"hedged": 0, "won": 0}
+    assert adapter.paths().count("/AppRegistration/GenerateToken") == 1
+    assert client.hedging.tracker.count("sandbox.azampay.co.tz") == 3
+
+
+def test_slow_attempts_that_lost_do_not_hold_up_new_calls():
+    policy = HedgePolicy(default_delay=0.01, min_delay=0.01)
+    stuck = threading.Event()
+    attempts = [("slow", lambda: stuck.wait(5)), ("fast", lambda: "answer")]
+    started = time.perf_counter()
+    try:
+        for _ in range(20):
+            assert policy.run("/x", attempts, lambda result: True) == "answer"
+    finally:
+        stuck.set()
+    assert time.perf_counter() - started < 2
+    assert policy.stats() == {"hedged": 20, "won": 20}
+
+
+def test_async_hedge_cancels_the_slower_attempt():
+    httpx = pytest.importorskip("httpx")
+    from azampay import AsyncAzampay, AsyncHTTPTransport
+
+    cancelled = []
+
+    async def handler(request):
+        if request.url.path == "/AppRegistration/GenerateToken":
+            if request.url.host == PRIMARY_AUTH:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(request.url.host)
+                    raise
+            return httpx.Response(200, json={"data": {"accessToken": "t"}})
+        if request.url.path == "/api/v1/Partner/GetPaymentPartners":
+            return httpx.Response(200, json=PARTNERS)
+        return httpx.Response(200, json={"success": True, "transactionId": "tx"})
+
+    async def main():
+        async with AsyncAzampay(
+            app_name="app",
+            client_id="client",
+            client_secret="secret",
+            transport=AsyncHTTPTransport(transport=httpx.MockTransport(handler)),
+            hedging=HedgePolicy(default_delay=0.05, auth_base_urls=[ALTERNATE_AUTH]),
+        ) as gateway:
+            await gateway.mobile_checkout(mobile="0687649154", amount="1000", external_id="1")
+            await asyncio.sleep(0)
+            return gateway
+
+    started = time.perf_counter()
+    gateway = asyncio.run(main())
+    assert gateway.hedging.stats() == {"hedged": 1, "won": 1}
+    assert time.perf_counter() - started < 0.5
+    assert cancelled == [PRIMARY_AUTH]
+    # the cancelled attempt is timed, but is neither a success nor a failure of its host
+    assert gateway.hedging.tracker.count(PRIMARY_AUTH) == 1
+    state = gateway.circuit_states()[PRIMARY_AUTH + "/AppRegistration/GenerateToken"]
+    assert state["failures"] == 0 and state["in_flight"] == 0
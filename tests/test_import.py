@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+# cumulative microseconds reported by -X importtime for "import azampay";
+# about 25ms on a laptop, eagerly importing requests alone used to add 130ms
+IMPORT_BUDGET_US = 60000
+
+DEFERRED = ("requests", "urllib3", "phonenumbers", "asyncio", "sqlite3", "httpx", "numpy")
+
+
+def import_time():
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import azampay"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+    for line in output.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == "azampay":
+            return int(cumulative)
+    raise AssertionError(output)
+
+
+def test_heavy_dependencies_are_imported_on_first_use():
+    loaded = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import sys, azampay; print(' '.join(m for m in %r if m in sys.modules))"
+            % (DEFERRED,),
+        ],
+        universal_newlines=True,
+    )
+    assert loaded.split() == []
+
+
+def test_import_time_stays_within_budget():
+    # best of three, to keep a busy CI machine from failing the build
+    assert min(import_time() for _ in range(3)) < IMPORT_BUDGET_US
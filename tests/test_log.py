@@ -0,0 +1,81 @@
+import logging
+import queue
+import subprocess
+import sys
+from azampay.log import enable_queue_logging, logger
+from azampay.queue_logging import DroppingQueueHandler
+
+
+def test_import_leaves_root_logger_alone():
+    code = "import logging, azampay; print(len(logging.getLogger().handlers), logging.getLogger().level)"
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.split() == ["0", str(logging.WARNING)]
+
+
+def test_import_does_not_load_logging_handlers():
+    code = "import sys, azampay; print('logging.handlers' in sys.modules)"
+    assert subprocess.check_output([sys.executable, "-c", code], text=True).strip() == "False"
+
+
+def test_queue_logging_delivers_structured_records():
+    records = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    listener = enable_queue_logging(Collect(), level=logging.INFO)
+    try:
+        logger.info("checkout %s", "submitted", extra={"external_id": "42"})
+    finally:
+        listener.stop()
+        for handler in list(logger.handlers):
+            if isinstance(handler, DroppingQueueHandler):
+                logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+    assert records[0].getMessage() == "checkout submitted"
+    assert records[0].external_id == "42"
+
+
+def test_enabling_queue_logging_again_replaces_the_previous_setup():
+    first, second = [], []
+
+    class Collect(logging.Handler):
+        def __init__(self, records):
+            super().__init__()
+            self.records = records
+
+        def emit(self, record):
+            self.records.append(record)
+
+    enable_queue_logging(Collect([])).stop()
+    enable_queue_logging(Collect(first))
+    listener = enable_queue_logging(Collect(second))
+    try:
+        logger.info("once")
+        queued = [h for h in logger.handlers if isinstance(h, DroppingQueueHandler)]
+    finally:
+        listener.stop()
+        for handler in list(logger.handlers):
+            if isinstance(handler, DroppingQueueHandler):
+                logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+    assert len(queued) == 1
+    assert first == [] and [record.getMessage() for record in second] == ["once"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    record = logging.LogRecord("azampay", logging.INFO, __file__, 1, "x", None, None)
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.dropped == 1
+
+
+def test_records_are_queued_unformatted():
+    log_queue = queue.Queue()
+    handler = DroppingQueueHandler(log_queue)
+    record = logging.LogRecord("azampay", logging.INFO, __file__, 1, "paid %s", ("42",), None)
+    handler.handle(record)
+    queued = log_queue.get_nowait()
+    assert queued is record and queued.args == ("42",) and queued.getMessage() == "paid 42"
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from azampay import Azampay, HTTPTransport, InMemoryMetrics, RetryPolicy
+from azampay.metrics import CACHE, HTTP_TOTAL, PHASE, REQUESTS, RETRIES, Histogram
+
+
+def test_histogram_summary():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5):
+        histogram.add(value)
+    summary = histogram.summary()
+    assert summary["count"] == 4
+    assert summary["p50"] == 0.1
+    assert summary["p99"] == 0.5
+    assert Histogram().percentile(95) == 0.0
+
+
+def test_checkout_reports_phases_http_retries_and_cache(adapter):
+    statuses = [503]
+
+    def checkout(request):
+        if statuses:
+            return statuses.pop(), {}
+        return 200, {"success": True}
+
+    adapter.routes["/azampay/mno/checkout"] = checkout
+    metrics = InMemoryMetrics()
+    gateway = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        retry_policy=RetryPolicy(backoff_factor=0.001),
+        metrics=metrics,
+    )
+    for external_id in ("1", "2"):
+        gateway.mobile_checkout(mobile="0687649154", amount="1000", external_id=external_id)
+
+    snapshot = metrics.snapshot()
+    histograms, counters = snapshot["histograms"], snapshot["counters"]
+    for phase in ("validation", "carrier_lookup", "partner_fetch", "token_fetch"):
+        assert histograms[metrics.key(PHASE, {"phase": phase})]["count"] >= 1
+    total = metrics.key(HTTP_TOTAL, {"endpoint": "/azampay/mno/checkout", "status": 200})
+    assert histograms[total]["count"] == 2
+    assert counters[metrics.key(RETRIES, {"endpoint": "/azampay/mno/checkout"})] == 1
+    assert counters[metrics.key(REQUESTS, {"endpoint": "/azampay/mno/checkout", "status": 503})] == 1
+    assert metrics.hit_rate("partners") > 0
+    assert counters[metrics.key(CACHE, {"cache": "token", "result": "miss"})] == 1
+
+
+def test_async_client_reports_metrics():
+    httpx = pytest.importorskip("httpx")
+    from azampay import AsyncAzampay, AsyncHTTPTransport
+
+    def handler(request):
+        if request.url.path.endswith("GenerateToken"):
+            return httpx.Response(200, json={"data": {"accessToken": "t"}})
+        return httpx.Response(200, json={"success": True})
+
+    metrics = InMemoryMetrics()
+
+    async def main():
+        async with AsyncAzampay(
+            app_name="app",
+            client_id="client",
+            client_secret="secret",
+            transport=AsyncHTTPTransport(transport=httpx.MockTransport(handler)),
+            metrics=metrics,
+        ) as gateway:
+            await gateway.bank_checkout(
+                merchant_account_number="1",
+                merchant_mobile_number="0657649154",
+                amount="100",
+                otp="1",
+                provider="NMB",
+                reference_id="1",
+            )
+
+    asyncio.run(main())
+    histograms = metrics.snapshot()["histograms"]
+    assert metrics.key(HTTP_TOTAL, {"endpoint": "/azampay/bank/checkout", "status": 200}) in histograms
+    assert metrics.key(PHASE, {"phase": "validation"}) in histograms
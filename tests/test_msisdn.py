@@ -0,0 +1,63 @@
+import phonenumbers
+import pytest
+from phonenumbers import carrier
+from azampay import Azampay
+from azampay.msisdn import CARRIER_PREFIXES, MsisdnResolver
+
+FORMATS = ["0{}", "{}", "255{}", "+255 {}", "+255-{}", "(0){}"]
+
+
+def reference(mobile):
+    return carrier.name_for_number(phonenumbers.parse(mobile, "TZ"), "en")
+
+
+# pinned, so a phonenumbers release reassigning or adding prefixes does not fail the suite
+PINNED = {
+    "60": "Airtel",
+    "61": "Viettel",
+    "65": "Yas",
+    "68": "Airtel",
+    "71": "Yas",
+    "73": "Tanzania Telecom",
+    "75": "Vodacom",
+    "78": "Airtel",
+    "55": "",
+}
+
+
+@pytest.mark.parametrize("prefix, expected", sorted(PINNED.items()))
+def test_carrier_of_pinned_prefixes(prefix, expected):
+    resolver = MsisdnResolver()
+    for fmt in FORMATS:
+        assert resolver.carrier(fmt.format(f"{prefix}5764915")) == expected
+
+
+def test_prefixes_both_tables_cover_agree_with_phonenumbers():
+    from phonenumbers.carrierdata import CARRIER_DATA
+
+    covered = {key[3:] for key in CARRIER_DATA if key.startswith("255")}
+    resolver = MsisdnResolver()
+    for prefix in sorted(set(CARRIER_PREFIXES) & covered):
+        for fmt in FORMATS:
+            mobile = fmt.format(f"{prefix}5764915")
+            assert resolver.carrier(mobile) == reference(mobile), mobile
+
+
+@pytest.mark.parametrize(
+    "mobile", ["0657649154", "657649154", "255657649154", "+255 657-649-154", "0657 64"]
+)
+def test_msisdn_matches_clean_mobile_number(mobile):
+    resolution = MsisdnResolver().resolve(mobile)
+    try:
+        expected = Azampay.clean_mobile_number(mobile)
+    except ValueError:
+        expected = None
+    assert resolution.msisdn == expected
+
+
+def test_resolve_many_and_fallback():
+    resolver = MsisdnResolver()
+    resolutions = resolver.resolve_many(["0657649154", "0657649154", "+1 650 253 0000"])
+    assert resolutions[0] == ("255657649154", "Yas")
+    assert resolutions[1] is resolutions[0]
+    assert resolutions[2].carrier == reference("+1 650 253 0000")
@@ -0,0 +1,45 @@
+from azampay.pipeline import CheckoutPipeline
+from azampay.runner import run_batch_file
+from azampay.testing import MOBILE_PATH, MockAzamPay
+from tests.conftest import PAYOUTS_CSV
+
+
+def rows(count):
+    for index in range(count):
+        yield {"external_id": str(index), "mobile": "0687649154", "amount": "1,000"}
+
+
+def test_requests_are_built_in_workers_and_submitted_in_order():
+    mock = MockAzamPay()
+    client = mock.client()
+    pipeline = CheckoutPipeline(client, processes=2, chunk_size=3, max_concurrency=1)
+    bad = [
+        {"external_id": "bad-amount", "mobile": "0687649154", "amount": "abc"},
+        {"external_id": "bad-provider", "mobile": "0687649154", "amount": 1, "provider": "Nope"},
+        {"mobile": "0687649154", "amount": 1},
+    ]
+    results = list(pipeline.run(list(rows(10)) + bad))
+
+    assert sorted(int(r.external_id) for r in results if r.ok) == list(range(10))
+    errors = {r.external_id: str(r.error) for r in results if not r.ok}
+    assert errors["bad-provider"] == "Nope is not a supported mno"
+    assert set(errors) == {"bad-amount", "bad-provider", ""}
+    bodies = list(mock.transactions.values())
+    # one submitting thread: the gateway sees the rows in input order
+    assert [body["externalId"] for body in bodies] == [str(index) for index in range(10)]
+    assert {body["accountNumber"] for body in bodies} == {"255687649154"}
+    assert {body["amount"] for body in bodies} == {"1000"}
+
+    prepare, submit = pipeline.stages["prepare"], pipeline.stages["submit"]
+    assert (prepare.items, submit.items) == (12, 10)
+    assert prepare.throughput > 0 and submit.workers_busy > 0
+    assert "prepare: 12 rows" in str(prepare)
+
+
+def test_batch_files_can_run_through_the_pipeline(tmp_path):
+    path = tmp_path / "payouts.csv"
+    path.write_text(PAYOUTS_CSV)
+    mock = MockAzamPay()
+    progress = run_batch_file(mock.client(), str(path), processes=2)
+    assert (progress.submitted, progress.failed, progress.rejected) == (3, 0, 2)
+    assert mock.count(MOBILE_PATH) == 3
@@ -0,0 +1,85 @@
+import threading
+import pytest
+from azampay import HTTPTransport
+from azampay.pool import AzampayPool
+
+
+def make_pool(adapter, **kwargs):
+    return AzampayPool(transport=HTTPTransport(adapter=adapter), **kwargs)
+
+
+def checkout(client, external_id="1"):
+    return client.mobile_checkout(mobile="0687649154", amount="1000", external_id=external_id)
+
+
+def test_tenants_share_connections_and_partners_but_not_tokens(adapter):
+    pool = make_pool(adapter)
+    for tenant in ("a", "b"):
+        pool.register(tenant, app_name=tenant, client_id=f"id-{tenant}", client_secret="s")
+
+    first, second = pool.get("a"), pool["b"]
+    assert pool.get("a") is first
+    assert first.transport is second.transport
+    assert first.partners is second.partners
+    checkout(first)
+    checkout(second)
+    checkout(first, "2")
+
+    paths = adapter.paths()
+    assert paths.count("/AppRegistration/GenerateToken") == 2
+    assert paths.count("/api/v1/Partner/GetPaymentPartners") == 1
+    assert first.app_name == "a" and second.client_id == "id-b"
+
+
+def test_idle_tenants_are_evicted_lru(adapter):
+    pool = make_pool(adapter, max_clients=2)
+    for tenant in ("a", "b", "c"):
+        pool.register(tenant, app_name=tenant, client_id=tenant, client_secret="s")
+
+    a = pool.get("a")
+    pool.get("b")
+    pool.get("a")
+    pool.get("c")
+    assert "b" not in pool and "a" in pool
+    assert len(pool) == 2 and pool.evictions == 1
+    assert pool.get("a") is a
+    assert pool.get("b") is not None
+    assert "c" not in pool
+
+
+def test_credentials_loader_and_unknown_tenants(adapter):
+    loaded = []
+
+    def load(tenant):
+        loaded.append(tenant)
+        if tenant.startswith("shop-"):
+            return {"app_name": tenant, "client_id": "id", "client_secret": "s"}
+        return None
+
+    pool = make_pool(adapter, credentials=load)
+    assert pool.get("shop-1").app_name == "shop-1"
+    pool.get("shop-1")
+    assert loaded == ["shop-1"]
+    with pytest.raises(KeyError):
+        pool.get("nobody")
+
+
+def test_reregistering_rebuilds_the_client(adapter):
+    pool = make_pool(adapter)
+    pool.register("a", app_name="a", client_id="old", client_secret="s")
+    old = pool.get("a")
+    pool.register("a", app_name="a", client_id="new", client_secret="s")
+    assert pool.get("a") is not old
+    assert pool.get("a").client_id == "new"
+
+
+def test_concurrent_first_use_builds_one_client(adapter):
+    pool = make_pool(adapter)
+    pool.register("a", app_name="a", client_id="a", client_secret="s")
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(pool.get("a"))) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in clients}) == 1
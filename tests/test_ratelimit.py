@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import pytest
+
+from azampay import Azampay, HTTPTransport, InMemoryMetrics
+from azampay.ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+
+
+def test_rate_limiter_creates_buckets_per_endpoint():
+    limiter = RateLimiter(limits={"/azampay/mno/checkout": 5})
+    assert limiter.bucket("/api/v1/Partner/GetPaymentPartners") is None
+    bucket = limiter.bucket("/azampay/mno/checkout")
+    assert isinstance(bucket, TokenBucket) and bucket.rate == 5
+    assert limiter.bucket("/azampay/mno/checkout") is bucket
+    assert limiter.try_acquire("/unlimited") == 0
+
+
+def test_file_bucket_state_is_shared(tmp_path):
+    pytest.importorskip("fcntl")
+    path = str(tmp_path / "checkout.bucket")
+    first = FileTokenBucket(path, rate=1, capacity=2)
+    second = FileTokenBucket(path, rate=1, capacity=2)
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() > 0
+    first.close()
+    second.close()
+
+
+def _drain(path, count):
+    bucket = FileTokenBucket(path, rate=50, capacity=1)
+    for _ in range(count):
+        bucket.acquire()
+    bucket.close()
+
+
+def test_file_bucket_limits_processes_together(tmp_path):
+    pytest.importorskip("fcntl")
+    path = str(tmp_path / "checkout.bucket")
+    context = multiprocessing.get_context("fork")
+    started = time.monotonic()
+    workers = [context.Process(target=_drain, args=(path, 5)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # 10 tokens at 50/s with a burst of 1 take at least 9 refills
+    assert time.monotonic() - started >= 9 / 50
+
+
+def _drain_inherited(bucket, count, pids):
+    for _ in range(count):
+        bucket.acquire()
+    pids.put((os.getpid(), bucket._pid))
+
+
+def test_file_bucket_reopens_after_fork(tmp_path):
+    pytest.importorskip("fcntl")
+    bucket = FileTokenBucket(str(tmp_path / "checkout.bucket"), rate=50, capacity=1)
+    bucket.acquire()
+    context = multiprocessing.get_context("fork")
+    pids = context.Queue()
+    started = time.monotonic()
+    workers = [context.Process(target=_drain_inherited, args=(bucket, 5, pids)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert time.monotonic() - started >= 9 / 50
+    for _ in workers:
+        pid, opened_by = pids.get(timeout=1)
+        assert opened_by == pid
+    assert bucket._pid == os.getpid()
+    bucket.close()
+
+
+def test_client_waits_for_tokens_and_reports_it(adapter):
+    metrics = InMemoryMetrics()
+    azampay = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        rate_limiter=RateLimiter(limits={"/azampay/mno/checkout": 100}, burst=1),
+        metrics=metrics,
+    )
+    started = time.monotonic()
+    for i in range(4):
+        azampay.mobile_checkout(
+            mobile="0687649154", amount="1000", external_id=str(i), provider="Airtel"
+        )
+    assert time.monotonic() - started >= 0.03
+    waits = metrics.snapshot()["histograms"]["azampay.ratelimit.wait{endpoint=/azampay/mno/checkout}"]
+    assert waits["count"] == 3
+
+
+def test_async_client_throttles_without_blocking():
+    httpx = pytest.importorskip("httpx")
+    from azampay import AsyncAzampay, AsyncHTTPTransport
+
+    def handler(request):
+        if request.url.path == "/AppRegistration/GenerateToken":
+            return httpx.Response(200, json={"data": {"accessToken": "t"}})
+        return httpx.Response(200, json={"data": "ok"})
+
+    async def main():
+        transport = AsyncHTTPTransport(transport=httpx.MockTransport(handler))
+        async with AsyncAzampay(
+            app_name="app",
+            client_id="client",
+            client_secret="secret",
+            transport=transport,
+            rate_limiter=RateLimiter(rate=100, burst=1),
+        ) as azampay:
+            started = time.monotonic()
+            await asyncio.gather(
+                *(azampay.post(f"{azampay.BASE_URL}/x", {}) for _ in range(4))
+            )
+            return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.03
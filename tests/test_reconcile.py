@@ -0,0 +1,127 @@
+import threading
+import time
+import pytest
+from azampay import RetryPolicy, TransactionRegistry
+from azampay.reconcile import Reconciler, parse_status
+from azampay.testing import STATUS_PATH, MockAzamPay
+from azampay.transactions import FAILURE, PENDING, SUCCESS
+
+
+def checkout(gateway, external_id):
+    return gateway.mobile_checkout(mobile="0687649154", amount="1000", external_id=external_id)
+
+
+def lost_callbacks(**kwargs):
+    # no callback or callback_url: AzamPay settles the checkouts but nobody is told
+    mock = MockAzamPay(**kwargs)
+    registry = TransactionRegistry()
+    client = mock.client(transactions=registry, retry_policy=RetryPolicy(max_retries=0))
+    return mock, registry, client
+
+
+@pytest.mark.parametrize(
+    "response, status",
+    [
+        ({"data": {"transactionstatus": "success"}}, SUCCESS),
+        ({"data": {"transactionStatus": "Completed"}, "status": 200}, SUCCESS),
+        ({"data": "FAILED", "success": True}, FAILURE),
+        ({"transactionStatus": "cancelled"}, FAILURE),
+        ({"status": "success", "data": None}, PENDING),
+        ({"data": {"status": "failed"}, "success": True}, PENDING),
+        ({"data": {"transactionstatus": "processing"}}, PENDING),
+        ({"data": None, "message": "Transaction not found", "success": False}, PENDING),
+        ("not a dict", PENDING),
+    ],
+)
+def test_parse_status(response, status):
+    assert parse_status(response) == status
+
+
+def test_checkouts_with_lost_callbacks_are_reconciled():
+    mock, registry, client = lost_callbacks(
+        callback_status=lambda body: "failure" if body["externalId"] == "order-2" else "success"
+    )
+    handled = []
+    reconciler = Reconciler(client, handler=handled.append, initial_delay=0, jitter=False)
+    for external_id in ("order-1", "order-2", "order-3"):
+        checkout(client, external_id)
+    assert len(reconciler) == 3
+
+    assert reconciler.run_once() == 3
+    assert sorted((t.external_id, t.status) for t in handled) == [
+        ("order-1", SUCCESS),
+        ("order-2", FAILURE),
+        ("order-3", SUCCESS),
+    ]
+    by_id = {transaction.external_id: transaction for transaction in handled}
+    assert registry.wait("order-1", timeout=0).transaction_id == by_id["order-1"].transaction_id
+    assert len(reconciler) == 0 and reconciler.run_once() == 0
+    assert mock.count(STATUS_PATH) == 3
+
+
+def test_pending_transactions_back_off_until_final():
+    mock, registry, client = lost_callbacks(settle_after=0.15)
+    handled = []
+    reconciler = Reconciler(
+        client, handler=handled.append, initial_delay=0, interval=0.04, backoff=2, jitter=False
+    )
+    checkout(client, "order-1")
+
+    delays = []
+    while not handled:
+        if reconciler.run_once():
+            delays.append(reconciler.next_poll("order-1"))
+        time.sleep(0.005)
+    assert delays[0] == pytest.approx(0.04, abs=0.02)
+    assert delays[1] == pytest.approx(0.08, abs=0.02)
+    assert delays[-1] is None
+    assert handled[0].succeeded and reconciler.stats()["resolved"] == 1
+
+
+def test_callbacks_arriving_first_skip_the_poll():
+    mock, registry, client = lost_callbacks()
+    handled = []
+    reconciler = Reconciler(client, handler=handled.append, initial_delay=0)
+    response = checkout(client, "order-1")
+    registry.complete("order-1", "success", transaction_id=response["transactionId"])
+
+    assert reconciler.run_once() == 0
+    assert mock.count(STATUS_PATH) == 0
+    assert handled[0].succeeded
+
+
+def test_failed_polls_are_rescheduled_and_batches_are_bounded():
+    mock, registry, client = lost_callbacks()
+    reconciler = Reconciler(client, initial_delay=0, interval=60, batch_size=2, jitter=False)
+    for external_id in ("order-1", "order-2", "order-3"):
+        checkout(client, external_id)
+    mock.fail(STATUS_PATH, 400, times=2)
+
+    assert reconciler.run_once() == 2
+    assert reconciler.stats()["errors"] == 2 and len(reconciler) == 3
+    assert reconciler.next_poll("order-1") == pytest.approx(60, abs=1)
+    assert reconciler.run_once() == 1
+    assert len(reconciler) == 2
+
+
+def test_transactions_past_max_age_are_handed_over_pending():
+    mock, registry, client = lost_callbacks(settle_after=60)
+    handled = []
+    reconciler = Reconciler(client, handler=handled.append, initial_delay=0, max_age=0)
+    checkout(client, "order-1")
+    reconciler.run_once()
+    assert handled[0].status == PENDING
+    assert reconciler.stats()["expired"] == 1 and len(reconciler) == 0
+
+
+def test_background_thread_polls_what_becomes_due():
+    mock, registry, client = lost_callbacks()
+    done = threading.Event()
+    reconciler = Reconciler(client, handler=lambda transaction: done.set(), watch=False)
+    with reconciler:
+        reconciler.track("unknown", delay=60)
+        response = checkout(client, "order-1")
+        reconciler.track("order-1", reference=response["transactionId"], delay=0.01)
+        assert done.wait(2)
+    assert "unknown" in reconciler and "order-1" not in reconciler
+    assert registry.get("order-1").succeeded
@@ -0,0 +1,73 @@
+import pytest
+import requests
+from azampay import RetryPolicy
+from azampay.azampay_exceptions import InternalServerError
+from azampay.retry import parse_retry_after
+
+FAST = RetryPolicy(max_retries=3, backoff_factor=0.001, jitter=False)
+
+
+def flaky(statuses):
+    statuses = list(statuses)
+
+    def route(request):
+        if statuses:
+            return statuses.pop(0), {"message": "busy"}
+        return 200, {"success": True, "transactionId": "tx"}
+
+    return route
+
+
+def checkout(gateway, external_id="1"):
+    return gateway.mobile_checkout(
+        mobile="0657649154", amount="1000", external_id=external_id, provider="Tigo"
+    )
+
+
+def test_transient_errors_are_retried_and_counted(adapter, make_client):
+    adapter.routes["/azampay/mno/checkout"] = flaky([503, 429, 502])
+    response = checkout(make_client(retry_policy=FAST))
+    assert response["success"] is True
+    assert response.meta.retries == 3
+    assert response.meta.endpoint == "/azampay/mno/checkout"
+    assert adapter.paths().count("/azampay/mno/checkout") == 4
+
+
+def test_retries_are_bounded_by_endpoint_budget(adapter, make_client):
+    adapter.routes["/azampay/mno/checkout"] = flaky([500, 500, 500])
+    policy = RetryPolicy(
+        backoff_factor=0.001, budgets={"/azampay/mno/checkout": 1}
+    )
+    with pytest.raises(InternalServerError):
+        checkout(make_client(retry_policy=policy))
+    assert adapter.paths().count("/azampay/mno/checkout") == 2
+
+
+def test_calls_without_idempotency_key_are_never_replayed(adapter, make_client):
+    adapter.routes["/azampay/mno/checkout"] = flaky([500])
+    with pytest.raises(InternalServerError):
+        checkout(make_client(retry_policy=FAST), external_id="")
+    assert adapter.paths().count("/azampay/mno/checkout") == 1
+
+
+def test_connection_errors_are_retried(adapter, make_client):
+    failures = [requests.ConnectionError("reset")]
+    send = adapter.send
+
+    def resetting_send(request, **kwargs):
+        if request.url.endswith("/GetPaymentPartners") and failures:
+            raise failures.pop()
+        return send(request, **kwargs)
+
+    adapter.send = resetting_send
+    assert make_client(retry_policy=FAST).supported_mnos == ["Airtel", "Tigo", "Halopesa"]
+
+
+def test_backoff():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(4)] == [1, 2, 4, 5]
+    assert policy.backoff(0, "3") == 3
+    assert RetryPolicy(respect_retry_after=False, jitter=False).backoff(0, "3") == 0.5
+    assert 0 <= RetryPolicy(backoff_factor=1).backoff(2) <= 4
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,119 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+import pytest
+
+from azampay.runner import Journal, main, read_rows, run_batch_file
+from tests.conftest import PAYOUTS_CSV
+
+
+def checkout_failing_for(*external_ids):
+    def checkout(request):
+        body = json.loads(request.body)
+        if body["externalId"] in external_ids:
+            return 500, {"message": "unavailable"}
+        return 200, {"success": True, "transactionId": "tx-" + body["externalId"]}
+
+    return checkout
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_rows_streams_csv_and_jsonl(tmp_path):
+    csv_file = tmp_path / "rows.csv"
+    csv_file.write_text('external_id,amount,additional_properties\n1,10,"{""a"": 1}"\n2,,\n')
+    assert list(read_rows(str(csv_file))) == [
+        {"external_id": "1", "amount": "10", "additional_properties": {"a": 1}},
+        {"external_id": "2"},
+    ]
+    jsonl = tmp_path / "rows.jsonl"
+    jsonl.write_text('{"external_id": "1"}\n\n{"external_id": "2"}\n')
+    assert [row["external_id"] for row in read_rows(str(jsonl))] == ["1", "2"]
+
+
+def test_journal_ignores_truncated_lines(tmp_path):
+    path = tmp_path / "journal"
+    path.write_text('{"external_id": "1", "status": "submitted"}\n{"external_id": "2", "stat')
+    with Journal(str(path)) as journal:
+        assert "1" in journal and "2" not in journal
+
+
+def test_journal_repairs_cut_lines_and_skips_non_objects(tmp_path):
+    path = tmp_path / "journal"
+    path.write_text('[1, 2]\nnull\n"x"\n{"external_id": "1", "status": "in_flight"}\n{"exter')
+    with Journal(str(path)) as journal:
+        assert journal.in_flight == {"1"}
+        journal.record("1", "submitted")
+        journal.record("2", "in_flight")
+    with Journal(str(path)) as journal:
+        assert "1" in journal and journal.in_flight == {"2"}
+
+
+def test_rows_left_in_flight_are_looked_up_before_resending(adapter, make_client, tmp_path):
+    path = tmp_path / "payouts.csv"
+    path.write_text(PAYOUTS_CSV)
+    journal = tmp_path / "payouts.csv.journal"
+    journal.write_text(
+        "".join(json.dumps({"external_id": i, "status": "in_flight"}) + "\n" for i in "124")
+    )
+
+    def status(request):
+        reference = parse_qs(urlsplit(request.url).query)["reference"][0]
+        if reference == "1":
+            data = {"transactionId": "tx-1", "transactionstatus": "success"}
+            return 200, {"data": data, "success": True}
+        if reference == "4":
+            return 500, {"message": "unavailable"}
+        return 200, {"data": None, "message": "Transaction not found", "success": False}
+
+    adapter.routes["/azampay/gettransactionstatus"] = status
+    adapter.routes["/azampay/mno/checkout"] = checkout_failing_for()
+    client = make_client()
+    client.retry_policy.max_retries = 0
+
+    progress = run_batch_file(client, str(path))
+    assert (progress.submitted, progress.failed, progress.rejected) == (2, 1, 2)
+    sent = [
+        json.loads(request.body)["externalId"]
+        for request in adapter.calls
+        if urlsplit(request.url).path == "/azampay/mno/checkout"
+    ]
+    assert "1" not in sent and "4" not in sent and "2" in sent
+    with Journal(str(journal)) as resumed:
+        assert resumed.submitted == {"1", "2"} and resumed.in_flight == {"4"}
+
+
+def test_run_resumes_from_the_journal(adapter, make_client, tmp_path):
+    path = tmp_path / "payouts.csv"
+    path.write_text(PAYOUTS_CSV)
+    adapter.routes["/azampay/mno/checkout"] = checkout_failing_for("4")
+    seen = []
+    client = make_client()
+    client.retry_policy.max_retries = 0
+
+    progress = run_batch_file(client, str(path), max_concurrency=2, on_progress=seen.append)
+    assert (progress.submitted, progress.failed, progress.rejected) == (2, 1, 2)
+    assert seen[-1] is progress
+    results = {(entry["external_id"], entry["status"]) for entry in read_jsonl(f"{path}.results.jsonl")}
+    assert results == {("1", "submitted"), ("2", "submitted"), ("3", "rejected"), ("2", "rejected"), ("4", "failed")}
+
+    adapter.routes["/azampay/mno/checkout"] = checkout_failing_for()
+    progress = run_batch_file(client, str(path))
+    assert (progress.submitted, progress.skipped, progress.rejected) == (1, 3, 1)
+    assert adapter.paths().count("/azampay/mno/checkout") == 4
+    submitted = [entry for entry in read_jsonl(f"{path}.journal") if entry["status"] == "submitted"]
+    assert sorted(entry["transaction_id"] for entry in submitted) == ["tx-1", "tx-2", "tx-4"]
+
+
+def test_cli(adapter, make_client, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "payouts.jsonl"
+    path.write_text('{"external_id": "1", "mobile": "0687649154", "amount": 100}\n')
+    assert main(["run-batch", str(path)], client=make_client()) == 0
+    assert "1 rows: 1 submitted" in capsys.readouterr().err
+
+    for name in ("APP_NAME", "CLIENT_ID", "CLIENT_SECRET"):
+        monkeypatch.delenv(name, raising=False)
+    with pytest.raises(SystemExit):
+        main(["run-batch", str(path)])
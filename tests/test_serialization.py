@@ -0,0 +1,73 @@
+import json
+from decimal import Decimal
+import pytest
+from azampay import Azampay, CheckoutResult, HTTPTransport, TokenInfo, serialization
+from azampay.serialization import Serializer, load_serializer
+
+
+@pytest.fixture
+def backend():
+    previous = serialization.get_serializer()
+    yield
+    serialization.use(previous)
+
+
+@pytest.mark.parametrize("name", serialization.BACKENDS)
+def test_backends_round_trip_compact_utf8(name):
+    try:
+        backend = load_serializer(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed")
+    body = {"amount": "1000", "externalId": "é-1", "cart": {"items": [{"name": "a/b"}]}}
+    encoded = backend.dumps(body)
+    assert isinstance(encoded, bytes) and b" " not in encoded
+    assert json.loads(encoded) == body
+    assert backend.loads(encoded) == body
+    assert backend.loads(encoded.decode()) == body
+    with pytest.raises(ValueError):
+        backend.loads(b"{not json")
+
+
+def test_fast_backends_fall_back_for_what_they_refuse():
+    def refuse(obj):
+        raise TypeError("unsupported")
+
+    backend = Serializer("strict", refuse, json.loads)
+    assert backend.dumps({"a": 1}) == b'{"a":1}'
+    with pytest.raises(TypeError):
+        load_serializer("json").dumps({"amount": Decimal("1")})
+    with pytest.raises(ValueError):
+        load_serializer("simplejson")
+
+
+def test_use_switches_the_package_backend(adapter, backend):
+    calls = []
+    custom = Serializer(
+        "counting", lambda obj: calls.append("dumps") or json.dumps(obj).encode(), json.loads
+    )
+    assert serialization.use(custom) is custom
+    client = Azampay(
+        app_name="app", client_id="client", client_secret="secret", transport=HTTPTransport(adapter=adapter)
+    )
+    client.mobile_checkout(mobile="0687649154", amount="1000", external_id="1")
+    assert calls == ["dumps", "dumps"]  # the token request and the checkout body
+    assert serialization.use("json").name == "json"
+
+
+def test_models_parse_only_what_is_used(adapter):
+    client = Azampay(
+        app_name="app", client_id="client", client_secret="secret", transport=HTTPTransport(adapter=adapter)
+    )
+    partners = client.payment_partners()
+    assert [(p.vendor_id, p.name) for p in partners][0] == ("v-airtel", "Airtel")
+    assert partners[0].raw["partnerName"] == "Airtel"
+
+    result = CheckoutResult.from_response(
+        client.mobile_checkout(mobile="0687649154", amount="1000", external_id="1")
+    )
+    assert result.success and result.transaction_id == "tx-1"
+    assert result.meta.endpoint == "/azampay/mno/checkout"
+    assert not CheckoutResult.from_response({"message": "failed"}).success
+
+    token = TokenInfo.from_response({"data": {"accessToken": "secret-token", "expire": "x"}})
+    assert token.access_token == "secret-token" and "secret-token" not in repr(token)
@@ -0,0 +1,168 @@
+import asyncio
+import time
+import pytest
+import requests
+from azampay import HTTPTransport, RetryPolicy, TransactionRegistry, InMemoryTransactionStore
+from azampay.azampay_exceptions import BadRequest, InternalServerError, InvalidCredentials
+from azampay.callbacks import CallbackEvent
+from azampay.testing import MOBILE_PATH, PARTNERS_PATH, TOKEN_PATH, MockAzamPay, MockServer
+
+FAST = RetryPolicy(max_retries=3, backoff_factor=0.001, jitter=False)
+
+
+def checkout(gateway, external_id="order-1"):
+    return gateway.mobile_checkout(mobile="0687649154", amount="1000", external_id=external_id)
+
+
+def test_checkout_is_answered_and_emits_a_callback():
+    registry = TransactionRegistry(InMemoryTransactionStore())
+    mock = MockAzamPay(
+        callback=lambda payload: registry.update_from_callback(CallbackEvent.from_payload(payload))
+    )
+    response = checkout(mock.client(transactions=registry))
+    assert response["success"] is True
+    assert mock.transactions[response["transactionId"]]["provider"] == "Airtel"
+    transaction = registry.wait("order-1", timeout=1)
+    assert transaction.succeeded
+    assert transaction.transaction_id == response["transactionId"]
+    assert mock.callbacks[0]["msisdn"] == "255687649154"
+
+
+def test_delayed_callbacks_and_failure_status():
+    delivered = []
+    mock = MockAzamPay(
+        callback=delivered.append, callback_delay=0.01, callback_status="failure"
+    )
+    checkout(mock.client())
+    assert delivered == []
+    mock.join(timeout=1)
+    assert delivered[0]["transactionstatus"] == "failure"
+
+
+def test_checkouts_are_idempotent_on_external_id():
+    mock = MockAzamPay()
+    gateway = mock.client()
+    first = checkout(gateway)
+    assert checkout(gateway)["transactionId"] == first["transactionId"]
+    assert len(mock.callbacks) == 1
+
+
+def test_injected_errors_are_retried():
+    mock = MockAzamPay()
+    mock.fail(MOBILE_PATH, 500, times=2)
+    response = checkout(mock.client(retry_policy=FAST))
+    assert response.meta.retries == 2
+    assert mock.count(MOBILE_PATH) == 3
+
+    mock.fail(MOBILE_PATH, 500, times=5)
+    with pytest.raises(InternalServerError):
+        checkout(mock.client(retry_policy=FAST), external_id="order-2")
+
+
+@pytest.mark.parametrize("status, error", [(400, BadRequest), (423, InvalidCredentials)])
+def test_injected_client_errors_raise(status, error):
+    mock = MockAzamPay()
+    mock.fail(MOBILE_PATH, status, times=2)
+    with pytest.raises(error):
+        checkout(mock.client(retry_policy=FAST))
+
+
+def test_timeouts_are_retried():
+    mock = MockAzamPay()
+    mock.fail(MOBILE_PATH, timeout=True)
+    gateway = mock.client(
+        transport=HTTPTransport(adapter=mock.adapter(), read_timeout=0.01), retry_policy=FAST
+    )
+    assert checkout(gateway)["success"] is True
+    assert mock.count(MOBILE_PATH) == 2
+
+
+def test_latency_above_the_read_timeout_times_out():
+    mock = MockAzamPay(latency=lambda path: 0.2 if path == MOBILE_PATH else 0)
+    gateway = mock.client(
+        transport=HTTPTransport(adapter=mock.adapter(), read_timeout=0.01), retry_policy=FAST
+    )
+    with pytest.raises(requests.Timeout):
+        checkout(gateway)
+
+
+def test_expired_tokens_are_refreshed_once():
+    mock = MockAzamPay()
+    gateway = mock.client()
+    checkout(gateway)
+    mock.expire_tokens()
+    checkout(gateway, external_id="order-2")
+    assert mock.count(TOKEN_PATH) == 2
+
+
+def test_invalid_credentials_are_rejected():
+    mock = MockAzamPay(credentials={"appName": "app", "clientId": "id", "clientSecret": "s"})
+    with pytest.raises(InvalidCredentials):
+        checkout(mock.client(client_secret="wrong"))
+    assert checkout(mock.client())["success"] is True
+
+
+def test_partners_are_fetched_once():
+    mock = MockAzamPay()
+    gateway = mock.client()
+    for external_id in ("a", "b", "c"):
+        link = gateway.generate_payment_link(amount="5000", external_id=external_id, provider="Tigo")
+        assert link["data"].endswith(f"/mock-tigo/{external_id}")
+    assert mock.count(PARTNERS_PATH) == 1
+
+
+def test_random_errors_are_reproducible():
+    def statuses(seed):
+        mock = MockAzamPay(error_rate=0.5, seed=seed)
+        return [mock.handle("GET", PARTNERS_PATH, {}, None)[0] for _ in range(20)]
+
+    assert statuses(7) == statuses(7)
+    assert set(statuses(7)) == {401, 500}
+
+
+def test_concurrent_batch_beats_serial_latency():
+    mock = MockAzamPay(latency=0.02)
+    gateway = mock.client()
+    rows = [
+        {"mobile": "0687649154", "amount": "1000", "external_id": str(index)}
+        for index in range(40)
+    ]
+    started = time.perf_counter()
+    results = list(gateway.batch_mobile_checkout(rows, max_concurrency=8))
+    elapsed = time.perf_counter() - started
+    assert all(result.ok for result in results)
+    assert elapsed < 40 * 0.02 / 2
+
+
+def test_server_round_trip_over_http():
+    delivered = []
+    with MockServer(MockAzamPay(callback=delivered.append)) as server:
+        gateway = server.client()
+        assert checkout(gateway)["success"] is True
+        assert gateway.supported_mnos
+        gateway.close()
+    assert delivered[0]["utilityref"] == "order-1"
+
+
+def test_async_client():
+    pytest.importorskip("httpx")
+    mock = MockAzamPay()
+    mock.fail(MOBILE_PATH, 503)
+
+    async def run():
+        gateway = mock.async_client(retry_policy=FAST)
+        try:
+            return await asyncio.gather(
+                *(
+                    gateway.mobile_checkout(
+                        mobile="0687649154", amount="1000", external_id=str(index)
+                    )
+                    for index in range(10)
+                )
+            )
+        finally:
+            await gateway.aclose()
+
+    responses = asyncio.run(run())
+    assert all(response["success"] for response in responses)
+    assert mock.count(MOBILE_PATH) == 11
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import pytest
+
+from azampay import Azampay, HTTPTransport
+from azampay.callbacks import CallbackEvent
+from azampay.transactions import (
+    FAILURE,
+    PENDING,
+    SUCCESS,
+    InMemoryTransactionStore,
+    SQLiteTransactionStore,
+    Transaction,
+    TransactionRegistry,
+    TransactionStore,
+)
+
+
+def callback(external_id="order-1", reference="tx-1", status="success"):
+    return CallbackEvent.from_payload(
+        {
+            "msisdn": "255687649154",
+            "amount": "1000",
+            "utilityref": external_id,
+            "operator": "Airtel",
+            "reference": reference,
+            "transactionstatus": status,
+        }
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryTransactionStore()
+    else:
+        store = SQLiteTransactionStore(str(tmp_path / "transactions.db"))
+        yield store
+        store.close()
+
+
+def test_stores_must_implement_get_find_and_save():
+    class Partial(TransactionStore):
+        def get(self, external_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_store_round_trip(store):
+    store.save(Transaction("order-1", transaction_id="tx-1", amount="1000"))
+    assert store.get("order-1").amount == "1000"
+    assert store.find("tx-1").external_id == "order-1"
+    assert store.get("missing") is None and store.find("missing") is None
+
+
+def test_sqlite_store_uses_wal_and_indexes(tmp_path):
+    store = SQLiteTransactionStore(str(tmp_path / "transactions.db"))
+    connection = store._connection
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE transaction_id = ?", ("x",)
+    ).fetchall()
+    assert "transactions_transaction_id" in str(plan)
+
+
+def test_registry_correlates_submission_and_callback(store):
+    registry = TransactionRegistry(store)
+    registry.record_submission("order-1", {"transactionId": "tx-1"}, amount="1000")
+    assert registry.get("order-1").status == PENDING
+    registry.update_from_callback(callback(status="Failure"))
+    transaction = registry.find("tx-1")
+    assert transaction.status == FAILURE and transaction.amount == "1000"
+
+
+def test_late_submission_does_not_reopen_completed_transaction():
+    registry = TransactionRegistry()
+    registry.update_from_callback(callback())
+    registry.record_submission("order-1", {"transactionId": "tx-1", "message": "ok"})
+    assert registry.get("order-1").status == SUCCESS
+
+
+def test_wait_blocks_until_callback():
+    registry = TransactionRegistry()
+    registry.record_submission("order-1", {"transactionId": "tx-1"})
+    threading.Timer(0.05, registry.update_from_callback, [callback()]).start()
+    assert registry.wait("order-1", timeout=5).succeeded
+    with pytest.raises(TimeoutError):
+        registry.wait("order-2", timeout=0.01)
+
+
+def test_await_completion_is_woken_from_another_thread():
+    registry = TransactionRegistry()
+
+    async def main():
+        threading.Timer(0.05, registry.update_from_callback, [callback()]).start()
+        transaction = await registry.await_completion("order-1", timeout=5)
+        with pytest.raises(TimeoutError):
+            await registry.await_completion("order-2", timeout=0.01)
+        return transaction
+
+    assert asyncio.run(main()).succeeded
+    assert registry._futures == {}
+
+
+def test_client_records_checkouts(adapter):
+    adapter.routes["/azampay/mno/checkout"] = lambda request: (
+        200,
+        {"success": True, "transactionId": "tx-1", "message": "queued"},
+    )
+    registry = TransactionRegistry()
+    azampay = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        transactions=registry,
+    )
+    azampay.mobile_checkout(
+        mobile="0687649154", amount="1,000", external_id="order-1", provider="Airtel"
+    )
+    transaction = registry.get("order-1")
+    assert transaction.transaction_id == "tx-1"
+    assert transaction.account == "255687649154" and transaction.amount == "1000"
+    assert transaction.status == PENDING
+
+
+def test_rejected_checkouts_are_recorded_as_failed(adapter):
+    adapter.routes["/azampay/mno/checkout"] = lambda request: (
+        200,
+        {"success": False, "message": "Insufficient balance"},
+    )
+    registry = TransactionRegistry()
+    watched = []
+    registry.on_submission(watched.append)
+    azampay = Azampay(
+        app_name="app",
+        client_id="client",
+        client_secret="secret",
+        transport=HTTPTransport(adapter=adapter),
+        transactions=registry,
+    )
+    azampay.mobile_checkout(
+        mobile="0687649154", amount="1000", external_id="order-1", provider="Airtel"
+    )
+    transaction = registry.wait("order-1", timeout=0)
+    assert transaction.status == FAILURE and transaction.message == "Insufficient balance"
+    assert watched == []
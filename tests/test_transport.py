@@ -0,0 +1,38 @@
+from azampay import HTTPTransport
+
+
+def test_session_is_reused_per_host():
+    transport = HTTPTransport()
+    first = transport.session_for("https://sandbox.azampay.co.tz/azampay/mno/checkout")
+    second = transport.session_for("https://sandbox.azampay.co.tz/api/v1/Partner")
+    other = transport.session_for("https://authenticator-sandbox.azampay.co.tz/x")
+    assert first is second
+    assert first is not other
+    transport.close()
+
+
+def test_requests_go_through_injected_adapter(adapter, make_client):
+    gateway = make_client()
+    response = gateway.mobile_checkout(
+        mobile="0657649154", amount="1,000", external_id="1", provider="tigo"
+    )
+    assert response["transactionId"] == "tx-1"
+    assert adapter.paths() == [
+        "/AppRegistration/GenerateToken",
+        "/api/v1/Partner/GetPaymentPartners",
+        "/azampay/mno/checkout",
+    ]
+    assert adapter.calls[-1].headers["Authorization"] == "Bearer token-1"
+
+
+def test_timeouts_are_applied(adapter, make_client):
+    seen = []
+    send = adapter.send
+
+    def recording_send(request, **kwargs):
+        seen.append(kwargs.get("timeout"))
+        return send(request, **kwargs)
+
+    adapter.send = recording_send
+    make_client(transport_options={"connect_timeout": 1.5, "read_timeout": 7}).supported_mnos_data()
+    assert seen == [(1.5, 7), (1.5, 7)]